@@ -1,22 +1,28 @@
 # /home/marcos/Maratonando/maratonando_src/cli.py
 import click
 
-from .core.searcher import perform_search
+from . import config
+from .core.searcher import iter_search
 from .core import parsers
+from .core.quality import QUALITY_CHOICES, QualitySelector
 # Importa a classe ExternalMediaPlayer em vez da função play_video inexistente
 from .core.player import ExternalMediaPlayer
 import traceback
 
 # Mapeamento de nome da fonte para instâncias das classes de parser.
 # A chave DEVE corresponder ao valor do campo 'source' nos resultados de `perform_search`.
-PARSER_MAP = {
-    'AnimeFire': parsers.AnimeFireParser(),
-    # Adicione outros parsers aqui conforme necessário.
-    # Ex: 'MeuNovoParser': parsers.MeuNovoParser(),
-}
+# É o registro compartilhado: cada parser só é importado/instanciado quando usado.
+# Para adicionar uma fonte, veja PARSER_SOURCES em core/parsers/__init__.py.
+PARSER_MAP = parsers.registry
 
-# Cria uma instância do player para ser usada pela CLI
-PLAYER_INSTANCE = ExternalMediaPlayer()
+_player_instance = None
+
+def get_player() -> ExternalMediaPlayer:
+    """Instância do player usada pela CLI, criada só quando algo vai ser reproduzido."""
+    global _player_instance
+    if _player_instance is None:
+        _player_instance = ExternalMediaPlayer()
+    return _player_instance
 
 @click.group()
 def cli():
@@ -25,26 +31,61 @@ def cli():
     """
     pass
 
+def _choose_video_source(video_sources, preference=None, ask=False):
+    """
+    Escolhe a fonte de vídeo. Por padrão, automaticamente pela preferência de qualidade;
+    com `ask`, mostra as opções e pergunta (Enter aceita a sugerida).
+    """
+    if len(video_sources) == 1:
+        click.echo(f"  [CLI] Encontrada única fonte de vídeo ({video_sources[0]['label']}).")
+        return video_sources[0]
+    selector = QualitySelector(preference)
+    if not ask:
+        selected_source = selector.choose(video_sources, referer="https://animefire.io/")
+        others = ", ".join(source['label'] for source in video_sources if source is not selected_source)
+        click.echo(f"  [CLI] Qualidade {selected_source['label']} escolhida automaticamente "
+                   f"(outras: {others}; use --escolher-qualidade para escolher).")
+        return selected_source
+    ranked = selector.rank(video_sources)
+    click.echo("Qualidades/Fontes disponíveis:")
+    for i, source in enumerate(video_sources):
+        suggested = " (sugerida)" if source is ranked[0] else ""
+        click.echo(f"  {i+1}. {source['label']}{suggested}")
+    quality_options = {str(i+1): source for i, source in enumerate(video_sources)}
+    q_choice_str = click.prompt('Digite o número da qualidade/fonte desejada', type=click.Choice(quality_options.keys()),
+                                default=str(video_sources.index(ranked[0]) + 1))
+    return quality_options[q_choice_str]
+
+
 @cli.command()
 @click.argument('query', type=str)
-def buscar(query):
+@click.option('--qualidade', type=click.Choice(QUALITY_CHOICES, case_sensitive=False), default=None,
+              help="Qualidade escolhida automaticamente (padrão: auto, ou a variável MARATONANDO_QUALIDADE).")
+@click.option('--escolher-qualidade', is_flag=True, help="Pergunta a qualidade em vez de escolher sozinho.")
+def buscar(query, qualidade, escolher_qualidade):
     """Busca por animes, filmes ou séries."""
     click.echo(f"Buscando por: {query}...")
 
-    # Cria uma lista de instâncias de parsers ativos a partir do PARSER_MAP.
-    # No seu searcher.py, a lógica de quais parsers usar já está lá,
-    # então não precisamos passar active_parser_instances aqui.
-    # A função perform_search já lida com a iteração dos parsers configurados nela.
-    results = perform_search(query) # Simplificado: perform_search gerencia seus parsers internos
+    # Os resultados de cada fonte são exibidos assim que ela responde,
+    # sem esperar pelas demais. A numeração continua entre as fontes.
+    results = []
+    for batch in iter_search(query):
+        if batch['status'] == 'timeout':
+            click.echo(f"  [CLI] A fonte '{batch['source']}' não respondeu a tempo.", err=True)
+            continue
+        if batch['status'] == 'error':
+            click.echo(f"  [CLI] A busca na fonte '{batch['source']}' falhou (veja o log).", err=True)
+            continue
+        for result in batch['results']:
+            if not results:
+                click.echo("Resultados encontrados:")
+            results.append(result)
+            source_name = result.get('source', 'Desconhecida')
+            click.echo(f" {len(results)}. {result.get('title', '???')} [{source_name}] ({result.get('url', '???')})")
 
     if not results:
         click.echo("Nenhum resultado encontrado.")
     else:
-        click.echo("Resultados encontrados:")
-        for i, result in enumerate(results):
-            source_name = result.get('source', 'Desconhecida')
-            click.echo(f" {i+1}. {result.get('title', '???')} [{source_name}] ({result.get('url', '???')})")
-
         try:
             choice = click.prompt('Digite o número do item que deseja selecionar', type=int)
             if 1 <= choice <= len(results):
@@ -92,27 +133,12 @@ def buscar(query):
                                 video_sources = parser_instance.get_video_source(episode_page_url)
 
                                 if video_sources:
-                                    final_video_url = None
-                                    selected_label = "???"
-
-                                    if len(video_sources) == 1:
-                                        final_video_url = video_sources[0]['src']
-                                        selected_label = video_sources[0]['label']
-                                        click.echo(f"  [CLI] Encontrada única fonte de vídeo ({selected_label}).")
-                                    else:
-                                        click.echo("Qualidades disponíveis:")
-                                        quality_options = {str(i+1): source for i, source in enumerate(video_sources)}
-                                        for i, source in enumerate(video_sources):
-                                            click.echo(f"  {i+1}. {source['label']}")
-
-                                        q_choice_str = click.prompt('Digite o número da qualidade desejada', type=click.Choice(quality_options.keys()))
-                                        selected_source = quality_options[q_choice_str]
-                                        final_video_url = selected_source['src']
-                                        selected_label = selected_source['label']
-
+                                    selected_source = _choose_video_source(video_sources, qualidade, escolher_qualidade)
+                                    final_video_url = selected_source['src']
+                                    selected_label = selected_source['label']
                                     click.echo(f"URL final do vídeo para tocar ({selected_label}): {final_video_url}")
                                     ep_title = selected_episode.get('title', 'Episódio')
-                                    PLAYER_INSTANCE.play_episode( # Usa o método da instância do player
+                                    get_player().play_episode( # Usa o método da instância do player
                                         final_video_url,
                                         title=f"{selected_item.get('title')} - {ep_title}",
                                         referer="https://animefire.io/"
@@ -133,25 +159,11 @@ def buscar(query):
                         video_sources = parser_instance.get_video_source(content_url_for_movie)
 
                         if video_sources:
-                            final_video_url = None
-                            selected_label = "???"
-
-                            if len(video_sources) == 1:
-                                final_video_url = video_sources[0]['src']
-                                selected_label = video_sources[0]['label']
-                                click.echo(f"  [CLI] Encontrada única fonte de vídeo ({selected_label}).")
-                            else:
-                                click.echo("Qualidades/Fontes disponíveis:")
-                                quality_options = {str(i+1): source for i, source in enumerate(video_sources)}
-                                for i, source in enumerate(video_sources):
-                                    click.echo(f"  {i+1}. {source['label']}")
-                                q_choice_str = click.prompt('Digite o número da qualidade/fonte desejada', type=click.Choice(quality_options.keys()))
-                                selected_source = quality_options[q_choice_str]
-                                final_video_url = selected_source['src']
-                                selected_label = selected_source['label']
-
+                            selected_source = _choose_video_source(video_sources, qualidade, escolher_qualidade)
+                            final_video_url = selected_source['src']
+                            selected_label = selected_source['label']
                             click.echo(f"URL final do vídeo para tocar ({selected_label}): {final_video_url}")
-                            PLAYER_INSTANCE.play_episode( # Usa o método da instância do player
+                            get_player().play_episode( # Usa o método da instância do player
                                 final_video_url,
                                 title=selected_item.get('title', 'Filme'),
                                 referer="https://animefire.io/"
@@ -173,5 +185,165 @@ def buscar(query):
              click.echo(f"Ocorreu um erro inesperado: {e}", err=True)
              traceback.print_exc() # Mostra o traceback completo para depuração
 
+def _parse_episode_range(spec: str, total: int):
+    """Converte '1-12', '1,3,5-8' etc. em índices (base 0) dos episódios. A temporada tem `total` episódios."""
+    indexes, seen = [], set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        try:
+            first, last = int(start), int(end or start)
+        except ValueError:
+            raise click.BadParameter(f"intervalo inválido: '{part}'", param_hint="--episodios")
+        if first < 1 or last < first:
+            raise click.BadParameter(f"intervalo inválido: '{part}'", param_hint="--episodios")
+        if first > total:
+            raise click.BadParameter(f"'{part}' começa depois do último episódio ({total})", param_hint="--episodios")
+        for i in range(first - 1, min(last, total)):
+            if i not in seen:
+                seen.add(i)
+                indexes.append(i)
+    if not indexes:
+        raise click.BadParameter("nenhum episódio selecionado", param_hint="--episodios")
+    return indexes
+
+
+def _choose_anime(query: str):
+    """Busca e pede para o usuário escolher um resultado. Retorna o item escolhido ou None."""
+    results = []
+    for batch in iter_search(query):
+        if batch['status'] != 'ok':
+            click.echo(f"  [CLI] A fonte '{batch['source']}' "
+                       f"{'não respondeu a tempo' if batch['status'] == 'timeout' else 'falhou'}.", err=True)
+        for result in batch['results']:
+            results.append(result)
+            click.echo(f" {len(results)}. {result.get('title', '???')} [{result.get('source', 'Desconhecida')}]")
+    if not results:
+        click.echo("Nenhum resultado encontrado.")
+        return None
+    choice = click.prompt('Digite o número do anime', type=click.IntRange(1, len(results)))
+    return results[choice - 1]
+
+
+@cli.command('baixar-temporada')
+@click.argument('query', type=str, required=False)
+@click.option('--episodios', '-e', default=None, help="Episódios a baixar, ex: 1-12 ou 1,3,5-8 (padrão: todos).")
+@click.option('--destino', '-d', type=click.Path(file_okay=False), default=None,
+              help="Pasta de destino (padrão: ~/Downloads/Maratonando/<anime>).")
+@click.option('--paralelos', '-p', type=click.IntRange(1, 16), default=None,
+              help=f"Quantos episódios baixar ao mesmo tempo (padrão: {config.DOWNLOAD_WORKERS}; "
+                   f"no máximo {config.DOWNLOAD_PER_HOST_LIMIT} do mesmo servidor de vídeo).")
+@click.option('--qualidade', type=click.Choice(QUALITY_CHOICES, case_sensitive=False), default=None,
+              help="Qualidade dos episódios (padrão: auto, ou a variável MARATONANDO_QUALIDADE).")
+@click.option('--limite-banda', type=click.IntRange(min=0), default=None, metavar="KB/S",
+              help="Limite de banda somado dos downloads diretos (MP4), em KB/s (0 = sem limite).")
+def baixar_temporada(query, episodios, destino, paralelos, qualidade, limite_banda):
+    """
+    Baixa vários episódios de um anime em paralelo.
+
+    Os episódios entram numa fila salva em disco: se o download for interrompido,
+    rode o comando de novo sem QUERY para continuar de onde parou.
+    """
+    import shutil
+    import sys
+    import threading
+    from .core.download_queue import get_download_queue, STATUS_DONE, STATUS_FAILED, STATUS_RUNNING, STATUS_PENDING
+    queue = get_download_queue()
+
+    if query:
+        try:
+            selected_item = _choose_anime(query)
+        except click.exceptions.Abort:
+            click.echo("\nSeleção cancelada.")
+            return
+        if not selected_item:
+            return
+        source_name = selected_item.get('source')
+        parser_instance = PARSER_MAP.get(source_name)
+        if not parser_instance:
+            click.echo(f"  [CLI] Parser para a fonte '{source_name}' não encontrado no PARSER_MAP.", err=True)
+            return
+        details = parser_instance.get_details(selected_item['url'], fallback_image=selected_item.get('image', ''))
+        episodes = (details or {}).get('episodes') or []
+        if not episodes:
+            click.echo("  [CLI] Nenhum episódio encontrado para este anime.", err=True)
+            return
+        if episodios:
+            episodes = [episodes[i] for i in _parse_episode_range(episodios, len(episodes))]
+        anime_title = (details or {}).get('title') or selected_item.get('title', 'Anime')
+        queue.add_season(anime_title, episodes, parser=source_name, output_dir=destino)
+        click.echo(f"{len(episodes)} episódio(s) de '{anime_title}' na fila.")
+
+    if not queue.has_active_jobs():
+        click.echo("Nada para baixar. Informe um anime, ex: maratonando baixar-temporada naruto")
+        return
+
+    # Os listeners rodam nas threads dos downloads: a saída passa por um lock.
+    # Num terminal, o progresso dos episódios em andamento fica numa linha só, reescrita no lugar.
+    output_lock = threading.Lock()
+    live_progress = {}
+    show_progress = sys.stdout.isatty()
+
+    def echo_above_progress(message, err=False):
+        with output_lock:
+            if show_progress:
+                click.echo("\r\033[K", nl=False)
+            click.echo(message, err=err)
+            if show_progress and live_progress:
+                click.echo(progress_line(), nl=False)
+
+    def progress_line():
+        width = shutil.get_terminal_size().columns
+        text = "  ↓ " + " | ".join(f"{title}: {progress.summary()}" for title, progress in live_progress.values())
+        return text[:width - 1]
+
+    def on_job_change(job):
+        with output_lock:
+            live_progress.pop(job.id, None)
+        if job.status == STATUS_RUNNING:
+            echo_above_progress(f"  ↓ Baixando: {job.filename} (tentativa {job.attempts})")
+        elif job.status == STATUS_DONE:
+            echo_above_progress(f"  ✓ Concluído: {job.filename}")
+        elif job.status == STATUS_FAILED:
+            echo_above_progress(f"  ✗ Falhou: {job.filename}: {job.error}", err=True)
+        elif job.status == STATUS_PENDING and job.error:
+            echo_above_progress(f"  ↻ Nova tentativa depois: {job.filename} ({job.error})", err=True)
+
+    def on_progress(job, progress):
+        if not show_progress or job.status != STATUS_RUNNING:
+            return
+        with output_lock:
+            live_progress[job.id] = (job.episode_title, progress)
+            click.echo("\r\033[K" + progress_line(), nl=False)
+
+    if paralelos:
+        queue.max_workers = paralelos
+    if qualidade:
+        queue.quality_preference = qualidade.lower()
+    if limite_banda is not None:
+        from .core.segmented_downloader import get_segmented_downloader
+        get_segmented_downloader().max_bytes_per_second = limite_banda * 1024
+    queue.add_listener(on_job_change)
+    queue.add_progress_listener(on_progress)
+    queue.start()
+    try:
+        queue.wait()
+    except KeyboardInterrupt:
+        live_progress.clear()
+        click.echo("\nInterrompendo os downloads em andamento...")
+        queue.stop(interrupt_running=True)
+        click.echo("Downloads interrompidos. A fila foi salva; rode 'maratonando baixar-temporada' para continuar.")
+        return
+    finally:
+        queue.remove_listener(on_job_change)
+        queue.remove_progress_listener(on_progress)
+
+    jobs = queue.jobs()
+    done = sum(1 for job in jobs if job.status == STATUS_DONE)
+    failed = sum(1 for job in jobs if job.status == STATUS_FAILED)
+    click.echo(f"Fila concluída: {done} baixado(s), {failed} com falha.")
+
 if __name__ == '__main__':
     cli()
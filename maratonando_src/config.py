@@ -0,0 +1,109 @@
+# /home/marcos/Maratonando/maratonando_src/config.py
+import os
+from pathlib import Path
+
+APP_NAME = "maratonando"
+
+# --- Cache de respostas HTTP ---
+# Tempo (em segundos) em que uma resposta guardada é usada sem consultar o site.
+# Depois disso ela é revalidada (ETag/Last-Modified) e, se o site estiver fora do ar,
+# a cópia antiga continua sendo usada.
+HTTP_CACHE_TTL_SEARCH = 10 * 60        # Páginas de busca mudam com frequência
+HTTP_CACHE_TTL_DETAILS = 6 * 60 * 60   # Página do anime (capa, sinopse, episódios)
+HTTP_CACHE_TTL_VIDEO = 60              # Página do episódio / JSON com links (links expiram)
+HTTP_CACHE_MAX_BYTES = 100 * 1024 * 1024
+# Detalhes de animes já extraídos (um arquivo por anime). Os menos usados saem quando
+# passa do limite, e os que não são lidos há PARSED_CACHE_MAX_AGE segundos também.
+PARSED_CACHE_MAX_ENTRIES = 2000
+PARSED_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
+# --- Pré-carregamento de episódios ---
+# Ao começar um episódio, as fontes de vídeo dos próximos são resolvidas em segundo
+# plano e guardadas em memória só enquanto os links valem: a validade vem do parâmetro
+# de expiração da URL (expires=, exp=...) quando houver, senão de VIDEO_PREFETCH_TTL.
+# Antes de expirar, as fontes são resolvidas de novo, por até VIDEO_PREFETCH_KEEP segundos
+# (o suficiente para o episódio atual terminar e o usuário abrir o próximo).
+VIDEO_PREFETCH_COUNT = 2
+VIDEO_PREFETCH_TTL = 5 * 60                # Validade assumida quando a URL não informa
+VIDEO_PREFETCH_REFRESH_MARGIN = 60         # Renova este tanto de segundos antes de expirar
+VIDEO_PREFETCH_KEEP = 90 * 60
+VIDEO_PREFETCH_WORKERS = 2
+
+# --- Qualidade do vídeo ---
+# Qualidade escolhida automaticamente quando o episódio tem várias fontes: "auto" (a maior
+# que a conexão aguenta), "max", "min" ou um teto como "720p". A variável de ambiente
+# MARATONANDO_QUALIDADE tem prioridade. A escolha manual continua disponível (ver --escolher-qualidade).
+VIDEO_QUALITY_PREFERENCE = "auto"
+# Sonda (GET pequeno com Range, em paralelo) as fontes antes de escolher, para pular links
+# quebrados e medir a velocidade de cada servidor.
+VIDEO_QUALITY_PROBE = True
+VIDEO_QUALITY_PROBE_TIMEOUT = 2.0
+
+# --- Velocidade dos servidores de vídeo ---
+# Vazão e latência medidas por host (downloads, pré-busca e sondagens), usadas para
+# preferir o servidor mais rápido entre fontes de mesma qualidade e, no modo "auto",
+# para saber que qualidade cada servidor aguenta. Guardadas entre execuções.
+BANDWIDTH_FILE = "bandwidth.json"
+BANDWIDTH_HALF_LIFE = 6 * 60 * 60              # Medições perdem metade do peso a cada 6 h
+BANDWIDTH_MIN_SAMPLE_BYTES = 128 * 1024        # Transferências menores medem só latência
+BANDWIDTH_PROBE_BYTES = 256 * 1024
+BANDWIDTH_PROBE_MAX_AGE = 15 * 60              # Hosts medidos há menos tempo não são sondados na pré-busca
+
+# --- Capas ---
+# Threads que baixam/carregam capas. Fica abaixo do limite de conexões por host do
+# cliente HTTP para sobrar conexão para a busca e os episódios.
+IMAGE_LOADER_WORKERS = 4
+# Espaço máximo das miniaturas em disco (as menos usadas são removidas primeiro).
+THUMBNAIL_CACHE_MAX_BYTES = 30 * 1024 * 1024
+
+# --- Histórico ---
+# Quantidade máxima de episódios guardados no histórico (os mais antigos saem primeiro).
+HISTORY_MAX_ENTRIES = 50000
+# Segundos que as escritas do histórico esperam antes de ir para o disco (rajadas viram um só commit).
+HISTORY_WRITE_DELAY = 1.0
+
+# --- Downloads ---
+# Episódios baixados ao mesmo tempo (cada um é um processo do yt-dlp).
+DOWNLOAD_WORKERS = 3
+# Downloads simultâneos por servidor de vídeo, para não ser bloqueado pelo host.
+DOWNLOAD_PER_HOST_LIMIT = 2
+# Tentativas por episódio; a espera entre elas dobra a cada falha (30s, 60s, 120s...).
+DOWNLOAD_MAX_ATTEMPTS = 4
+DOWNLOAD_RETRY_BASE_DELAY = 30
+DOWNLOAD_RETRY_MAX_DELAY = 30 * 60
+# Intervalo mínimo (segundos) entre avisos de progresso de um download para a GUI/CLI.
+DOWNLOAD_PROGRESS_INTERVAL = 0.5
+# Arquivo (no diretório de configuração) com a fila, para retomar depois de fechar o app.
+DOWNLOAD_QUEUE_FILE = "downloads.json"
+# Fontes MP4 diretas são baixadas sem o yt-dlp, em partes paralelas (HTTP Range).
+# iframe/HLS e servidores que não respondem como arquivo de vídeo continuam com o yt-dlp.
+DOWNLOAD_NATIVE_MP4 = True
+DOWNLOAD_SEGMENTS = 4                          # Partes simultâneas por episódio
+DOWNLOAD_MIN_SEGMENT_BYTES = 4 * 1024 * 1024   # Arquivos menores usam menos partes
+# Limite de banda somado dos downloads diretos, em bytes/s (0 = sem limite).
+DOWNLOAD_MAX_BYTES_PER_SECOND = 0
+# Vídeos HLS (.m3u8): segmentos baixados ao mesmo tempo (e guardados em memória até a vez de
+# serem gravados) e se o resultado é remuxado para MP4 com o ffmpeg, quando ele está instalado.
+DOWNLOAD_HLS_WINDOW = 8
+DOWNLOAD_HLS_REMUX = True
+
+
+def get_cache_dir(*subdirs: str) -> Path:
+    """Retorna (criando se necessário) o diretório de cache do app, ex: ~/.cache/maratonando/<subdirs>."""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or str(Path.home() / ".cache")
+    path = Path(cache_home, APP_NAME, *subdirs)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def get_download_dir() -> Path:
+    """Diretório padrão dos downloads, ex: ~/Downloads/Maratonando."""
+    return Path.home() / "Downloads" / "Maratonando"
+
+
+def get_config_dir() -> Path:
+    """Retorna (criando se necessário) o diretório de configuração do app, ex: ~/.config/maratonando."""
+    config_home = os.environ.get('XDG_CONFIG_HOME') or str(Path.home() / ".config")
+    path = Path(config_home, APP_NAME)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,244 @@
+# /home/marcos/Maratonando/maratonando_src/core/bandwidth.py
+import atexit
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from .. import config
+from ..utils.helpers import write_atomic
+
+log = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+MAX_WEIGHT = 8.0      # Peso máximo acumulado: uma medição nova sempre pesa pelo menos 1/9
+PROBE_WEIGHT = 0.25   # Uma sondagem pequena vale menos que um download inteiro
+SUSTAINED_WEIGHT = 1.0  # Peso mínimo para a média valer como banda sustentada (ao menos um download)
+SAVE_INTERVAL = 30.0  # Segundos mínimos entre gravações do arquivo
+
+
+def host_of(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+class HostStats:
+    """
+    Médias (com decaimento no tempo) de vazão em bits/s e latência em segundos de um servidor.
+    Cada média tem o próprio horário de atualização: uma medição de latência não "renova" a vazão.
+    """
+    __slots__ = ('throughput_bps', 'throughput_weight', 'throughput_updated_at',
+                 'latency', 'latency_weight', 'latency_updated_at')
+
+    def __init__(self, throughput_bps: Optional[float] = None, throughput_weight: float = 0.0,
+                 throughput_updated_at: float = 0.0, latency: Optional[float] = None,
+                 latency_weight: float = 0.0, latency_updated_at: float = 0.0):
+        self.throughput_bps = throughput_bps
+        self.throughput_weight = throughput_weight
+        self.throughput_updated_at = throughput_updated_at
+        self.latency = latency
+        self.latency_weight = latency_weight
+        self.latency_updated_at = latency_updated_at
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HostStats":
+        if 'updated_at' in data: # Arquivo antigo, com um horário só para as duas médias
+            data = dict(data, throughput_updated_at=data['updated_at'], latency_updated_at=data['updated_at'])
+        return cls(**{field: data[field] for field in cls.__slots__ if field in data})
+
+
+def _decayed_average(value: Optional[float], weight: float, age: float, half_life: float,
+                     sample: float, sample_weight: float):
+    """Junta uma medição à média: o peso antigo cai pela metade a cada `half_life` segundos."""
+    weight = weight * 0.5 ** (max(0.0, age) / half_life) if value is not None else 0.0
+    total = weight + sample_weight
+    average = sample if value is None else (value * weight + sample * sample_weight) / total
+    return average, min(total, MAX_WEIGHT)
+
+
+class BandwidthEstimator:
+    """
+    Estimativa de vazão e latência por servidor de vídeo (host da URL `src`).
+
+    Alimentada pelos downloads (vazão média de cada um), pela pré-busca dos próximos
+    episódios e pelas sondagens da escolha de qualidade (um GET pequeno com Range). Cada
+    host guarda uma média com decaimento: medições antigas perdem metade do peso a cada
+    `half_life` segundos, então um servidor que ficou lento (ou voltou) é percebido logo.
+    O estado fica em `state_path` (JSON), para valer entre execuções.
+    """
+    def __init__(self, state_path: Optional[Path] = None, half_life: float = config.BANDWIDTH_HALF_LIFE,
+                 min_sample_bytes: int = config.BANDWIDTH_MIN_SAMPLE_BYTES):
+        self.state_path = Path(state_path) if state_path else None
+        self.half_life = half_life
+        self.min_sample_bytes = min_sample_bytes
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, HostStats] = {}
+        self._dirty = False
+        self._last_save = 0.0
+        self._http = None
+        self._load()
+
+    # --- Estado em disco ---
+
+    def _load(self):
+        if self.state_path is None:
+            return
+        try:
+            data = json.loads(self.state_path.read_text(encoding='utf-8'))
+            for host, stats in data.get('hosts', {}).items():
+                self._hosts[host] = HostStats.from_dict(stats)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError) as e:
+            log.warning(f"[Banda] Não foi possível ler {self.state_path}: {e}")
+
+    def save(self):
+        """Grava o estado se houve mudança."""
+        if self.state_path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'version': STATE_VERSION, 'hosts': {host: stats.to_dict() for host, stats in self._hosts.items()}}
+            self._dirty = False
+            self._last_save = time.monotonic()
+        try:
+            write_atomic(self.state_path, json.dumps(data, indent=1).encode('utf-8'))
+        except OSError as e:
+            log.warning(f"[Banda] Não foi possível salvar {self.state_path}: {e}")
+
+    def _changed(self):
+        """Marca mudança e grava, no máximo a cada SAVE_INTERVAL segundos. Chamar sem o lock."""
+        with self._lock:
+            self._dirty = True
+            due = time.monotonic() - self._last_save >= SAVE_INTERVAL
+        if due:
+            self.save()
+
+    # --- Medições ---
+
+    def record_transfer(self, url: str, size: int, seconds: float, weight: float = 1.0):
+        """Registra `size` bytes recebidos em `seconds` de um host. Transferências pequenas demais são ignoradas."""
+        host = host_of(url)
+        if not host or seconds <= 0 or size < self.min_sample_bytes:
+            return
+        throughput = size * 8 / seconds
+        now = time.time()
+        with self._lock:
+            stats = self._hosts.setdefault(host, HostStats())
+            stats.throughput_bps, stats.throughput_weight = _decayed_average(
+                stats.throughput_bps, stats.throughput_weight, now - stats.throughput_updated_at, self.half_life,
+                throughput, weight)
+            stats.throughput_updated_at = now
+        log.debug(f"[Banda] {host}: {throughput / 1e6:.1f} Mbit/s medidos, média {stats.throughput_bps / 1e6:.1f} Mbit/s.")
+        self._changed()
+
+    def record_latency(self, url: str, seconds: float):
+        """Registra o tempo até o primeiro byte de uma resposta."""
+        host = host_of(url)
+        if not host or seconds < 0:
+            return
+        now = time.time()
+        with self._lock:
+            stats = self._hosts.setdefault(host, HostStats())
+            stats.latency, stats.latency_weight = _decayed_average(
+                stats.latency, stats.latency_weight, now - stats.latency_updated_at, self.half_life, seconds, 1.0)
+            stats.latency_updated_at = now
+        self._changed()
+
+    # --- Consultas ---
+
+    def stats(self, url: str) -> Optional[HostStats]:
+        with self._lock:
+            return self._hosts.get(host_of(url))
+
+    def throughput(self, url: str) -> Optional[float]:
+        """Vazão estimada (bits/s) do host da URL, ou None se nunca foi medido."""
+        stats = self.stats(url)
+        return stats.throughput_bps if stats else None
+
+    def sustained_throughput(self, url: str) -> Optional[float]:
+        """
+        Vazão do host só se ela vem de downloads (peso >= SUSTAINED_WEIGHT), ou None.
+        Sondagens de poucos KB medem basicamente o início lento do TCP: servem para comparar
+        servidores entre si, mas subestimam a banda real e não devem limitar a qualidade.
+        """
+        stats = self.stats(url)
+        if stats is None or stats.throughput_weight < SUSTAINED_WEIGHT:
+            return None
+        return stats.throughput_bps
+
+    def is_stale(self, url: str, max_age: float = config.BANDWIDTH_PROBE_MAX_AGE) -> bool:
+        """True se o host nunca teve vazão medida ou a última medição tem mais de `max_age` segundos."""
+        stats = self.stats(url)
+        return stats is None or stats.throughput_bps is None or time.time() - stats.throughput_updated_at > max_age
+
+    # --- Sondagem ---
+
+    @property
+    def http(self):
+        """Cliente HTTP das sondagens: sem novas tentativas, para um host morto não atrasar a escolha."""
+        if self._http is None:
+            with self._lock:
+                if self._http is None:
+                    from ..utils.http_client import HttpClient # Só quem sonda precisa do requests
+                    self._http = HttpClient(retries=0, timeout=config.VIDEO_QUALITY_PROBE_TIMEOUT)
+        return self._http
+
+    def probe(self, url: str, referer: Optional[str] = None, size: int = config.BANDWIDTH_PROBE_BYTES,
+              timeout: float = config.VIDEO_QUALITY_PROBE_TIMEOUT, http=None) -> bool:
+        """
+        Baixa os primeiros `size` bytes da URL (GET com Range), registrando latência e vazão.
+        Retorna True se o servidor respondeu com o vídeo (200/206).
+        """
+        http = http or self.http
+        headers = {'Range': f"bytes=0-{size - 1}"}
+        if referer:
+            headers['Referer'] = referer
+        started = time.monotonic()
+        try:
+            with http.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                first_byte_at = time.monotonic()
+                if response.status_code not in (200, 206):
+                    return False
+                self.record_latency(url, first_byte_at - started)
+                received = 0
+                for chunk in response.iter_content(64 * 1024):
+                    received += len(chunk)
+                    if received >= size or time.monotonic() - started > timeout:
+                        break # O servidor pode ignorar o Range e mandar o arquivo todo
+            self.record_transfer(url, received, time.monotonic() - first_byte_at, weight=PROBE_WEIGHT)
+            return True
+        except Exception as e:
+            log.debug(f"[Banda] Sondagem de {host_of(url)} falhou: {e}")
+            return False
+
+    def probe_stale_hosts(self, sources: List[Dict[str, str]], referer: Optional[str] = None):
+        """Sonda (uma URL por host) os servidores das fontes ainda sem medição recente."""
+        probed = set()
+        for source in sources:
+            url = source.get('src', '')
+            host = host_of(url)
+            if host and host not in probed and urlparse(url).path and self.is_stale(url):
+                probed.add(host)
+                self.probe(url, referer=referer)
+
+
+_default_estimator: Optional[BandwidthEstimator] = None
+_default_estimator_lock = threading.Lock()
+
+
+def get_bandwidth_estimator() -> BandwidthEstimator:
+    """Estimador do processo (estado em ~/.config/maratonando/bandwidth.json, gravado também ao sair)."""
+    global _default_estimator
+    if _default_estimator is None:
+        with _default_estimator_lock:
+            if _default_estimator is None:
+                _default_estimator = BandwidthEstimator(config.get_config_dir() / config.BANDWIDTH_FILE)
+                atexit.register(_default_estimator.save)
+    return _default_estimator
@@ -0,0 +1,588 @@
+# /home/marcos/Maratonando/maratonando_src/core/download_queue.py
+import json
+import logging
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from .. import config
+from ..utils.helpers import write_atomic
+from .bandwidth import BandwidthEstimator, get_bandwidth_estimator
+from .downloader import DownloadProgress, download_episode
+from .hls_downloader import download_hls, is_hls_url
+from .quality import QualitySelector
+from .segmented_downloader import (UnsupportedSourceError, download_direct, get_segmented_downloader,
+                                   is_direct_video_url)
+
+log = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+
+STATUS_PENDING = "pendente"
+STATUS_RUNNING = "baixando"
+STATUS_DONE = "concluído"
+STATUS_FAILED = "falhou"
+STATUS_CANCELLED = "cancelado"
+ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+DEFAULT_REFERER = "https://animefire.io/"
+
+# Callback chamado (na thread de quem mudou o job) sempre que um download muda de estado.
+JobListener = Callable[["DownloadJob"], None]
+# Callback chamado (na thread do download) com o progresso de um job em andamento.
+ProgressListener = Callable[["DownloadJob", DownloadProgress], None]
+
+
+def safe_filename(name: str) -> str:
+    """Remove caracteres que não podem aparecer em nomes de arquivo/pasta."""
+    name = re.sub(r'[\\/:*?"<>|\x00-\x1f]', '', name).strip().strip('.')
+    return re.sub(r'\s+', ' ', name)[:150] or "episodio"
+
+
+class PermanentDownloadError(RuntimeError):
+    """Falha que não adianta tentar de novo (ex: fonte removida, yt-dlp não instalado)."""
+
+
+class DownloadJob:
+    """
+    Um episódio na fila. O id é a URL da página do episódio (o mesmo episódio não entra duas vezes).
+    `progress` (o último evento do yt-dlp enquanto baixa) não é salvo em disco.
+    """
+    FIELDS = ('episode_url', 'anime_title', 'episode_title', 'parser', 'output_dir', 'filename',
+              'status', 'attempts', 'next_attempt_at', 'error', 'added_at', 'finished_at')
+
+    def __init__(self, episode_url: str, anime_title: str, episode_title: str, parser: str,
+                 output_dir: str, filename: str):
+        self.episode_url = episode_url
+        self.anime_title = anime_title
+        self.episode_title = episode_title
+        self.parser = parser
+        self.output_dir = output_dir
+        self.filename = filename
+        self.status = STATUS_PENDING
+        self.attempts = 0
+        self.next_attempt_at = 0.0
+        self.error: Optional[str] = None
+        self.added_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.progress: Optional[DownloadProgress] = None
+
+    @property
+    def id(self) -> str:
+        return self.episode_url
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DownloadJob":
+        job = cls(data['episode_url'], data.get('anime_title', ''), data.get('episode_title', ''),
+                  data.get('parser', 'AnimeFire'), data.get('output_dir', ''), data.get('filename', ''))
+        for field in cls.FIELDS:
+            if field in data:
+                setattr(job, field, data[field])
+        return job
+
+
+class DownloadQueue:
+    """
+    Fila persistente de downloads de episódios.
+
+    - `max_workers` episódios baixam ao mesmo tempo, no máximo `per_host_limit` por
+      servidor de vídeo. A vaga no servidor é reservada antes de o job virar "baixando"
+      (o servidor é previsto pelo último vídeo do mesmo parser); com o servidor cheio, o
+      worker pega outro job ou espera, e o job continua pendente.
+    - O link do vídeo é resolvido na hora do download (os links do site expiram), com o
+      parser da fonte do episódio, e a qualidade é escolhida por `quality_preference`. Arquivos MP4 diretos são baixados por `direct_download`
+      (partes paralelas com HTTP Range) e playlists HLS por `hls_download` (segmentos em
+      paralelo); o resto, ou se o servidor não colaborar, pelo yt-dlp.
+    - A vazão somada dos downloads de cada servidor vai para o `bandwidth_estimator`, que
+      orienta a escolha da fonte dos próximos episódios.
+    - Falhas são tentadas de novo com espera crescente (base * 2^tentativa), até
+      `max_attempts`.
+    - O progresso de cada download (bytes, velocidade, tempo restante, fragmento) fica só
+      o último evento em `job.progress` e é repassado aos listeners de progresso no
+      máximo a cada `progress_interval` segundos por job.
+    - O estado fica em `state_path` (JSON, gravado de forma atômica a cada mudança). Ao
+      abrir de novo, o que estava pendente ou baixando volta para a fila; o yt-dlp
+      continua os arquivos .part de onde pararam.
+    """
+    def __init__(self,
+                 state_path: Path,
+                 max_workers: int = config.DOWNLOAD_WORKERS,
+                 per_host_limit: int = config.DOWNLOAD_PER_HOST_LIMIT,
+                 max_attempts: int = config.DOWNLOAD_MAX_ATTEMPTS,
+                 retry_base_delay: float = config.DOWNLOAD_RETRY_BASE_DELAY,
+                 retry_max_delay: float = config.DOWNLOAD_RETRY_MAX_DELAY,
+                 progress_interval: float = config.DOWNLOAD_PROGRESS_INTERVAL,
+                 download: Callable[..., bool] = download_episode,
+                 direct_download: Optional[Callable[..., Path]] = download_direct,
+                 hls_download: Optional[Callable[..., Path]] = download_hls,
+                 bandwidth_estimator: Optional[BandwidthEstimator] = None):
+        self.state_path = Path(state_path)
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.progress_interval = progress_interval
+        self.quality_preference: Optional[str] = None # None = preferência padrão (ver core/quality.py)
+        self._download = download
+        self._direct_download = direct_download if config.DOWNLOAD_NATIVE_MP4 else None
+        self._hls_download = hls_download
+        self._bandwidth_estimator = bandwidth_estimator
+        self._cond = threading.Condition()
+        self._jobs: Dict[str, DownloadJob] = {} # Na ordem em que entraram na fila
+        self._host_active: Dict[str, int] = {} # host -> downloads ocupando uma vaga dele
+        self._job_hosts: Dict[str, str] = {} # job -> host cuja vaga ele ocupa
+        self._parser_hosts: Dict[str, str] = {} # parser -> host do último vídeo resolvido
+        self._resolving: Dict[str, str] = {} # parser com host ainda desconhecido -> job que está resolvendo
+        self._host_traffic: Dict[str, Dict] = {} # host -> downloads ativos e bytes da janela atual
+        self._listeners: List[JobListener] = []
+        self._progress_listeners: List[ProgressListener] = []
+        self._cancel_events: Dict[str, threading.Event] = {} # Jobs em andamento
+        self._workers: List[threading.Thread] = []
+        self._stopping = False
+        self._load_state()
+
+    # --- Estado em disco ---
+
+    def _load_state(self):
+        try:
+            data = json.loads(self.state_path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log.error(f"[Downloads] Não foi possível ler a fila em {self.state_path}: {e}")
+            return
+        for item in data.get('jobs', []):
+            try:
+                job = DownloadJob.from_dict(item)
+            except (KeyError, TypeError):
+                continue
+            if job.status == STATUS_RUNNING: # O app fechou no meio do download
+                job.status = STATUS_PENDING
+            self._jobs[job.id] = job
+        pending = sum(1 for job in self._jobs.values() if job.status == STATUS_PENDING)
+        log.info(f"[Downloads] Fila carregada: {len(self._jobs)} itens, {pending} pendentes.")
+
+    def _save_state(self):
+        """Grava a fila. Deve ser chamado com `_cond` adquirido."""
+        data = {'version': STATE_VERSION, 'jobs': [job.to_dict() for job in self._jobs.values()]}
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.state_path, json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+        except OSError as e:
+            log.error(f"[Downloads] Não foi possível salvar a fila em {self.state_path}: {e}")
+
+    # --- Notificações ---
+
+    def add_listener(self, listener: JobListener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: JobListener):
+        try:
+            self._listeners.remove(listener)
+        except ValueError:
+            pass
+
+    def add_progress_listener(self, listener: ProgressListener):
+        self._progress_listeners.append(listener)
+
+    def remove_progress_listener(self, listener: ProgressListener):
+        try:
+            self._progress_listeners.remove(listener)
+        except ValueError:
+            pass
+
+    def _notify(self, job: DownloadJob):
+        for listener in list(self._listeners):
+            try:
+                listener(job)
+            except Exception:
+                log.exception("[Downloads] Erro em um listener da fila")
+
+    def _set_status(self, job: DownloadJob, status: str, error: Optional[str] = None):
+        with self._cond:
+            job.status = status
+            job.error = error
+            if status != STATUS_RUNNING:
+                job.progress = None
+            if status in (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED):
+                job.finished_at = time.time()
+            self._save_state()
+            self._cond.notify_all()
+        self._notify(job)
+
+    # --- Operações da fila ---
+
+    def add(self, episode_url: str, anime_title: str, episode_title: str, parser: str = "AnimeFire",
+            output_dir: Optional[str] = None) -> DownloadJob:
+        """Coloca um episódio na fila. Se ele já estava (e não está ativo), volta a ser pendente."""
+        return self.add_season(anime_title, [{'url': episode_url, 'title': episode_title}], parser, output_dir)[0]
+
+    def add_season(self, anime_title: str, episodes: List[Dict], parser: str = "AnimeFire",
+                   output_dir: Optional[str] = None) -> List[DownloadJob]:
+        """
+        Coloca vários episódios ({'url', 'title'}, como os de get_details) na fila de uma vez,
+        gravando o estado uma única vez. Padrão: pasta do anime dentro do diretório de downloads.
+        """
+        output_dir = output_dir or str(config.get_download_dir() / safe_filename(anime_title))
+        jobs, added = [], []
+        with self._cond:
+            for episode in episodes:
+                episode_url, episode_title = episode['url'], episode.get('title') or "Episódio"
+                job = self._jobs.get(episode_url)
+                if job is None or job.status not in ACTIVE_STATUSES:
+                    job = DownloadJob(episode_url, anime_title, episode_title, parser, output_dir,
+                                      safe_filename(f"{anime_title} - {episode_title}"))
+                    self._jobs.pop(episode_url, None)
+                    self._jobs[episode_url] = job
+                    added.append(job)
+                jobs.append(job)
+            if added:
+                self._save_state()
+                self._cond.notify_all()
+        for job in added:
+            self._notify(job)
+        if added:
+            log.info(f"[Downloads] {len(added)} episódio(s) de '{anime_title}' na fila.")
+        return jobs
+
+    def cancel(self, episode_url: str):
+        """Cancela um episódio. Se ele está baixando, o yt-dlp é encerrado (o worker marca como cancelado)."""
+        with self._cond:
+            job = self._jobs.get(episode_url)
+            if job is None:
+                return
+            if job.status == STATUS_RUNNING:
+                cancel_event = self._cancel_events.get(episode_url)
+                if cancel_event is not None:
+                    cancel_event.set()
+                return
+            if job.status != STATUS_PENDING:
+                return
+        self._set_status(job, STATUS_CANCELLED)
+
+    def cancel_pending(self):
+        for job in self.jobs():
+            if job.status == STATUS_PENDING:
+                self.cancel(job.id)
+
+    def retry_failed(self):
+        """Devolve os episódios que falharam (ou foram cancelados) para a fila, com tentativas zeradas."""
+        changed = []
+        with self._cond:
+            for job in self._jobs.values():
+                if job.status in (STATUS_FAILED, STATUS_CANCELLED):
+                    job.status, job.error, job.attempts, job.next_attempt_at = STATUS_PENDING, None, 0, 0.0
+                    changed.append(job)
+            if changed:
+                self._save_state()
+                self._cond.notify_all()
+        for job in changed:
+            self._notify(job)
+
+    def remove_finished(self):
+        """Tira da lista os episódios concluídos."""
+        with self._cond:
+            for episode_url in [job.id for job in self._jobs.values() if job.status == STATUS_DONE]:
+                del self._jobs[episode_url]
+            self._save_state()
+
+    def jobs(self) -> List[DownloadJob]:
+        with self._cond:
+            return list(self._jobs.values())
+
+    def has_active_jobs(self) -> bool:
+        with self._cond:
+            return any(job.status in ACTIVE_STATUSES for job in self._jobs.values())
+
+    # --- Workers ---
+
+    def start(self):
+        """Inicia os workers (uma vez só)."""
+        with self._cond:
+            if self._workers:
+                return
+            self._stopping = False
+            for i in range(self.max_workers):
+                worker = threading.Thread(target=self._worker, name=f"maratonando-download-{i}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+
+    def stop(self, interrupt_running: bool = False, timeout: Optional[float] = 10):
+        """
+        Não começa novos downloads. Por padrão, os que estão em andamento terminam (e ficam
+        salvos como concluídos). Com `interrupt_running`, o yt-dlp deles é encerrado, eles
+        voltam a ser pendentes (continuam do .part na próxima vez) e esta chamada espera
+        os workers saírem, até `timeout` segundos.
+        """
+        with self._cond:
+            self._stopping = True
+            if interrupt_running:
+                for cancel_event in self._cancel_events.values():
+                    cancel_event.set()
+            self._cond.notify_all()
+        if interrupt_running:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            for worker in list(self._workers):
+                worker.join(None if deadline is None else max(0, deadline - time.monotonic()))
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Espera a fila esvaziar (nada pendente nem baixando). Retorna False se o tempo acabou."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while any(job.status in ACTIVE_STATUSES for job in self._jobs.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _take_next_job(self) -> Optional[DownloadJob]:
+        """
+        Próximo job pendente cujo servidor tem vaga. O servidor é previsto pelo último vídeo
+        resolvido do mesmo parser; enquanto ele é desconhecido, só um job do parser resolve
+        por vez. Jobs de um servidor cheio ficam pendentes e outro é escolhido.
+        """
+        with self._cond:
+            while not self._stopping:
+                now = time.time()
+                next_retry_at = None
+                for job in self._jobs.values():
+                    if job.status != STATUS_PENDING:
+                        continue
+                    if job.next_attempt_at <= now:
+                        host = self._parser_hosts.get(job.parser)
+                        if host is None:
+                            if job.parser in self._resolving:
+                                continue
+                            self._resolving[job.parser] = job.id
+                        elif self._host_active.get(host, 0) >= self.per_host_limit:
+                            continue
+                        else:
+                            self._host_active[host] = self._host_active.get(host, 0) + 1
+                            self._job_hosts[job.id] = host
+                        job.status = STATUS_RUNNING
+                        job.attempts += 1
+                        self._cancel_events[job.id] = threading.Event()
+                        self._save_state()
+                        return job
+                    next_retry_at = min(next_retry_at or job.next_attempt_at, job.next_attempt_at)
+                self._cond.wait(None if next_retry_at is None else next_retry_at - now)
+        return None
+
+    def _claim_host(self, job: DownloadJob, host: str, cancel_event: threading.Event):
+        """
+        Garante a vaga do job no servidor real do vídeo. Normalmente ela já foi reservada
+        em _take_next_job; só espera se o host previsto estava errado (ou era desconhecido).
+        """
+        with self._cond:
+            self._parser_hosts[job.parser] = host
+            if self._resolving.get(job.parser) == job.id:
+                del self._resolving[job.parser]
+            self._cond.notify_all() # Outros jobs do parser já podem ser escolhidos
+            held = self._job_hosts.get(job.id)
+            if held == host:
+                return
+            if held is not None:
+                self._release_host_locked(job)
+            while self._host_active.get(host, 0) >= self.per_host_limit and not cancel_event.is_set():
+                self._cond.wait(1.0)
+            self._host_active[host] = self._host_active.get(host, 0) + 1
+            self._job_hosts[job.id] = host
+
+    def _release_host_locked(self, job: DownloadJob):
+        host = self._job_hosts.pop(job.id, None)
+        if host is not None:
+            self._host_active[host] -= 1
+        if self._resolving.get(job.parser) == job.id: # Falhou antes de descobrir o host
+            del self._resolving[job.parser]
+        self._cond.notify_all()
+
+    def _worker(self):
+        while True:
+            job = self._take_next_job()
+            if job is None:
+                return
+            self._notify(job)
+            cancel_event = self._cancel_events[job.id]
+            try:
+                self._run_job(job, cancel_event)
+            except Exception as e:
+                if cancel_event.is_set():
+                    self._finish_cancelled(job)
+                elif isinstance(e, PermanentDownloadError):
+                    log.error(f"[Downloads] '{job.filename}' falhou: {e}")
+                    self._set_status(job, STATUS_FAILED, str(e))
+                else:
+                    log.warning(f"[Downloads] '{job.filename}' falhou (tentativa {job.attempts}): {e}")
+                    self._schedule_retry(job, str(e))
+            else:
+                log.info(f"[Downloads] Concluído: {job.filename}")
+                self._set_status(job, STATUS_DONE)
+            finally:
+                with self._cond:
+                    self._cancel_events.pop(job.id, None)
+                    self._release_host_locked(job)
+
+    def _finish_cancelled(self, job: DownloadJob):
+        """Download encerrado no meio: cancelado pelo usuário, ou interrompido pelo stop() (volta para a fila)."""
+        with self._cond:
+            interrupted = self._stopping
+            if interrupted:
+                job.attempts -= 1 # Não foi uma falha
+        if interrupted:
+            log.info(f"[Downloads] Interrompido: {job.filename} (continua na próxima vez)")
+            self._set_status(job, STATUS_PENDING)
+        else:
+            log.info(f"[Downloads] Cancelado: {job.filename}")
+            self._set_status(job, STATUS_CANCELLED)
+
+    def _report_progress(self, job: DownloadJob, progress: DownloadProgress, state: Dict):
+        """Guarda o último evento e avisa os listeners, no máximo a cada progress_interval segundos."""
+        job.progress = progress
+        now = time.monotonic()
+        if progress.downloaded_bytes is not None:
+            previous = state.get('bytes')
+            state['bytes'] = progress.downloaded_bytes
+            # Sem evento anterior ou contagem recomeçada (outro downloader): nada a somar ainda.
+            received = progress.downloaded_bytes - previous if previous is not None else 0
+            self._add_host_traffic(state['host'], max(0, received), now)
+        if now - state['last'] < self.progress_interval and progress.status == 'downloading':
+            return
+        state['last'] = now
+        for listener in list(self._progress_listeners):
+            try:
+                listener(job, progress)
+            except Exception:
+                log.exception("[Downloads] Erro em um listener de progresso")
+
+    # --- Vazão por servidor ---
+    # Os downloads simultâneos de um host dividem a mesma conexão: a vazão de um só seria
+    # uma fração da banda real. Por isso os bytes de todos eles são somados numa janela por
+    # host (do primeiro byte até o último recebido) e, quando um download termina, a vazão
+    # somada da janela vai para o estimador e a janela recomeça.
+
+    def _start_host_traffic(self, host: str):
+        with self._cond:
+            traffic = self._host_traffic.setdefault(host, {'active': 0, 'bytes': 0, 'since': None, 'at': None})
+            traffic['active'] += 1
+
+    def _add_host_traffic(self, host: str, received: int, now: float):
+        with self._cond:
+            traffic = self._host_traffic[host]
+            if traffic['since'] is None:
+                traffic['since'] = now # O primeiro evento só marca o início (bytes de antes não contam)
+            else:
+                traffic['bytes'] += received
+            traffic['at'] = now
+
+    def _end_host_traffic(self, host: str, video_url: str):
+        """Fecha a janela do host e registra a vazão somada (sem limite de banda ligado, que a distorceria)."""
+        with self._cond:
+            traffic = self._host_traffic[host]
+            traffic['active'] -= 1
+            received, since, at = traffic['bytes'], traffic['since'], traffic['at']
+            traffic['bytes'] = 0
+            traffic['since'] = at if traffic['active'] else None
+        if since is None or at is None or get_segmented_downloader().max_bytes_per_second:
+            return
+        estimator = self._bandwidth_estimator or get_bandwidth_estimator()
+        estimator.record_transfer(video_url, received, at - since)
+
+    def _run_job(self, job: DownloadJob, cancel_event: threading.Event):
+        from .parsers import registry as parser_registry # Só quem baixa precisa dos parsers
+        if job.parser not in parser_registry:
+            raise PermanentDownloadError(f"fonte '{job.parser}' não está disponível")
+        sources = parser_registry[job.parser].get_video_source(job.episode_url)
+        if not sources:
+            raise RuntimeError("nenhuma fonte de vídeo encontrada")
+        source = QualitySelector(self.quality_preference, estimator=self._bandwidth_estimator).choose(
+            sources, referer=DEFAULT_REFERER)
+        log.info(f"[Downloads] '{job.filename}': qualidade {source.get('label', '?')}.")
+        video_url = source['src']
+        native = self._native_download_for(video_url)
+        if native is None:
+            self._require_ytdlp()
+        host = urlparse(video_url).hostname or ""
+        self._claim_host(job, host, cancel_event)
+        Path(job.output_dir).mkdir(parents=True, exist_ok=True)
+        if cancel_event.is_set(): # Cancelado enquanto esperava a vez no host
+            raise RuntimeError("cancelado")
+        progress_state = {'last': 0.0, 'host': host}
+        download_kwargs = dict(output_path=job.output_dir, filename=job.filename, referer=DEFAULT_REFERER,
+                               on_progress=lambda progress: self._report_progress(job, progress, progress_state),
+                               cancel_event=cancel_event)
+        self._start_host_traffic(host)
+        try:
+            self._download_source(job, video_url, native, download_kwargs)
+        finally:
+            self._end_host_traffic(host, video_url)
+
+    def _download_source(self, job: DownloadJob, video_url: str, native: Optional[Callable[..., Path]],
+                         download_kwargs: Dict):
+        """Baixa com o downloader próprio e, se o servidor não colaborar, com o yt-dlp."""
+        if native is not None:
+            try:
+                native(video_url, **(self._hls_kwargs(video_url, download_kwargs)
+                                     if native is self._hls_download else download_kwargs))
+                return
+            except UnsupportedSourceError as e:
+                if native is self._direct_download and 'mpegurl' in e.content_type and self._hls_download:
+                    try: # Playlist HLS sem a extensão .m3u8 na URL
+                        self._hls_download(video_url, **self._hls_kwargs(video_url, download_kwargs))
+                        return
+                    except UnsupportedSourceError as hls_error:
+                        e = hls_error
+                log.info(f"[Downloads] '{job.filename}' não pode ser baixado direto ({e}); usando o yt-dlp.")
+                self._require_ytdlp()
+        if not self._download(video_url, **download_kwargs):
+            raise RuntimeError("yt-dlp terminou com erro")
+
+    def _hls_kwargs(self, video_url: str, download_kwargs: Dict) -> Dict:
+        """A variante HLS segue a mesma preferência e o mesmo limite de banda da escolha da fonte."""
+        estimator = self._bandwidth_estimator or get_bandwidth_estimator()
+        return dict(download_kwargs, preference=self.quality_preference,
+                    bandwidth_bps=estimator.sustained_throughput(video_url))
+
+    def _native_download_for(self, video_url: str) -> Optional[Callable[..., Path]]:
+        """Downloader próprio para a URL (MP4 direto ou HLS), ou None para usar o yt-dlp."""
+        if self._hls_download is not None and is_hls_url(video_url):
+            return self._hls_download
+        if self._direct_download is not None and is_direct_video_url(video_url):
+            return self._direct_download
+        return None
+
+    def _require_ytdlp(self):
+        if self._download is download_episode and not shutil.which("yt-dlp"):
+            raise PermanentDownloadError("yt-dlp não encontrado. Instale-o para baixar vídeos.")
+
+    def _schedule_retry(self, job: DownloadJob, error: str):
+        if job.attempts >= self.max_attempts:
+            self._set_status(job, STATUS_FAILED, error)
+            return
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (job.attempts - 1))
+        with self._cond:
+            job.next_attempt_at = time.time() + delay
+        log.info(f"[Downloads] Nova tentativa de '{job.filename}' em {delay:.0f}s.")
+        self._set_status(job, STATUS_PENDING, error)
+
+
+_default_queue: Optional[DownloadQueue] = None
+_default_queue_lock = threading.Lock()
+
+
+def get_download_queue() -> DownloadQueue:
+    """Retorna a fila de downloads do processo (estado em ~/.config/maratonando/downloads.json)."""
+    global _default_queue
+    if _default_queue is None:
+        with _default_queue_lock:
+            if _default_queue is None:
+                _default_queue = DownloadQueue(config.get_config_dir() / config.DOWNLOAD_QUEUE_FILE)
+    return _default_queue
@@ -2,10 +2,128 @@
 import subprocess
 import shutil
 import os
+import threading
 import logging # Use logging instead of click
+from collections import deque
 from pathlib import Path
+from typing import Callable, Optional
 
-def download_episode(video_url: str, output_path: str = None, filename: str = None):
+# Linhas de progresso do yt-dlp (--progress-template). O prefixo as separa do resto da saída.
+PROGRESS_PREFIX = "[maratonando]"
+PROGRESS_FIELDS = ('status', 'downloaded_bytes', 'total_bytes', 'total_bytes_estimate',
+                   'speed', 'eta', 'fragment_index', 'fragment_count')
+PROGRESS_TEMPLATE = "download:" + PROGRESS_PREFIX + " " + "|".join(f"%(progress.{field})s" for field in PROGRESS_FIELDS)
+
+# Últimas linhas da saída do yt-dlp guardadas para mostrar em caso de erro.
+# O resto é descartado conforme chega: a memória não cresce com a duração do download.
+OUTPUT_TAIL_LINES = 40
+
+
+def format_bytes(size: Optional[float]) -> str:
+    if size is None:
+        return "?"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "?"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class DownloadProgress:
+    """Um evento de progresso do yt-dlp (uma linha do --progress-template). Campos desconhecidos ficam None."""
+    __slots__ = PROGRESS_FIELDS
+
+    def __init__(self, status: str, downloaded_bytes: Optional[float] = None, total_bytes: Optional[float] = None,
+                 total_bytes_estimate: Optional[float] = None, speed: Optional[float] = None,
+                 eta: Optional[float] = None, fragment_index: Optional[int] = None,
+                 fragment_count: Optional[int] = None):
+        self.status = status # 'downloading', 'finished' ou 'error'
+        self.downloaded_bytes = downloaded_bytes
+        self.total_bytes = total_bytes
+        self.total_bytes_estimate = total_bytes_estimate
+        self.speed = speed # Bytes por segundo
+        self.eta = eta     # Segundos
+        self.fragment_index = fragment_index # Em vídeos HLS/DASH, baixados em fragmentos
+        self.fragment_count = fragment_count
+
+    @property
+    def total(self) -> Optional[float]:
+        return self.total_bytes or self.total_bytes_estimate
+
+    @property
+    def percent(self) -> Optional[float]:
+        if self.status == 'finished':
+            return 100.0
+        if self.downloaded_bytes is not None and self.total:
+            return min(100.0, 100.0 * self.downloaded_bytes / self.total)
+        if self.fragment_index is not None and self.fragment_count:
+            return min(100.0, 100.0 * self.fragment_index / self.fragment_count)
+        return None
+
+    def summary(self) -> str:
+        """Texto curto para exibir, ex: '45% de 350.2 MB · 2.3 MB/s · faltam 1:23'."""
+        percent = self.percent
+        parts = [f"{percent:.0f}%" if percent is not None else format_bytes(self.downloaded_bytes)]
+        if self.total:
+            parts[0] += f" de {format_bytes(self.total)}"
+        if self.speed:
+            parts.append(f"{format_bytes(self.speed)}/s")
+        if self.eta is not None and self.status == 'downloading':
+            parts.append(f"faltam {format_eta(self.eta)}")
+        if self.fragment_count:
+            parts.append(f"fragmento {self.fragment_index or 0}/{self.fragment_count}")
+        return " · ".join(parts)
+
+    def __repr__(self) -> str:
+        return f"DownloadProgress({', '.join(f'{field}={getattr(self, field)!r}' for field in PROGRESS_FIELDS)})"
+
+
+# Callback chamado (na thread do download) a cada linha de progresso do yt-dlp.
+ProgressCallback = Callable[[DownloadProgress], None]
+
+
+def _parse_number(value: str, kind=float):
+    try:
+        return kind(float(value))
+    except ValueError: # 'NA' (ou 'None') quando o yt-dlp não sabe o valor
+        return None
+
+
+def parse_progress_line(line: str) -> Optional[DownloadProgress]:
+    """Converte uma linha do PROGRESS_TEMPLATE num DownloadProgress. Outras linhas retornam None."""
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    values = line[len(PROGRESS_PREFIX):].strip().split("|")
+    if len(values) != len(PROGRESS_FIELDS):
+        return None
+    status, downloaded, total, estimate, speed, eta, fragment_index, fragment_count = values
+    return DownloadProgress(status, _parse_number(downloaded), _parse_number(total), _parse_number(estimate),
+                            _parse_number(speed), _parse_number(eta), _parse_number(fragment_index, int),
+                            _parse_number(fragment_count, int))
+
+
+def _terminate_on_cancel(process: subprocess.Popen, cancel_event: threading.Event):
+    """Encerra o yt-dlp se `cancel_event` for sinalizado antes de ele terminar."""
+    while not cancel_event.wait(0.5):
+        if process.poll() is not None:
+            return
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def download_episode(video_url: str, output_path: str = None, filename: str = None, referer: str = None,
+                     on_progress: Optional[ProgressCallback] = None, cancel_event: Optional[threading.Event] = None):
     """
     Baixa um episódio usando yt-dlp.
 
@@ -13,6 +131,10 @@ def download_episode(video_url: str, output_path: str = None, filename: str = No
         video_url: A URL direta do vídeo a ser baixado.
         output_path: O diretório onde salvar o vídeo. Padrão: Diretório 'Downloads' do usuário.
         filename: O nome do arquivo (sem extensão). Padrão: Título do vídeo obtido pelo yt-dlp.
+        referer: Cabeçalho Referer enviado ao servidor do vídeo (alguns hosts exigem).
+        on_progress: Recebe um DownloadProgress a cada atualização do yt-dlp (na thread do download).
+        cancel_event: Se for sinalizado, o yt-dlp é encerrado e a função retorna False.
+            O arquivo .part fica no disco e um próximo download continua dele.
     """
     log = logging.getLogger(__name__) # Get logger
     ytdlp_executable = "yt-dlp"
@@ -37,6 +159,8 @@ def download_episode(video_url: str, output_path: str = None, filename: str = No
         ytdlp_executable,
         "--no-playlist",
         "--merge-output-format", "mp4",
+        "--newline", # Uma linha por atualização de progresso, em vez de reescrever com \r
+        "--progress-template", PROGRESS_TEMPLATE,
         "-o",
     ]
 
@@ -47,26 +171,19 @@ def download_episode(video_url: str, output_path: str = None, filename: str = No
         output_template = os.path.join(output_path, "%(title)s.%(ext)s")
     command.append(output_template)
 
+    if referer:
+        command.extend(["--referer", referer])
+
     command.append(video_url)
 
     log.info(f"Executando download: {' '.join(command)}")
 
     try:
-        # Executa o comando yt-dlp
-        # check=True fará o Python levantar um erro (CalledProcessError) se yt-dlp retornar um código de erro
-        # capture_output=True pega a saída padrão e erro (útil para depuração)
-        result = subprocess.run(command, check=True, capture_output=True, text=True, encoding='utf-8')
-        log.info("Download concluído com sucesso!")
-        # Tenta mostrar o caminho final (substituindo placeholders do template)
-        final_path_guess = output_template.replace('%(title)s', 'VIDEO').replace('%(ext)s', 'mp4')
-        log.info(f"Salvo em diretório: {output_path} (nome exato depende do título/extensão)")
-        return True
-    except subprocess.CalledProcessError as e:
-        log.error(f"Erro durante o download com yt-dlp:")
-        log.error(f"Comando: {' '.join(e.cmd)}")
-        log.error(f"Código de saída: {e.returncode}")
-        log.error(f"Erro (stderr):\n{e.stderr}")
-        return False
+        # A saída é lida linha a linha enquanto o yt-dlp roda: o progresso vai para
+        # on_progress e só as últimas OUTPUT_TAIL_LINES linhas ficam guardadas.
+        # stderr vai junto com stdout para um pipe não encher enquanto o outro é lido.
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   text=True, encoding='utf-8', errors='replace', bufsize=1)
     except FileNotFoundError:
          log.critical(f"'{ytdlp_executable}' não encontrado durante a execução.")
          return False
@@ -74,6 +191,40 @@ def download_episode(video_url: str, output_path: str = None, filename: str = No
         log.error(f"Ocorreu um erro inesperado ao tentar baixar o vídeo: {e}", exc_info=True)
         return False
 
+    if cancel_event is not None:
+        threading.Thread(target=_terminate_on_cancel, args=(process, cancel_event), daemon=True).start()
+
+    output_tail = deque(maxlen=OUTPUT_TAIL_LINES)
+    try:
+        with process:
+            for line in process.stdout:
+                progress = parse_progress_line(line)
+                if progress is None:
+                    output_tail.append(line.rstrip())
+                elif on_progress is not None:
+                    try:
+                        on_progress(progress)
+                    except Exception:
+                        log.exception("Erro no callback de progresso do download")
+    except Exception as e:
+        process.kill()
+        log.error(f"Ocorreu um erro inesperado ao tentar baixar o vídeo: {e}", exc_info=True)
+        return False
+
+    if cancel_event is not None and cancel_event.is_set():
+        log.info(f"Download cancelado: {video_url}")
+        return False
+    if process.returncode != 0:
+        log.error(f"Erro durante o download com yt-dlp:")
+        log.error(f"Comando: {' '.join(command)}")
+        log.error(f"Código de saída: {process.returncode}")
+        log.error(f"Saída (últimas linhas):\n" + "\n".join(output_tail))
+        return False
+
+    log.info("Download concluído com sucesso!")
+    log.info(f"Salvo em diretório: {output_path} (nome exato depende do título/extensão)")
+    return True
+
 # Você pode adicionar um bloco if __name__ == '__main__': aqui para testar a função diretamente
 # Exemplo:
 # if __name__ == '__main__':
@@ -0,0 +1,102 @@
+# /home/marcos/Maratonando/maratonando_src/core/history.py
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+log = logging.getLogger(__name__)
+
+
+class HistoryStore:
+    """
+    Histórico de episódios assistidos, indexado em memória.
+
+    - `_entries`: episode_url -> item, na ordem em que foram assistidos (mais antigo
+      primeiro). Consultar, inserir, mover para o fim e remover o mais antigo são O(1).
+    - `_by_anime`: anime_url -> {episode_url: item}, para consultas por anime.
+
+    Os itens são dicionários no mesmo formato do antigo history.json
+    (anime_title, episode_title, episode_url, anime_url, anime_image_url,
+    timestamp, parser, favorite), mais watched_at, position e duration.
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._by_anime: Dict[str, Dict[str, Dict]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, episode_url: str) -> bool:
+        return episode_url in self._entries
+
+    def _index(self, item: Dict):
+        self._by_anime.setdefault(item.get('anime_url'), {})[item['episode_url']] = item
+
+    def _unindex(self, item: Dict):
+        anime_episodes = self._by_anime.get(item.get('anime_url'))
+        if anime_episodes is not None:
+            anime_episodes.pop(item['episode_url'], None)
+            if not anime_episodes:
+                del self._by_anime[item.get('anime_url')]
+
+    def load(self, items: List[Dict]):
+        """Substitui o conteúdo por uma lista de itens (mais antigo primeiro), como a do history.json."""
+        self._entries.clear()
+        self._by_anime.clear()
+        for item in items:
+            if isinstance(item, dict) and item.get('episode_url'):
+                self.add(item)
+        log.debug(f"[Histórico] {len(self._entries)} itens carregados.")
+
+    def add(self, item: Dict) -> Dict:
+        """
+        Registra um episódio como o mais recente. Se ele já estava no histórico,
+        o item antigo é substituído (mantendo favorito e posição de reprodução).
+        """
+        episode_url = item['episode_url']
+        previous = self._entries.pop(episode_url, None)
+        if previous is not None:
+            self._unindex(previous)
+            item.setdefault('favorite', previous.get('favorite', False))
+            item.setdefault('position', previous.get('position'))
+            item.setdefault('duration', previous.get('duration'))
+        item.setdefault('favorite', False)
+        self._entries[episode_url] = item
+        self._index(item)
+        while len(self._entries) > self.max_entries:
+            _, oldest = self._entries.popitem(last=False)
+            self._unindex(oldest)
+        return item
+
+    def get(self, episode_url: str) -> Optional[Dict]:
+        return self._entries.get(episode_url)
+
+    def is_watched(self, episode_url: str) -> bool:
+        return episode_url in self._entries
+
+    def toggle_favorite(self, episode_url: str) -> Optional[bool]:
+        """Inverte a marcação de favorito. Retorna o novo valor, ou None se o item não existe."""
+        item = self._entries.get(episode_url)
+        if item is None:
+            return None
+        item['favorite'] = not item.get('favorite', False)
+        return item['favorite']
+
+    def episodes_for_anime(self, anime_url: str) -> List[Dict]:
+        """Itens assistidos de um anime, do mais antigo para o mais recente."""
+        return list(self._by_anime.get(anime_url, {}).values())
+
+    def iter_recent(self) -> Iterator[Dict]:
+        """Percorre os itens do mais recente para o mais antigo."""
+        return reversed(self._entries.values())
+
+    def recent(self) -> List[Dict]:
+        return list(self.iter_recent())
+
+    def to_list(self) -> List[Dict]:
+        """Itens do mais antigo para o mais recente (formato do history.json)."""
+        return list(self._entries.values())
+
+    def clear(self):
+        self._entries.clear()
+        self._by_anime.clear()
@@ -0,0 +1,245 @@
+# /home/marcos/Maratonando/maratonando_src/core/history_db.py
+import itertools
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional
+
+log = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    episode_url     TEXT PRIMARY KEY,
+    anime_url       TEXT NOT NULL,
+    anime_title     TEXT,
+    episode_title   TEXT,
+    anime_image_url TEXT,
+    parser          TEXT,
+    timestamp       TEXT,                       -- Data legível, como no antigo history.json
+    watched_at      REAL NOT NULL,              -- Ordem de exibição (mais recente = maior)
+    favorite        INTEGER NOT NULL DEFAULT 0,
+    position        REAL,                       -- Segundos onde o episódio parou (None = do início)
+    duration        REAL
+);
+CREATE INDEX IF NOT EXISTS idx_history_watched_at ON history (watched_at);
+CREATE INDEX IF NOT EXISTS idx_history_anime ON history (anime_url, watched_at);
+CREATE INDEX IF NOT EXISTS idx_history_favorite ON history (watched_at) WHERE favorite = 1;
+"""
+
+# Operação de escrita pendente: recebe a conexão e executa um ou mais comandos.
+WriteOperation = Callable[[sqlite3.Connection], None]
+
+ITEM_COLUMNS = ('episode_url', 'anime_url', 'anime_title', 'episode_title', 'anime_image_url',
+                'parser', 'timestamp', 'watched_at', 'favorite', 'position', 'duration')
+
+
+def _row_to_item(row: sqlite3.Row) -> Dict:
+    item = {column: row[column] for column in ITEM_COLUMNS}
+    item['favorite'] = bool(item['favorite'])
+    return item
+
+
+class HistoryDatabase:
+    """
+    Histórico, favoritos e posição de reprodução em SQLite (modo WAL).
+
+    As leituras (carga inicial) são feitas na hora. As escritas são "write-behind":
+    vão para uma fila e uma thread própria as grava depois de `write_delay` segundos,
+    todas numa única transação. Assim uma rajada de mudanças (vários episódios,
+    favoritar/desfavoritar) vira um só commit, e a interface nunca espera pelo disco.
+    Operações sobre o mesmo item se fundem: só a última posição/favorito é gravada.
+    `flush()` grava o que estiver pendente na hora; `close()` faz o flush e fecha o banco.
+    """
+    def __init__(self, db_path: Path, write_delay: float = 1.0):
+        self.db_path = Path(db_path)
+        self.write_delay = write_delay
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock() # Protege a conexão
+        self._cond = threading.Condition()  # Protege a fila de escritas
+        self._pending: "OrderedDict[Hashable, WriteOperation]" = OrderedDict()
+        self._unique_keys = itertools.count()
+        self._submitted = 0 # Operações enfileiradas / gravadas, para o flush saber quando terminou
+        self._written = 0
+        self._flush_requested = False
+        self._closing = False
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL") # Seguro com WAL; evita fsync a cada escrita
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._writer = threading.Thread(target=self._write_loop, name="maratonando-history-db", daemon=True)
+        self._writer.start()
+
+    # --- Escrita em segundo plano ---
+
+    def _next_batch(self) -> Optional[List[WriteOperation]]:
+        """Espera haver escritas e o atraso passar (ou um flush). Retorna None ao fechar."""
+        with self._cond:
+            while not self._pending and not self._closing:
+                self._cond.wait()
+            deadline = time.monotonic() + self.write_delay
+            while not (self._flush_requested or self._closing):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            self._flush_requested = False
+            if not self._pending and self._closing:
+                return None
+            batch = list(self._pending.values())
+            self._pending.clear()
+            return batch
+
+    def _write_loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                with self._lock:
+                    self._conn.execute("BEGIN")
+                    try:
+                        for operation in batch:
+                            operation(self._conn)
+                        self._conn.execute("COMMIT")
+                    except sqlite3.Error:
+                        self._conn.execute("ROLLBACK")
+                        raise
+                log.debug(f"[Histórico DB] {len(batch)} escrita(s) gravada(s).")
+            except sqlite3.Error as e:
+                log.error(f"[Histórico DB] Erro ao gravar {len(batch)} escrita(s): {e}")
+            finally:
+                with self._cond:
+                    self._written += len(batch)
+                    self._cond.notify_all()
+
+    def _submit(self, sql: str, params=(), key: Optional[Hashable] = None):
+        """Enfileira um comando. Um comando com a mesma `key` ainda pendente é substituído."""
+        with self._cond:
+            if key is None:
+                key = ('unique', next(self._unique_keys))
+            elif key in self._pending:
+                del self._pending[key] # O novo comando vai para o fim, mantendo a ordem das escritas
+                self._written += 1     # O substituído conta como já gravado
+            self._pending[key] = lambda conn: conn.execute(sql, params)
+            self._submitted += 1
+            self._cond.notify_all()
+
+    def record(self, item: Dict):
+        """Registra (ou atualiza) um episódio assistido, preservando favorito e posição."""
+        params = {column: item.get(column) for column in ITEM_COLUMNS}
+        params['watched_at'] = item.get('watched_at') or time.time()
+        params['favorite'] = int(bool(item.get('favorite')))
+        self._submit("""
+            INSERT INTO history (episode_url, anime_url, anime_title, episode_title, anime_image_url,
+                                 parser, timestamp, watched_at, favorite, position, duration)
+            VALUES (:episode_url, :anime_url, :anime_title, :episode_title, :anime_image_url,
+                    :parser, :timestamp, :watched_at, :favorite, :position, :duration)
+            ON CONFLICT (episode_url) DO UPDATE SET
+                anime_url = excluded.anime_url, anime_title = excluded.anime_title,
+                episode_title = excluded.episode_title, anime_image_url = excluded.anime_image_url,
+                parser = excluded.parser, timestamp = excluded.timestamp, watched_at = excluded.watched_at
+        """, params, key=('record', params['episode_url']))
+
+    def set_favorite(self, episode_url: str, favorite: bool):
+        self._submit("UPDATE history SET favorite = ? WHERE episode_url = ?", (int(favorite), episode_url),
+                     key=('favorite', episode_url))
+
+    def set_position(self, episode_url: str, position: Optional[float], duration: Optional[float] = None):
+        self._submit("UPDATE history SET position = ?, duration = COALESCE(?, duration) WHERE episode_url = ?",
+                     (position, duration, episode_url), key=('position', episode_url))
+
+    def trim(self, max_entries: int):
+        """Remove os itens mais antigos além de `max_entries`."""
+        self._submit("""
+            DELETE FROM history WHERE watched_at < (
+                SELECT watched_at FROM history ORDER BY watched_at DESC LIMIT 1 OFFSET ?
+            )
+        """, (max_entries - 1,), key='trim')
+
+    def clear(self):
+        with self._cond:
+            # O que ainda não foi gravado seria apagado de qualquer forma.
+            self._written += len(self._pending)
+            self._pending.clear()
+        self._submit("DELETE FROM history", key='clear')
+
+    def flush(self):
+        """Grava as escritas pendentes agora e espera terminarem."""
+        with self._cond:
+            target = self._submitted
+            if self._written < target:
+                self._flush_requested = True
+                self._cond.notify_all()
+            while self._written < target and self._writer.is_alive():
+                self._cond.wait()
+
+    def close(self):
+        """Grava o que estiver pendente e fecha o banco."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+    # --- Leitura ---
+
+    def load_recent(self, limit: int) -> List[Dict]:
+        """Os `limit` itens mais recentes, do mais antigo para o mais recente."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(ITEM_COLUMNS)} FROM history ORDER BY watched_at DESC LIMIT ?", (limit,)).fetchall()
+        return [_row_to_item(row) for row in reversed(rows)]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    # --- Migração ---
+
+    def migrate_from_json(self, json_path: Path) -> int:
+        """
+        Importa o antigo history.json (uma vez só: o arquivo é renomeado para
+        history.json.migrado depois). Retorna a quantidade de itens importados.
+        """
+        json_path = Path(json_path)
+        if not json_path.exists():
+            return 0
+        try:
+            items = json.loads(json_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            log.error(f"[Histórico DB] Não foi possível ler {json_path} para migração: {e}")
+            return 0
+
+        rows = []
+        base_time = time.time() - len(items) # A ordem do arquivo (mais antigo primeiro) vira watched_at crescente
+        for i, item in enumerate(items if isinstance(items, list) else []):
+            if not isinstance(item, dict) or not item.get('episode_url') or not item.get('anime_url'):
+                continue
+            row = {column: item.get(column) for column in ITEM_COLUMNS}
+            row['watched_at'] = base_time + i
+            row['favorite'] = int(bool(item.get('favorite')))
+            rows.append(row)
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(f"""
+                    INSERT OR REPLACE INTO history ({', '.join(ITEM_COLUMNS)})
+                    VALUES ({', '.join(':' + column for column in ITEM_COLUMNS)})
+                """, rows)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        json_path.replace(json_path.with_name(json_path.name + ".migrado"))
+        log.info(f"[Histórico DB] {len(rows)} itens migrados de {json_path}.")
+        return len(rows)
@@ -0,0 +1,396 @@
+# /home/marcos/Maratonando/maratonando_src/core/hls_downloader.py
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from .. import config
+from ..utils.helpers import write_atomic
+from ..utils.http_client import HttpClient
+from .downloader import DownloadProgress, ProgressCallback
+from .quality import rank_sources
+from .segmented_downloader import (DownloadCancelled, DownloadError, RateLimiter, UnsupportedSourceError,
+                                   get_segmented_downloader)
+
+log = logging.getLogger(__name__)
+
+SEGMENT_RETRIES = 3      # Novas tentativas de um segmento antes de desistir do download
+PROGRESS_INTERVAL = 0.25 # Segundos entre eventos de progresso
+STATE_VERSION = 1
+
+
+def is_hls_url(video_url: str) -> bool:
+    return urlparse(video_url).path.lower().endswith('.m3u8')
+
+
+def _parse_attributes(text: str) -> Dict[str, str]:
+    """Atributos de uma tag HLS: 'BANDWIDTH=800000,CODECS="a,b"' -> {'BANDWIDTH': '800000', 'CODECS': 'a,b'}."""
+    attributes, key, value, in_quotes, reading_key = {}, "", "", False, True
+    for char in text + ",":
+        if reading_key:
+            if char == "=":
+                reading_key = False
+            elif char != ",":
+                key += char
+        elif char == '"':
+            in_quotes = not in_quotes
+        elif char == "," and not in_quotes:
+            attributes[key.strip().upper()] = value
+            key, value, reading_key = "", "", True
+        else:
+            value += char
+    return attributes
+
+
+class HlsSegment:
+    """Um segmento de mídia da playlist. `byte_range` = (tamanho, início) para EXT-X-BYTERANGE."""
+    __slots__ = ('uri', 'duration', 'byte_range')
+
+    def __init__(self, uri: str, duration: float = 0.0, byte_range: Optional[Tuple[int, int]] = None):
+        self.uri = uri
+        self.duration = duration
+        self.byte_range = byte_range
+
+
+class HlsVariant:
+    """Uma variante da playlist master. `audio_group` é o GROUP-ID do áudio (atributo AUDIO), se houver."""
+    __slots__ = ('height', 'bandwidth', 'uri', 'audio_group')
+
+    def __init__(self, height: int, bandwidth: int, uri: str, audio_group: Optional[str] = None):
+        self.height = height
+        self.bandwidth = bandwidth
+        self.uri = uri
+        self.audio_group = audio_group
+
+
+class HlsPlaylist:
+    """
+    Resultado de parse_playlist. Uma playlist master tem `variants` e `audio_groups` (grupos
+    de EXT-X-MEDIA de áudio com playlist própria); uma playlist de mídia tem `segments`, o
+    segmento de inicialização (`init`, para fMP4), se é criptografada e se termina (ENDLIST;
+    sem ela é transmissão ao vivo).
+    """
+    def __init__(self):
+        self.variants: List[HlsVariant] = []
+        self.audio_groups: Set[str] = set()
+        self.segments: List[HlsSegment] = []
+        self.init: Optional[HlsSegment] = None
+        self.encrypted = False
+        self.endlist = False
+
+    @property
+    def is_master(self) -> bool:
+        return bool(self.variants)
+
+
+def _parse_byte_range(value: str, next_offset: int) -> Tuple[int, int]:
+    length, _, offset = value.partition("@")
+    return int(length), int(offset) if offset else next_offset
+
+
+def parse_playlist(text: str, base_url: str) -> HlsPlaylist:
+    """Lê uma playlist M3U8 (master ou de mídia). As URIs saem absolutas, relativas a `base_url`."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines or lines[0] != "#EXTM3U":
+        raise UnsupportedSourceError("resposta não é uma playlist HLS")
+    playlist = HlsPlaylist()
+    pending_variant: Optional[Dict[str, str]] = None
+    duration, byte_range, next_offset = 0.0, None, 0
+    for line in lines[1:]:
+        if line.startswith("#EXT-X-STREAM-INF:"):
+            pending_variant = _parse_attributes(line.split(":", 1)[1])
+        elif line.startswith("#EXTINF:"):
+            duration = float(line.split(":", 1)[1].split(",", 1)[0] or 0)
+        elif line.startswith("#EXT-X-BYTERANGE:"):
+            byte_range = _parse_byte_range(line.split(":", 1)[1], next_offset)
+        elif line.startswith("#EXT-X-KEY:"):
+            if _parse_attributes(line.split(":", 1)[1]).get("METHOD", "NONE").upper() != "NONE":
+                playlist.encrypted = True
+        elif line.startswith("#EXT-X-MAP:"):
+            attributes = _parse_attributes(line.split(":", 1)[1])
+            map_range = None
+            if attributes.get("BYTERANGE"):
+                map_range = _parse_byte_range(attributes["BYTERANGE"], 0)
+            playlist.init = HlsSegment(urljoin(base_url, attributes.get("URI", "")), 0.0, map_range)
+        elif line.startswith("#EXT-X-MEDIA:"):
+            attributes = _parse_attributes(line.split(":", 1)[1])
+            if attributes.get("TYPE", "").upper() == "AUDIO" and attributes.get("URI"):
+                playlist.audio_groups.add(attributes.get("GROUP-ID", ""))
+        elif line.startswith("#EXT-X-ENDLIST"):
+            playlist.endlist = True
+        elif line.startswith("#"):
+            continue
+        elif pending_variant is not None:
+            resolution = pending_variant.get("RESOLUTION", "0x0").lower().split("x")
+            height = int(resolution[1]) if len(resolution) == 2 and resolution[1].isdigit() else 0
+            bandwidth = int(pending_variant.get("BANDWIDTH", "0") or 0)
+            playlist.variants.append(HlsVariant(height, bandwidth, urljoin(base_url, line), pending_variant.get("AUDIO")))
+            pending_variant = None
+        else:
+            playlist.segments.append(HlsSegment(urljoin(base_url, line), duration, byte_range))
+            if byte_range:
+                next_offset = byte_range[1] + byte_range[0]
+            duration, byte_range = 0.0, None
+    return playlist
+
+
+class HlsDownloader:
+    """
+    Baixa vídeos HLS (.m3u8) sem o yt-dlp, com vários segmentos ao mesmo tempo.
+
+    - Da playlist master a variante é escolhida como as fontes de vídeo (core/quality.py),
+      pela `preference` e pela banda `bandwidth_bps`; no empate de resolução, a de maior banda.
+    - Até `window` segmentos ficam em andamento (ou prontos esperando a vez) por vez; eles
+      são gravados no `<nome>.ts.part` na ordem da playlist, então a memória usada é no
+      máximo `window` segmentos, qualquer que seja a duração do vídeo.
+    - Cada segmento é tentado de novo sozinho (SEGMENT_RETRIES vezes) se falhar.
+    - O número de segmentos já gravados fica em `<nome>.ts.part.json`: uma próxima
+      tentativa continua dali, se a playlist tiver a mesma quantidade de segmentos.
+    - No fim, se o ffmpeg estiver instalado (e `remux` ligado), o .ts é remuxado para .mp4
+      (sem recodificar); senão o arquivo final fica como .ts (ou .mp4 para segmentos fMP4).
+    - Playlists criptografadas, ao vivo ou com o áudio numa playlist separada levantam
+      UnsupportedSourceError (ficam com o yt-dlp).
+    """
+    def __init__(self,
+                 window: int = config.DOWNLOAD_HLS_WINDOW,
+                 remux: bool = config.DOWNLOAD_HLS_REMUX,
+                 http: Optional[HttpClient] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
+        self.window = max(1, window)
+        self.remux = remux
+        # Cliente próprio: o pool precisa comportar a janela inteira de cada download HLS
+        # simultâneo do mesmo host, senão os pedidos a mais esperam dentro do urllib3.
+        self.http = http or HttpClient(pool_maxsize=self.window * config.DOWNLOAD_PER_HOST_LIMIT)
+        self.rate_limiter = rate_limiter or RateLimiter()
+
+    def _get(self, url: str, headers: Dict[str, str], byte_range: Optional[Tuple[int, int]] = None) -> bytes:
+        request_headers = dict(headers)
+        if byte_range:
+            length, offset = byte_range
+            request_headers['Range'] = f"bytes={offset}-{offset + length - 1}"
+        response = self.http.get(url, headers=request_headers, timeout=(10, 30))
+        if response.status_code != (206 if byte_range else 200): # 200 num pedido com Range seria o arquivo todo
+            raise DownloadError(f"servidor respondeu {response.status_code} para {url}")
+        return response.content
+
+    @staticmethod
+    def _choose_variant(variants: List[HlsVariant], preference: Optional[str],
+                        bandwidth_bps: Optional[float]) -> HlsVariant:
+        ordered = sorted(variants, key=lambda variant: (variant.height, variant.bandwidth), reverse=True)
+        sources = [{'label': f"{variant.height}p" if variant.height else "", 'src': variant.uri, 'index': index}
+                   for index, variant in enumerate(ordered)]
+        return ordered[rank_sources(sources, preference, bandwidth_bps)[0]['index']]
+
+    def _load_media_playlist(self, playlist_url: str, headers: Dict[str, str], preference: Optional[str] = None,
+                             bandwidth_bps: Optional[float] = None) -> HlsPlaylist:
+        try:
+            response = self.http.get(playlist_url, headers=headers, timeout=(10, 30))
+            if response.status_code != 200:
+                raise DownloadError(f"servidor respondeu {response.status_code} para a playlist")
+            playlist = parse_playlist(response.text, response.url or playlist_url)
+            if playlist.is_master:
+                variant = self._choose_variant(playlist.variants, preference, bandwidth_bps)
+                if variant.audio_group is not None and variant.audio_group in playlist.audio_groups:
+                    # Áudio em playlist separada: baixar só a variante daria um vídeo mudo.
+                    raise UnsupportedSourceError("variante HLS com áudio em playlist separada (EXT-X-MEDIA)")
+                log.info(f"[HLS] Variante escolhida: {variant.height or '?'}p, {variant.bandwidth} bps.")
+                response = self.http.get(variant.uri, headers=headers, timeout=(10, 30))
+                if response.status_code != 200:
+                    raise DownloadError(f"servidor respondeu {response.status_code} para a variante")
+                playlist = parse_playlist(response.text, response.url or variant.uri)
+        except requests.exceptions.RequestException as e:
+            raise DownloadError(f"erro de rede ao ler a playlist: {e}") from e
+        if playlist.is_master or not playlist.segments:
+            raise UnsupportedSourceError("playlist sem segmentos de mídia")
+        if playlist.encrypted:
+            raise UnsupportedSourceError("playlist HLS criptografada")
+        if not playlist.endlist:
+            raise UnsupportedSourceError("playlist HLS ao vivo (sem EXT-X-ENDLIST)")
+        return playlist
+
+    def _fetch_segment(self, segment: HlsSegment, headers: Dict[str, str],
+                       cancel_event: Optional[threading.Event], abort_event: threading.Event) -> bytes:
+        failures = 0
+        while True:
+            if (cancel_event is not None and cancel_event.is_set()) or abort_event.is_set():
+                raise DownloadCancelled("download cancelado")
+            try:
+                data = self._get(segment.uri, headers, segment.byte_range)
+                self.rate_limiter.consume(len(data))
+                return data
+            except (requests.exceptions.RequestException, DownloadError) as e:
+                failures += 1
+                if failures > SEGMENT_RETRIES:
+                    raise DownloadError(f"segmento {segment.uri} falhou {failures} vezes: {e}") from e
+                log.debug(f"[HLS] Segmento {segment.uri} falhou ({e}); tentando de novo.")
+                time.sleep(min(10, 2 ** failures))
+
+    def download(self, video_url: str, output_path: str, filename: str, referer: Optional[str] = None,
+                 on_progress: Optional[ProgressCallback] = None,
+                 cancel_event: Optional[threading.Event] = None,
+                 preference: Optional[str] = None, bandwidth_bps: Optional[float] = None) -> Path:
+        """
+        Baixa a playlist `video_url` para `output_path/filename.<ext>` e retorna o caminho final.
+        `preference`/`bandwidth_bps` escolhem a variante (ver rank_sources; None = preferência padrão).
+        Levanta UnsupportedSourceError, DownloadCancelled ou DownloadError.
+        """
+        headers = {'Referer': referer} if referer else {}
+        playlist = self._load_media_playlist(video_url, headers, preference, bandwidth_bps)
+        fragmented_mp4 = playlist.init is not None
+        part_path = Path(output_path) / f"{filename}.{'mp4' if fragmented_mp4 else 'ts'}.part"
+        state_path = part_path.with_name(part_path.name + ".json")
+        segments = playlist.segments
+        count = len(segments)
+
+        next_index, written_bytes = self._resume(state_path, part_path, count)
+        if next_index:
+            log.info(f"[HLS] Continuando {filename} do segmento {next_index + 1}/{count}.")
+        started = time.monotonic()
+        start_bytes, last_progress = written_bytes, 0.0
+
+        def report(status='downloading'):
+            done = next_index - first_index
+            elapsed = time.monotonic() - started
+            speed = (written_bytes - start_bytes) / elapsed if elapsed > 0 and done else None
+            estimate = written_bytes / next_index * count if next_index else None
+            eta = (estimate - written_bytes) / speed if speed and estimate else None
+            progress = DownloadProgress(status, written_bytes, None if status != 'finished' else written_bytes,
+                                        estimate, speed, eta, next_index, count)
+            if on_progress is not None:
+                try:
+                    on_progress(progress)
+                except Exception:
+                    log.exception("[HLS] Erro no callback de progresso")
+
+        first_index = next_index
+        abort_event = threading.Event() # Um segmento falhou de vez: os outros param
+        mode = 'r+b' if next_index else 'wb'
+        with open(part_path, mode) as output, \
+                ThreadPoolExecutor(max_workers=self.window, thread_name_prefix="maratonando-hls") as executor:
+            output.seek(written_bytes)
+            output.truncate()
+            if next_index == 0 and playlist.init is not None:
+                output.write(self._fetch_segment(playlist.init, headers, cancel_event, abort_event))
+                written_bytes = output.tell()
+
+            in_flight: Dict[Future, int] = {}
+            ready: Dict[int, bytes] = {} # Segmentos baixados fora de ordem, esperando a vez
+            next_to_submit = next_index
+            try:
+                while next_index < count:
+                    # Janela limitada: em andamento + prontos nunca passam de `window`.
+                    while next_to_submit < count and len(in_flight) + len(ready) < self.window:
+                        future = executor.submit(self._fetch_segment, segments[next_to_submit], headers,
+                                                 cancel_event, abort_event)
+                        in_flight[future] = next_to_submit
+                        next_to_submit += 1
+                    done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        ready[in_flight.pop(future)] = future.result()
+                    while next_index in ready: # Concatena na ordem da playlist
+                        output.write(ready.pop(next_index))
+                        next_index += 1
+                    written_bytes = output.tell()
+                    now = time.monotonic()
+                    if now - last_progress >= PROGRESS_INTERVAL:
+                        last_progress = now
+                        output.flush()
+                        self._save_state(state_path, count, next_index, written_bytes)
+                        report()
+            except BaseException:
+                abort_event.set() # Para os segmentos ainda em andamento
+                raise
+            finally:
+                for future in in_flight:
+                    future.cancel()
+                output.flush()
+                self._save_state(state_path, count, next_index, output.tell())
+
+        report('finished')
+        final_path = self._finish(part_path, filename, fragmented_mp4)
+        try:
+            state_path.unlink()
+        except FileNotFoundError:
+            pass
+        log.info(f"[HLS] Concluído: {final_path} ({count} segmentos).")
+        return final_path
+
+    @staticmethod
+    def _resume(state_path: Path, part_path: Path, count: int) -> Tuple[int, int]:
+        """(próximo segmento, bytes já gravados) de uma tentativa anterior, ou (0, 0)."""
+        try:
+            state = json.loads(state_path.read_text(encoding='utf-8'))
+            if (state.get('version') == STATE_VERSION and state.get('segments') == count
+                    and part_path.stat().st_size >= state['bytes']):
+                return int(state['next_index']), int(state['bytes'])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return 0, 0
+
+    @staticmethod
+    def _save_state(state_path: Path, count: int, next_index: int, written_bytes: int):
+        data = {'version': STATE_VERSION, 'segments': count, 'next_index': next_index, 'bytes': written_bytes}
+        try:
+            write_atomic(state_path, json.dumps(data).encode('utf-8'))
+        except OSError as e:
+            log.warning(f"[HLS] Não foi possível salvar o estado em {state_path}: {e}")
+
+    def _finish(self, part_path: Path, filename: str, fragmented_mp4: bool) -> Path:
+        """Remuxa para MP4 com o ffmpeg (se houver) ou só renomeia o arquivo concatenado."""
+        mp4_path = part_path.with_name(f"{filename}.mp4")
+        ffmpeg = shutil.which("ffmpeg") if self.remux else None
+        if ffmpeg:
+            remux_path = part_path.with_name(f"{filename}.remux.mp4")
+            command = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y", "-i", str(part_path),
+                       "-c", "copy", "-movflags", "+faststart", str(remux_path)]
+            if not fragmented_mp4:
+                command[-2:-2] = ["-bsf:a", "aac_adtstoasc"] # Áudio AAC do MPEG-TS para o contêiner MP4
+            result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                    text=True, errors='replace')
+            if result.returncode == 0:
+                os.replace(remux_path, mp4_path)
+                part_path.unlink()
+                return mp4_path
+            log.warning(f"[HLS] ffmpeg não conseguiu remuxar ({result.stderr.strip()[-300:]}); "
+                        "mantendo o arquivo sem remux.")
+            try:
+                remux_path.unlink()
+            except FileNotFoundError:
+                pass
+        final_path = mp4_path if fragmented_mp4 else part_path.with_name(f"{filename}.ts")
+        os.replace(part_path, final_path)
+        return final_path
+
+
+_default_downloader: Optional[HlsDownloader] = None
+_default_downloader_lock = threading.Lock()
+
+
+def get_hls_downloader() -> HlsDownloader:
+    """Downloader HLS do processo; usa o limite de banda do download direto (o pool de conexões é próprio)."""
+    global _default_downloader
+    if _default_downloader is None:
+        with _default_downloader_lock:
+            if _default_downloader is None:
+                direct = get_segmented_downloader()
+                _default_downloader = HlsDownloader(rate_limiter=direct.rate_limiter)
+    return _default_downloader
+
+
+def download_hls(video_url: str, output_path: str, filename: str, referer: Optional[str] = None,
+                 on_progress: Optional[ProgressCallback] = None,
+                 cancel_event: Optional[threading.Event] = None,
+                 preference: Optional[str] = None, bandwidth_bps: Optional[float] = None) -> Path:
+    """Atalho para get_hls_downloader().download(...): a assinatura de download_direct mais a escolha da variante."""
+    return get_hls_downloader().download(video_url, output_path, filename, referer=referer,
+                                         on_progress=on_progress, cancel_event=cancel_event,
+                                         preference=preference, bandwidth_bps=bandwidth_bps)
@@ -1,7 +1,68 @@
 # /home/marcos/Documentos/Maratonando1/maratonando_src/core/parsers/__init__.py
+import importlib
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Tuple
 
 # Importa a classe base se você tiver uma (opcional, mas bom para referência)
 # from .base_parser import BaseParser
 
-# Importa cada parser individualmente
-from .animefire_parser import AnimeFireParser
+# Fontes disponíveis: nome da fonte -> (módulo, classe do parser).
+# O nome DEVE corresponder ao campo 'source' dos resultados da busca.
+# Os módulos só são importados quando a fonte é usada pela primeira vez, então
+# comandos que não acessam a rede não pagam o custo de requests/bs4/lxml.
+# Para adicionar uma fonte (ex: MeuNovoParser em meu_novo_parser.py):
+#     'MeuNovoParser': ('.meu_novo_parser', 'MeuNovoParser'),
+PARSER_SOURCES: Dict[str, Tuple[str, str]] = {
+    'AnimeFire': ('.animefire_parser', 'AnimeFireParser'),
+}
+
+
+def load_parser_class(source_name: str):
+    module_name, class_name = PARSER_SOURCES[source_name]
+    return getattr(importlib.import_module(module_name, __name__), class_name)
+
+
+class ParserRegistry(Mapping):
+    """
+    Mapeamento nome da fonte -> instância do parser, criada no primeiro acesso.
+
+    Funciona como o antigo dicionário PARSER_MAP (`get`, `in`, iteração na ordem de
+    PARSER_SOURCES), mas sem importar nem instanciar nada até que a fonte seja usada.
+    """
+    def __init__(self, sources: Dict[str, Tuple[str, str]]):
+        self._sources = sources
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, source_name: str):
+        instance = self._instances.get(source_name)
+        if instance is None:
+            if source_name not in self._sources:
+                raise KeyError(source_name)
+            with self._lock:
+                instance = self._instances.get(source_name)
+                if instance is None:
+                    instance = self._instances[source_name] = load_parser_class(source_name)()
+        return instance
+
+    def __contains__(self, source_name) -> bool:
+        return source_name in self._sources # Não instancia o parser
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sources)
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+
+# Registro compartilhado por CLI, GUI e busca.
+registry = ParserRegistry(PARSER_SOURCES)
+
+
+def __getattr__(name: str):
+    # Mantém `from .parsers import AnimeFireParser` funcionando, importando o módulo só agora.
+    for source_name, (_, class_name) in PARSER_SOURCES.items():
+        if class_name == name:
+            return load_parser_class(source_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
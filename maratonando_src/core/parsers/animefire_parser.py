@@ -1,31 +1,32 @@
 import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from bs4 import SoupStrainer
+from typing import List, Dict, Optional
 import re
 from urllib.parse import urljoin
 import logging
 import socket
-from requests.packages.urllib3.util.connection import HAS_IPV6
+
+from ... import config
+from ...utils.http_client import HttpClient, get_client
+from ...utils.parsed_cache import ParsedCache, source_version
+from .html_backend import make_soup, class_pattern
 
 logging.getLogger(__name__).info("[AnimeFire Parser] Módulo importado com sucesso.")
 log = logging.getLogger(__name__)
 
+SOURCE_NAME = "AnimeFire"
 BASE_URL = "https://animefire.io/" # Garantindo o novo domínio
-SEARCH_URL_TEMPLATE = BASE_URL + "pesquisar/{query}"
-
-orig_allowed_gai_family = None
+SEARCH_URL_TEMPLATE = "{base_url}pesquisar/{query}"
 
-def _set_ipv4():
-    """Força a resolução de nomes para IPv4."""
-    global orig_allowed_gai_family
-    if HAS_IPV6:
-        orig_allowed_gai_family = socket.getaddrinfo.__defaults__[0]
-        socket.getaddrinfo.__defaults__ = (socket.AF_INET,) + socket.getaddrinfo.__defaults__[1:]
+# Versão usada no cache de detalhes: muda sempre que este arquivo for alterado.
+PARSER_VERSION = source_version(__file__, "1")
+# Trecho presente uma vez em cada link de episódio da página do anime.
+EPISODE_LINK_MARKER = 'class="lEp '
 
-def _unset_ipv4():
-    """Restaura a configuração original de resolução de nomes."""
-    if HAS_IPV6 and orig_allowed_gai_family is not None:
-        socket.getaddrinfo.__defaults__ = (orig_allowed_gai_family,) + socket.getaddrinfo.__defaults__[1:]
+# Filtros de parse: cada método só materializa os nós de que precisa.
+SEARCH_STRAINER = SoupStrainer('div', class_=class_pattern('divCardUltimosEps'))
+DETAILS_STRAINER = SoupStrainer(class_=class_pattern('aniTitulo', 'aniCover', 'imgAnime', 'aniSinopse', 'lEp'))
+EPISODE_STRAINER = SoupStrainer(['video', 'iframe'])
 
 HTTP_HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -33,137 +34,174 @@ HTTP_HEADERS = {
 }
 
 class AnimeFireParser:
-    def __init__(self):
-        pass
+    def __init__(self, base_url: str = BASE_URL, http_client: Optional[HttpClient] = None):
+        # base_url/http_client só mudam em testes e benchmarks (ex: servidor local com páginas gravadas).
+        self.base_url = base_url
+        self.http = http_client or get_client()
+        self.http.register_source(SOURCE_NAME, dict(HTTP_HEADERS, Referer=base_url))
+        # O site responde mal via IPv6; as conexões para ele usam só IPv4,
+        # com pool e cache de DNS próprios (sem alterar o socket globalmente).
+        self.http.pin_address_family(base_url, socket.AF_INET)
+        try:
+            self.details_cache = ParsedCache(config.get_cache_dir("details"), config.PARSED_CACHE_MAX_ENTRIES,
+                                         config.PARSED_CACHE_MAX_AGE)
+        except OSError as e:
+            log.warning(f"[AnimeFire] Cache de detalhes desativado: {e}")
+            self.details_cache = None
 
     def search(self, query: str) -> List[Dict[str, str]]:
         """
         Busca por animes no AnimeFire.io.
         Retorna uma lista de dicionários, cada um contendo 'title', 'url' e 'image'.
+        Erros de rede/HTTP são propagados, para quem busca distinguir "sem resultados"
+        de "fonte falhou" (o searcher marca a fonte com status 'error').
         """
         log.info(f"[AnimeFire] Função search iniciada para query: '{query}'")
         formatted_query = query.replace(' ', '-')
-        search_query_url = SEARCH_URL_TEMPLATE.format(query=formatted_query)
+        search_query_url = SEARCH_URL_TEMPLATE.format(base_url=self.base_url, query=formatted_query)
         results = []
-        processed_urls = set()
 
-        _set_ipv4()
         try:
-            response = requests.get(search_query_url, headers=HTTP_HEADERS, timeout=20)
+            response = self.http.get(search_query_url, source=SOURCE_NAME, timeout=20, cache_ttl=config.HTTP_CACHE_TTL_SEARCH)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            result_items = soup.find_all('div', class_='divCardUltimosEps')
-
-            if not result_items:
-                log.warning("[AnimeFire] Nenhum item de resultado ('div.divCardUltimosEps') encontrado na página /pesquisar/.")
-                return []
-
-            log.info(f"[AnimeFire] Encontrados {len(result_items)} itens de resultado.")
-            for item_div in result_items:
-                link_tag = item_div.find('a', href=True)
-                title_tag = item_div.find('h3', class_='animeTitle')
-                img_tag = item_div.find('img', class_='card-img-top')
-
-                if link_tag and title_tag:
-                    title = title_tag.get_text(strip=True)
-                    url = link_tag['href']
-                    absolute_url = urljoin(BASE_URL, url)
-                    image_url = ""
-                    if img_tag:
-                        image_url = img_tag.get('src') or img_tag.get('data-src') or ""
-                        if image_url and not image_url.startswith("http"):
-                            image_url = urljoin(BASE_URL, image_url)
-
-                    if absolute_url.startswith(BASE_URL) and "/animes/" in absolute_url and absolute_url not in processed_urls:
-                        log.debug(f"    [AnimeFire] Item encontrado: {title} - {absolute_url}")
-                        results.append({'title': title, 'url': absolute_url, 'image': image_url})
-                        processed_urls.add(absolute_url)
-                    else:
-                        log.debug(f"    [AnimeFire] Item ignorado (URL inválida ou duplicada): {title} - {absolute_url}")
-                else:
-                    log.debug(f"    [AnimeFire] Item ignorado (link ou título faltando).")
+            results = self._parse_search(response.text)
         except Exception as e:
-            log.error(f"[AnimeFire] ERRO na função search: {e}", exc_info=True)
-            return []
+            log.error(f"[AnimeFire] ERRO na função search: {e}")
+            raise
         finally:
-            _unset_ipv4()
             log.debug(f"[AnimeFire] Função search finalizada para query '{query}'. Retornando {len(results)} resultados.")
         return results
 
+    def _parse_search(self, html: str) -> List[Dict[str, str]]:
+        """Extrai os resultados ('title', 'url', 'image') do HTML da página /pesquisar/."""
+        results = []
+        processed_urls = set()
+        soup = make_soup(html, SEARCH_STRAINER)
+        result_items = soup.find_all('div', class_='divCardUltimosEps')
+
+        if not result_items:
+            log.warning("[AnimeFire] Nenhum item de resultado ('div.divCardUltimosEps') encontrado na página /pesquisar/.")
+            return []
+
+        log.info(f"[AnimeFire] Encontrados {len(result_items)} itens de resultado.")
+        for item_div in result_items:
+            link_tag = item_div.find('a', href=True)
+            title_tag = item_div.find('h3', class_='animeTitle')
+            img_tag = item_div.find('img', class_='card-img-top')
+
+            if link_tag and title_tag:
+                title = title_tag.get_text(strip=True)
+                url = link_tag['href']
+                absolute_url = urljoin(self.base_url, url)
+                image_url = ""
+                if img_tag:
+                    image_url = img_tag.get('src') or img_tag.get('data-src') or ""
+                    if image_url and not image_url.startswith("http"):
+                        image_url = urljoin(self.base_url, image_url)
+
+                if absolute_url.startswith(self.base_url) and "/animes/" in absolute_url and absolute_url not in processed_urls:
+                    log.debug(f"    [AnimeFire] Item encontrado: {title} - {absolute_url}")
+                    results.append({'title': title, 'url': absolute_url, 'image': image_url})
+                    processed_urls.add(absolute_url)
+                else:
+                    log.debug(f"    [AnimeFire] Item ignorado (URL inválida ou duplicada): {title} - {absolute_url}")
+            else:
+                log.debug(f"    [AnimeFire] Item ignorado (link ou título faltando).")
+        return results
+
     def get_details(self, anime_url: str, fallback_image: str = "") -> Dict:
         """Busca detalhes e lista de episódios de um anime."""
         log.info(f"[AnimeFire] Buscando detalhes de: {anime_url}")
         details = {'episodes': [], 'type': 'series', 'title': 'Desconhecido', 'cover_url': None}
 
-        _set_ipv4()
         try:
-            response = requests.get(anime_url, headers=HTTP_HEADERS, timeout=20)
+            response = self.http.get(anime_url, source=SOURCE_NAME, timeout=20, cache_ttl=config.HTTP_CACHE_TTL_DETAILS)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            title_tag = soup.find('h1', class_='aniTitulo')
-            if title_tag:
-                details['title'] = title_tag.text.strip()
-                log.debug(f"    [AnimeFire] Título encontrado: {details['title']}")
-
-            # Tenta encontrar a imagem da capa por vários seletores
-            cover_url = None
-
-            # 1. Tenta pelo seletor original
-            cover_img_tag = soup.select_one('div.aniCover img.imgAnime')
-            if cover_img_tag and cover_img_tag.get('src'):
-                cover_url = urljoin(BASE_URL, cover_img_tag['src'])
-
-            # 2. Tenta por qualquer img.imgAnime
-            if not cover_url:
-                generic_img = soup.find('img', class_='imgAnime')
-                if generic_img and generic_img.get('src'):
-                    cover_url = urljoin(BASE_URL, generic_img['src'])
-
-            # 3. Tenta por qualquer img com alt parecido com o título
-            if not cover_url and 'title' in details:
-                alt_img = soup.find('img', alt=re.compile(details['title'], re.I))
-                if alt_img and alt_img.get('src'):
-                    cover_url = urljoin(BASE_URL, alt_img['src'])
-
-            # 4. Tenta pegar a primeira imagem grande da página
-            if not cover_url:
-                big_img = soup.find('img', src=re.compile(r'-large\.webp$'))
-                if big_img and big_img.get('src'):
-                    cover_url = urljoin(BASE_URL, big_img['src'])
-
-            if not cover_url:
-                cover_url = fallback_image  # Usa a imagem da busca como fallback
-
-            details['cover_url'] = cover_url
-            details['image'] = cover_url or ""
-
-            synopsis_tag = soup.find('div', class_='aniSinopse')
-            if synopsis_tag:
-                details['synopsis'] = synopsis_tag.text.strip()
-                log.debug(f"    [AnimeFire] Sinopse encontrada.")
-
-            episode_links = soup.find_all('a', class_='lEp epT divNumEp smallbox px-2 mx-1 text-left d-flex')
-            if episode_links:
-                log.info(f"[AnimeFire] Encontrados {len(episode_links)} links de episódios.")
-                raw_episodes = []
-                for link_tag in episode_links:
-                    ep_page_url = urljoin(BASE_URL, link_tag['href'])
-                    ep_title_text = link_tag.get_text(strip=True)
-                    num_match = re.search(r'\d+', ep_title_text)
-                    ep_num = int(num_match.group(0)) if num_match else 9999
-                    raw_episodes.append({'num': ep_num, 'title': ep_title_text, 'url': ep_page_url})
-                raw_episodes.sort(key=lambda x: x['num'])
-                details['episodes'] = [{'title': ep['title'], 'url': ep['url']} for ep in raw_episodes]
+            html = response.text
+
+            # Contar os links de episódio no HTML bruto é barato; se a contagem bater com a
+            # da entrada guardada (e o código do parser não mudou), pulamos o BeautifulSoup.
+            cache_key = f"{SOURCE_NAME}:{anime_url}"
+            episode_count = html.count(EPISODE_LINK_MARKER)
+            cached_details = self.details_cache.get(cache_key, PARSER_VERSION, episode_count) if self.details_cache else None
+            if cached_details is not None:
+                log.info(f"[AnimeFire] Detalhes de {anime_url} obtidos do cache ({len(cached_details.get('episodes', []))} episódios).")
+                details = cached_details
             else:
-                log.warning("[AnimeFire] Nenhum link de episódio ('a.lEp...') encontrado.")
+                details = self._parse_details(html, details)
+                if self.details_cache:
+                    self.details_cache.put(cache_key, PARSER_VERSION, episode_count, details)
         except requests.exceptions.RequestException as e:
             log.error(f"[AnimeFire] Erro de rede ao buscar detalhes ({anime_url}): {e}", exc_info=False)
         except Exception as e:
             log.error(f"[AnimeFire] Erro inesperado ao buscar detalhes ({anime_url}): {e}", exc_info=True)
         finally:
-            details["image"] = details.get("cover_url", "")
-            _unset_ipv4()
+            if not details.get('cover_url'):
+                details['cover_url'] = fallback_image  # Usa a imagem da busca como fallback
+            details["image"] = details.get("cover_url") or ""
+        return details
+
+    def _parse_details(self, html: str, details: Dict) -> Dict:
+        """Extrai título, capa, sinopse e episódios (ordenados) do HTML da página do anime."""
+        soup = make_soup(html, DETAILS_STRAINER)
+
+        title_tag = soup.find('h1', class_='aniTitulo')
+        if title_tag:
+            details['title'] = title_tag.text.strip()
+            log.debug(f"    [AnimeFire] Título encontrado: {details['title']}")
+
+        # Tenta encontrar a imagem da capa por vários seletores
+        cover_url = None
+
+        # 1. Tenta pelo seletor original
+        cover_div = soup.find('div', class_='aniCover')
+        cover_img_tag = cover_div.find('img', class_='imgAnime') if cover_div else None
+        if cover_img_tag and cover_img_tag.get('src'):
+            cover_url = urljoin(self.base_url, cover_img_tag['src'])
+
+        # 2. Tenta por qualquer img.imgAnime
+        if not cover_url:
+            generic_img = soup.find('img', class_='imgAnime')
+            if generic_img and generic_img.get('src'):
+                cover_url = urljoin(self.base_url, generic_img['src'])
+
+        # Os seletores 3 e 4 olham todas as imagens da página, que ficaram fora da
+        # árvore reduzida; só nesse caso fazemos um segundo parse, restrito a <img>.
+        img_soup = make_soup(html, SoupStrainer('img')) if not cover_url else None
+
+        # 3. Tenta por qualquer img com alt parecido com o título
+        if not cover_url and 'title' in details:
+            alt_img = img_soup.find('img', alt=re.compile(details['title'], re.I))
+            if alt_img and alt_img.get('src'):
+                cover_url = urljoin(self.base_url, alt_img['src'])
+
+        # 4. Tenta pegar a primeira imagem grande da página
+        if not cover_url:
+            big_img = img_soup.find('img', src=re.compile(r'-large\.webp$'))
+            if big_img and big_img.get('src'):
+                cover_url = urljoin(self.base_url, big_img['src'])
+
+        details['cover_url'] = cover_url
+
+        synopsis_tag = soup.find('div', class_='aniSinopse')
+        if synopsis_tag:
+            details['synopsis'] = synopsis_tag.text.strip()
+            log.debug(f"    [AnimeFire] Sinopse encontrada.")
+
+        episode_links = soup.find_all('a', class_='lEp epT divNumEp smallbox px-2 mx-1 text-left d-flex')
+        if episode_links:
+            log.info(f"[AnimeFire] Encontrados {len(episode_links)} links de episódios.")
+            raw_episodes = []
+            for link_tag in episode_links:
+                ep_page_url = urljoin(self.base_url, link_tag['href'])
+                ep_title_text = link_tag.get_text(strip=True)
+                num_match = re.search(r'\d+', ep_title_text)
+                ep_num = int(num_match.group(0)) if num_match else 9999
+                raw_episodes.append({'num': ep_num, 'title': ep_title_text, 'url': ep_page_url})
+            raw_episodes.sort(key=lambda x: x['num'])
+            details['episodes'] = [{'title': ep['title'], 'url': ep['url']} for ep in raw_episodes]
+        else:
+            log.warning("[AnimeFire] Nenhum link de episódio ('a.lEp...') encontrado.")
         return details
 
     def get_video_source(self, episode_page_url: str) -> List[Dict[str, str]]:
@@ -172,19 +210,16 @@ class AnimeFireParser:
         Retorna uma lista de dicionários {'label': 'qualidade', 'src': 'url_video'}
         """
         log.info(f"[AnimeFire] Buscando fontes de vídeo em: {episode_page_url}")
-        _set_ipv4()
         try:
-            response = requests.get(episode_page_url, headers=HTTP_HEADERS, timeout=20)
+            response = self.http.get(episode_page_url, source=SOURCE_NAME, timeout=20, cache_ttl=config.HTTP_CACHE_TTL_VIDEO)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            video_tag = soup.find('video', attrs={'data-video-src': True})
-            if video_tag:
-                intermediate_url = video_tag.get('data-video-src')
-                if intermediate_url:
-                    absolute_intermediate_url = urljoin(episode_page_url, intermediate_url)
+            page = self._parse_episode_page(response.text, episode_page_url)
+            if page['has_video_tag']:
+                absolute_intermediate_url = page['data_video_src']
+                if absolute_intermediate_url:
                     log.info(f"[AnimeFire] Encontrada URL intermediária em data-video-src: {absolute_intermediate_url}")
                     try:
-                        video_data_response = requests.get(absolute_intermediate_url, headers=HTTP_HEADERS, timeout=15)
+                        video_data_response = self.http.get(absolute_intermediate_url, source=SOURCE_NAME, timeout=15, cache_ttl=config.HTTP_CACHE_TTL_VIDEO)
                         video_data_response.raise_for_status()
                         video_data = video_data_response.json()
                         sources = []
@@ -206,19 +241,9 @@ class AnimeFireParser:
                     log.warning("[AnimeFire] Tag <video> encontrada, mas sem atributo 'data-video-src'.")
             # Fallback para iframe
             log.info("[AnimeFire] Estratégia <video> falhou ou não aplicável. Tentando fallback para <iframe>.")
-            video_div = soup.find("div", id="div_video")
-            iframe = None
-            if video_div:
-                iframe = video_div.find("iframe")
-                log.debug("[AnimeFire] Encontrado div#div_video, procurando iframe dentro.")
-            else:
-                log.warning("[AnimeFire] div#div_video não encontrado, tentando busca global por iframe.")
-                iframe = soup.find("iframe", src=re.compile(r"video|blogger", re.IGNORECASE))
-            if iframe and iframe.get("src"):
-                iframe_src = iframe["src"]
-                absolute_iframe_src = urljoin(episode_page_url, iframe_src)
-                log.info(f"[AnimeFire] Encontrada URL de vídeo no src do iframe (fallback): {absolute_iframe_src}")
-                return [{"label": "iframe", "src": absolute_iframe_src}]
+            if page['iframe_src']:
+                log.info(f"[AnimeFire] Encontrada URL de vídeo no src do iframe (fallback): {page['iframe_src']}")
+                return [{"label": "iframe", "src": page['iframe_src']}]
             else:
                 log.warning("[AnimeFire] Nenhum iframe válido encontrado na página (fallback).")
             return []
@@ -228,5 +253,32 @@ class AnimeFireParser:
         except Exception as e:
             log.error(f"[AnimeFire] Erro inesperado ao buscar fontes de vídeo ({episode_page_url}): {e}", exc_info=True)
             return []
-        finally:
-            _unset_ipv4()
\ No newline at end of file
+
+    def _parse_episode_page(self, html: str, episode_page_url: str) -> Dict:
+        """
+        Extrai da página do episódio a URL intermediária (data-video-src da tag <video>)
+        e a URL do iframe de fallback, ambas absolutas.
+        """
+        page = {'has_video_tag': False, 'data_video_src': None, 'iframe_src': None}
+        soup = make_soup(html, EPISODE_STRAINER)
+
+        video_tag = soup.find('video', attrs={'data-video-src': True})
+        if video_tag:
+            page['has_video_tag'] = True
+            intermediate_url = video_tag.get('data-video-src')
+            if intermediate_url:
+                page['data_video_src'] = urljoin(episode_page_url, intermediate_url)
+
+        iframe = None
+        if 'id="div_video"' in html:
+            # O iframe preferido é o que está dentro de div#div_video
+            video_div = make_soup(html, SoupStrainer(id='div_video')).find("div", id="div_video")
+            if video_div:
+                iframe = video_div.find("iframe")
+                log.debug("[AnimeFire] Encontrado div#div_video, procurando iframe dentro.")
+        else:
+            log.debug("[AnimeFire] div#div_video não encontrado, tentando busca global por iframe.")
+            iframe = soup.find("iframe", src=re.compile(r"video|blogger", re.IGNORECASE))
+        if iframe and iframe.get("src"):
+            page['iframe_src'] = urljoin(episode_page_url, iframe["src"])
+        return page
@@ -0,0 +1,67 @@
+# /home/marcos/Maratonando/maratonando_src/core/parsers/html_backend.py
+import logging
+import os
+import re
+from typing import List, Optional, Pattern
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+log = logging.getLogger(__name__)
+
+try:
+    import lxml # noqa: F401 (apenas detecta se o backend está disponível)
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# lxml é bem mais rápido que o html.parser embutido; usado sempre que estiver instalado.
+# A variável de ambiente MARATONANDO_HTML_BACKEND permite forçar um backend específico.
+DEFAULT_BACKEND = "lxml" if HAS_LXML else "html.parser"
+
+_backend = DEFAULT_BACKEND
+
+
+def available_backends() -> List[str]:
+    backends = ["html.parser"]
+    if HAS_LXML:
+        backends.append("lxml")
+    return backends
+
+
+def get_backend() -> str:
+    return _backend
+
+
+def set_backend(name: str):
+    """Define o backend usado por make_soup (ex: 'lxml' ou 'html.parser')."""
+    global _backend
+    if name not in available_backends():
+        raise ValueError(f"Backend HTML '{name}' indisponível. Opções: {', '.join(available_backends())}")
+    _backend = name
+    log.debug(f"[HTML] Backend definido para '{name}'.")
+
+
+def make_soup(markup: str, parse_only: Optional[SoupStrainer] = None, backend: Optional[str] = None) -> BeautifulSoup:
+    """
+    Cria o BeautifulSoup com o backend configurado. Com `parse_only`, só os nós
+    aceitos pelo SoupStrainer (e seus filhos) são materializados na árvore.
+    """
+    return BeautifulSoup(markup, backend or _backend, parse_only=parse_only)
+
+
+def class_pattern(*class_names: str) -> Pattern:
+    """
+    Regex que aceita um atributo class contendo qualquer uma das classes dadas.
+    Durante o parse o SoupStrainer recebe o atributo class como texto bruto
+    (ex: "lEp epT divNumEp"), por isso uma string simples não basta.
+    """
+    alternatives = "|".join(re.escape(name) for name in class_names)
+    return re.compile(rf"(?:^|\s)(?:{alternatives})(?:\s|$)")
+
+
+_env_backend = os.environ.get("MARATONANDO_HTML_BACKEND")
+if _env_backend:
+    try:
+        set_backend(_env_backend)
+    except ValueError as e:
+        log.warning(f"[HTML] {e}. Usando '{DEFAULT_BACKEND}'.")
@@ -1,5 +1,7 @@
 import subprocess
 import shutil
+import tempfile
+from pathlib import Path
 from typing import Optional
 import logging
 
@@ -13,9 +15,12 @@ class ExternalMediaPlayer:
         self.player_executable = player_executable
         # TODO: Consider making player_executable configurable (e.g., via config file/env var)
 
-    def play_episode(self, video_url: str, title: str = "Maratonando", referer: Optional[str] = None):
+    def play_episode(self, video_url: str, title: str = "Maratonando", referer: Optional[str] = None,
+                     start: Optional[float] = None) -> Optional[float]:
         """
-        Tenta reproduzir a URL de vídeo fornecida.
+        Tenta reproduzir a URL de vídeo fornecida, começando em `start` segundos.
+        Retorna a posição (em segundos) em que o player foi fechado, ou None se o
+        vídeo chegou ao fim ou a posição não pôde ser obtida.
         """
         # Verifica se o player está disponível no sistema
         if not shutil.which(self.player_executable):
@@ -36,6 +41,12 @@ class ExternalMediaPlayer:
         
         if referer:
             command.append(f"--referrer={referer}")
+
+        # O mpv grava a posição ao fechar num diretório "watch later" descartável, lido depois.
+        watch_later_dir = tempfile.mkdtemp(prefix="maratonando-mpv-")
+        command.extend(["--save-position-on-quit", f"--watch-later-directory={watch_later_dir}"])
+        if start:
+            command.append(f"--start={start:.1f}")
             
         command.append(video_url)
 
@@ -56,3 +67,19 @@ class ExternalMediaPlayer:
         except Exception as e:
             log.error(f"Ocorreu um erro inesperado ao tentar tocar o vídeo: {e}", exc_info=True)
             # Considerar re-levantar a exceção ou retornar um status de falha
+        finally:
+            position = self._read_saved_position(Path(watch_later_dir))
+            shutil.rmtree(watch_later_dir, ignore_errors=True)
+        return position
+
+    @staticmethod
+    def _read_saved_position(watch_later_dir: Path) -> Optional[float]:
+        """Lê o 'start=' que o mpv grava no diretório watch later ao ser fechado antes do fim."""
+        for state_file in watch_later_dir.iterdir():
+            try:
+                for line in state_file.read_text(encoding='utf-8', errors='replace').splitlines():
+                    if line.startswith("start="):
+                        return float(line.split("=", 1)[1])
+            except (OSError, ValueError):
+                continue
+        return None
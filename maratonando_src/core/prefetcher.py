@@ -0,0 +1,139 @@
+# /home/marcos/Maratonando/maratonando_src/core/prefetcher.py
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+from .. import config
+from .bandwidth import get_bandwidth_estimator
+from .quality import parse_quality
+
+log = logging.getLogger(__name__)
+
+EXPIRY_PARAMS = ('expires', 'expire', 'exp', 'e', 'expiry', 'validto') # Parâmetros de URLs assinadas
+
+
+def link_expiry(url: str) -> Optional[float]:
+    """Horário (epoch) em que o link expira, se a URL trouxer um parâmetro de expiração com timestamp."""
+    for key, value in parse_qsl(urlparse(url).query):
+        if key.lower() in EXPIRY_PARAMS and value.isdigit() and len(value) in (10, 13):
+            return int(value) / (1000 if len(value) == 13 else 1)
+    return None
+
+
+class VideoSourcePrefetcher:
+    """
+    Resolve em segundo plano as fontes de vídeo dos próximos episódios.
+
+    Enquanto um episódio toca, `prefetch()` agenda `parser.get_video_source()` para
+    os episódios seguintes. O resultado fica guardado em memória enquanto os links valem
+    (a expiração indicada na URL, ou `ttl` segundos), e `refresh_margin` segundos antes
+    de expirar é resolvido de novo, por até `keep` segundos, para continuar válido quando
+    o episódio atual terminar. `get()` devolve na hora o que já foi resolvido, aguarda uma
+    resolução que ainda está em andamento ou, se não houver nada, busca normalmente.
+    Com `measure_hosts`, os servidores das fontes resolvidas que ainda não têm medição
+    recente são sondados em seguida (ver core/bandwidth.py), para a escolha da fonte do
+    próximo episódio já saber qual servidor é mais rápido.
+    """
+    def __init__(self, ttl: float = config.VIDEO_PREFETCH_TTL, max_workers: int = config.VIDEO_PREFETCH_WORKERS,
+                 referer: Optional[str] = None, measure_hosts: bool = config.VIDEO_QUALITY_PROBE,
+                 refresh_margin: float = config.VIDEO_PREFETCH_REFRESH_MARGIN,
+                 keep: float = config.VIDEO_PREFETCH_KEEP):
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.keep = keep
+        self.referer = referer
+        self.measure_hosts = measure_hosts
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="maratonando-prefetch")
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, List[Dict[str, str]]]] = {} # url -> (expira_em, fontes)
+        self._pending: Dict[str, Future] = {}
+        self._wanted: Dict[str, float] = {} # url -> até quando renovar (monotonic)
+
+    def _ttl_for(self, sources: List[Dict[str, str]]) -> float:
+        """Validade das fontes: o link que expira primeiro, ou `ttl` se nenhuma URL informa."""
+        expiries = [expiry for expiry in (link_expiry(source.get('src', '')) for source in sources) if expiry]
+        if not expiries:
+            return self.ttl
+        return max(0.0, min(expiries) - time.time())
+
+    def _resolve(self, parser: Any, episode_url: str) -> List[Dict[str, str]]:
+        try:
+            sources = parser.get_video_source(episode_url) or []
+            if sources:
+                ttl = self._ttl_for(sources)
+                with self._lock:
+                    self._entries[episode_url] = (time.monotonic() + ttl, sources)
+                self._schedule_refresh(parser, episode_url, ttl)
+                if self.measure_hosts: # Fora deste future, para get() não esperar a sondagem
+                    self._executor.submit(self._measure_hosts, sources)
+            return sources
+        finally:
+            with self._lock:
+                self._pending.pop(episode_url, None)
+
+    def _schedule_refresh(self, parser: Any, episode_url: str, ttl: float):
+        timer = threading.Timer(max(30.0, ttl - self.refresh_margin), self._refresh, (parser, episode_url))
+        timer.daemon = True
+        timer.start()
+
+    def _refresh(self, parser: Any, episode_url: str):
+        """Resolve de novo as fontes de um episódio ainda esperado, antes que os links expirem."""
+        with self._lock:
+            keep_until = self._wanted.get(episode_url)
+            if keep_until is None or keep_until <= time.monotonic():
+                self._wanted.pop(episode_url, None)
+                return
+            if episode_url in self._pending:
+                return
+            log.debug(f"[Prefetch] Renovando fontes de {episode_url}")
+            self._pending[episode_url] = self._executor.submit(self._resolve, parser, episode_url)
+
+    def _measure_hosts(self, sources: List[Dict[str, str]]):
+        videos = [source for source in sources if parse_quality(source.get('label', '')) is not None] # Sem 'iframe'
+        try:
+            get_bandwidth_estimator().probe_stale_hosts(videos, referer=self.referer)
+        except Exception as e:
+            log.debug(f"[Prefetch] Falha ao medir os servidores: {e}")
+
+    def _cached(self, episode_url: str) -> Optional[List[Dict[str, str]]]:
+        entry = self._entries.get(episode_url)
+        if not entry:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[episode_url]
+            return None
+        return entry[1]
+
+    def prefetch(self, parser: Any, episode_urls: List[str]):
+        """
+        Agenda a resolução das fontes dos episódios que ainda não estão no cache. Eles
+        passam a ser os episódios renovados em segundo plano (no lugar dos anteriores).
+        """
+        with self._lock:
+            keep_until = time.monotonic() + self.keep
+            self._wanted = {episode_url: keep_until for episode_url in episode_urls if episode_url}
+            for episode_url in episode_urls:
+                if not episode_url or episode_url in self._pending or self._cached(episode_url) is not None:
+                    continue
+                log.debug(f"[Prefetch] Agendando fontes de {episode_url}")
+                self._pending[episode_url] = self._executor.submit(self._resolve, parser, episode_url)
+
+    def get(self, parser: Any, episode_url: str) -> List[Dict[str, str]]:
+        """Retorna as fontes do episódio, usando o que já foi pré-carregado quando possível."""
+        with self._lock:
+            self._wanted.pop(episode_url, None) # Já foi aberto: não precisa mais renovar
+            sources = self._cached(episode_url)
+            future = self._pending.get(episode_url)
+        if sources is not None:
+            log.info(f"[Prefetch] Fontes de {episode_url} já estavam prontas.")
+            return sources
+        if future is not None:
+            log.info(f"[Prefetch] Aguardando pré-carregamento em andamento de {episode_url}")
+            try:
+                return future.result()
+            except Exception as e:
+                log.warning(f"[Prefetch] Pré-carregamento falhou ({e}). Tentando novamente.")
+        return parser.get_video_source(episode_url)
@@ -0,0 +1,182 @@
+# /home/marcos/Maratonando/maratonando_src/core/quality.py
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from .. import config
+from .bandwidth import BandwidthEstimator, get_bandwidth_estimator
+
+log = logging.getLogger(__name__)
+
+# Preferências aceitas (config.VIDEO_QUALITY_PREFERENCE, --qualidade, menu da GUI):
+#   "auto"  - a maior qualidade que a banda do servidor (medida em downloads) aguenta (sem medição: a maior);
+#   "max" / "min" - a maior / a menor disponível;
+#   "720p" etc. - a maior qualidade até 720p (se não houver nenhuma, a menor acima).
+QUALITY_CHOICES = ("auto", "max", "1080p", "720p", "480p", "360p", "min")
+
+# Rótulos sem número -> altura equivalente.
+NAMED_QUALITIES = {
+    '4k': 2160, 'uhd': 2160, '2k': 1440, 'fullhd': 1080, 'full hd': 1080, 'full-hd': 1080,
+    'fhd': 1080, 'f-hd': 1080,
+    'hd': 720, 'sd': 480, 'ld': 360,
+}
+# '720p', '720 p', '1080p60' (com taxa de quadros) ou só '720'
+LABEL_HEIGHT = re.compile(r'\b(\d{3,4})\s*p(?:\d{2})?\b|^(\d{3,4})$', re.IGNORECASE)
+
+# Banda (bits/s) necessária para cada altura, com folga para não travar.
+REQUIRED_BANDWIDTH = ((2160, 25_000_000), (1440, 16_000_000), (1080, 8_000_000),
+                      (720, 4_000_000), (480, 2_000_000), (360, 1_000_000), (0, 500_000))
+
+PREFERENCE_ENV = "MARATONANDO_QUALIDADE"
+
+
+def parse_quality(label: str) -> Optional[int]:
+    """Altura do vídeo pelo rótulo: '1080p' -> 1080, 'HD' -> 720, 'SD' -> 480. Desconhecido -> None."""
+    label = (label or "").strip().lower()
+    match = LABEL_HEIGHT.search(label)
+    if match:
+        return int(match.group(1) or match.group(2))
+    for name in sorted(NAMED_QUALITIES, key=len, reverse=True): # 'fullhd' e 'f-hd' antes de 'hd'
+        if re.search(rf'\b{re.escape(name)}\b', label):
+            return NAMED_QUALITIES[name]
+    return None
+
+
+def required_bandwidth(height: Optional[int]) -> int:
+    for min_height, bandwidth in REQUIRED_BANDWIDTH:
+        if (height or 0) >= min_height:
+            return bandwidth
+    return REQUIRED_BANDWIDTH[-1][1]
+
+
+def default_preference() -> str:
+    """Preferência do usuário: variável de ambiente MARATONANDO_QUALIDADE ou config.VIDEO_QUALITY_PREFERENCE."""
+    preference = os.environ.get(PREFERENCE_ENV, "").strip().lower() or config.VIDEO_QUALITY_PREFERENCE
+    if preference not in QUALITY_CHOICES:
+        log.warning(f"[Qualidade] Preferência '{preference}' inválida; usando 'auto'.")
+        return "auto"
+    return preference
+
+
+def rank_sources(sources: List[Dict[str, str]], preference: Optional[str] = None,
+                 bandwidth_bps: Optional[float] = None,
+                 host_throughput: Optional[Callable[[str], Optional[float]]] = None,
+                 host_capacity: Optional[Callable[[str], Optional[float]]] = None) -> List[Dict[str, str]]:
+    """
+    Ordena as fontes ({'label', 'src'}) da mais para a menos adequada à preferência.
+
+    Fontes sem qualidade reconhecível (ex: 'iframe') ficam no fim, na ordem original.
+    Com `bandwidth_bps`, no modo "auto" as qualidades que a banda não aguenta vão para
+    depois das que aguentam (continuam disponíveis se forem as únicas). `host_throughput`
+    (url -> bits/s medidos, ou None) só desempata: entre fontes de mesma qualidade, o
+    servidor mais rápido vem antes. `host_capacity` (url -> banda sustentada medida em
+    downloads, ou None) vale no lugar de `bandwidth_bps` para o limite do modo "auto".
+    """
+    preference = (preference or default_preference()).lower()
+    target = parse_quality(preference) if preference not in ("auto", "max", "min") else None
+
+    def sort_key(indexed_source):
+        index, source = indexed_source
+        height = parse_quality(source.get('label', ''))
+        throughput = host_throughput(source.get('src', '')) if host_throughput else None
+        speed = -(throughput or 0) # Mais rápido primeiro; hosts sem medição por último no empate
+        if height is None:
+            return (3, 0, speed, index)
+        if preference == "min":
+            return (0, height, speed, index)
+        if target is not None:
+            # Até o alvo: da maior para a menor. Acima do alvo: da menor para a maior.
+            return (0, -height, speed, index) if height <= target else (1, height, speed, index)
+        available = (host_capacity(source.get('src', '')) if host_capacity else None) or bandwidth_bps
+        if preference == "auto" and available and required_bandwidth(height) > available:
+            return (1, height, speed, index) # Não aguenta: a menor das pesadas primeiro
+        return (0, -height, speed, index)
+
+    return [source for _, source in sorted(enumerate(sources), key=sort_key)]
+
+
+class QualitySelector:
+    """
+    Escolhe a fonte de vídeo sem perguntar ao usuário.
+
+    As fontes são ordenadas por `rank_sources`, com a velocidade de cada servidor vinda do
+    `BandwidthEstimator`. Com `probe` ligado, as candidatas recebem um GET pequeno com
+    Range em paralelo (até `probe_timeout` segundos), que também alimenta o estimador, e a
+    primeira que responder sem erro é a escolhida. Se algum servidor ainda não tinha
+    medição, todas as sondagens terminam e a ordem é refeita com as medições novas antes
+    de escolher. Se nenhuma responder, fica a primeira da ordem (o player/downloader
+    mostra o erro real). Fontes 'iframe' não são sondadas.
+    """
+    def __init__(self,
+                 preference: Optional[str] = None,
+                 probe: bool = config.VIDEO_QUALITY_PROBE,
+                 probe_timeout: float = config.VIDEO_QUALITY_PROBE_TIMEOUT,
+                 http=None,
+                 estimator: Optional[BandwidthEstimator] = None):
+        self.preference = preference
+        self.probe = probe
+        self.probe_timeout = probe_timeout
+        self._http = http
+        self._estimator = estimator
+
+    @property
+    def estimator(self) -> BandwidthEstimator:
+        return self._estimator or get_bandwidth_estimator()
+
+    def rank(self, sources: List[Dict[str, str]], bandwidth_bps: Optional[float] = None) -> List[Dict[str, str]]:
+        return rank_sources(sources, self.preference, bandwidth_bps, host_throughput=self.estimator.throughput,
+                            host_capacity=self.estimator.sustained_throughput)
+
+    def choose(self, sources: List[Dict[str, str]], bandwidth_bps: Optional[float] = None,
+               referer: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """A fonte escolhida, ou None se a lista está vazia."""
+        ranked = self.rank(sources, bandwidth_bps)
+        if len(ranked) <= 1 or not self.probe:
+            return ranked[0] if ranked else None
+        candidates = [source for source in ranked if parse_quality(source.get('label', '')) is not None]
+        unmeasured = any(self.estimator.throughput(source['src']) is None for source in candidates)
+        chosen = self._first_alive(candidates, referer, wait_all=unmeasured) if candidates else None
+        if chosen is None:
+            log.info("[Qualidade] Nenhuma fonte respondeu à sondagem; usando a primeira da ordem.")
+            return ranked[0]
+        return chosen
+
+    def _is_alive(self, source: Dict[str, str], referer: Optional[str]) -> bool:
+        return self.estimator.probe(source['src'], referer=referer, timeout=self.probe_timeout, http=self._http)
+
+    def _first_alive(self, candidates: List[Dict[str, str]], referer: Optional[str],
+                     wait_all: bool = False) -> Optional[Dict[str, str]]:
+        """
+        Sonda as candidatas em paralelo e retorna a primeira (na ordem) que respondeu, sem
+        esperar as de menor prioridade assim que todas as anteriores tiverem resposta. Com
+        `wait_all`, espera todas e reordena pelas velocidades medidas.
+        """
+        executor = ThreadPoolExecutor(max_workers=min(4, len(candidates)), thread_name_prefix="maratonando-quality")
+        try:
+            futures = [executor.submit(self._is_alive, source, referer) for source in candidates]
+            if wait_all:
+                alive = [source for source, future in zip(candidates, futures) if future.result()]
+                chosen = self.rank(alive)[0] if alive else None
+                if chosen:
+                    log.debug(f"[Qualidade] Escolhida {chosen.get('label')} ({chosen.get('src')}) após medir os servidores.")
+                return chosen
+            for _ in as_completed(futures):
+                for source, future in zip(candidates, futures):
+                    if not future.done():
+                        break # Uma de maior prioridade ainda não respondeu
+                    if future.result():
+                        log.debug(f"[Qualidade] Escolhida {source.get('label')} após sondagem.")
+                        return source
+            return None
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def select_source(sources: List[Dict[str, str]], preference: Optional[str] = None,
+                  bandwidth_bps: Optional[float] = None, probe: Optional[bool] = None,
+                  referer: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """Atalho: escolhe uma fonte com um QualitySelector (sondagem conforme config, se `probe` for None)."""
+    selector = QualitySelector(preference, probe=config.VIDEO_QUALITY_PROBE if probe is None else probe)
+    return selector.choose(sources, bandwidth_bps=bandwidth_bps, referer=referer)
@@ -1,59 +1,117 @@
 # /home/marcos/Maratonando/maratonando_src/core/searcher.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 import logging
-# Importa as classes de parser diretamente
-from .parsers import AnimeFireParser # Importe aqui todos os seus parsers
+# As fontes ficam no registro de parsers (core/parsers/__init__.py), que só importa
+# e instancia cada parser quando a busca o usa pela primeira vez.
+from .parsers import registry as parser_registry
 
 log = logging.getLogger(__name__)
 
+# Prazo global (em segundos) para a busca em todas as fontes.
+# Cada fonte roda em paralelo; as que não terminarem a tempo ficam de fora do resultado.
+# Fica acima do timeout HTTP das fontes (20s no AnimeFire), que é o que realmente libera
+# a thread de uma fonte que estourou o prazo.
+SEARCH_DEADLINE = 25
+SEARCH_MAX_WORKERS = 8
 
-# Lista de parsers a serem usados
-# Adicione instâncias de todos os seus parsers aqui.
-# O nome é usado para identificação nos logs e potencialmente na UI.
-# A chave 'instance' deve conter uma instância da classe do parser.
-parsers_list: List[Dict[str, Any]] = [
-    {'name': 'AnimeFire', 'instance': AnimeFireParser()},
-    # Se você adicionar um novo parser (ex: MeuNovoParser em meu_novo_parser.py),
-    # importe-o acima e adicione-o aqui:
-    # {'name': 'MeuNovoParser', 'instance': MeuNovoParser()},
-]
+# Executor compartilhado: não usamos `with ThreadPoolExecutor(...)` porque o
+# encerramento do bloco esperaria pelas fontes que estouraram o prazo.
+_search_executor = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS, thread_name_prefix="maratonando-search")
 
-def perform_search(query: str) -> List[Dict[str, str]]:
+def _search_source(parser_name: str, query: str) -> List[Dict[str, str]]:
+    """Executa a busca em uma única fonte e marca cada resultado com o nome dela."""
+    parser_instance = parser_registry[parser_name]
+    # A verificação hasattr(parser_instance, 'search') é implícita,
+    # pois chamaremos o método diretamente. Se não existir, um AttributeError será levantado.
+    log.info(f"Preparando para buscar em {parser_name}...")
+    current_results = parser_instance.search(query) # Chama o método search da instância
+
+    # Adiciona informação da fonte a cada resultado
+    if current_results: # Garante que current_results não é None
+        for result in current_results:
+            if 'source' not in result: # Adiciona o nome do parser como a fonte
+                result['source'] = parser_name
+        log.debug(f"Recebidos {len(current_results)} resultados de {parser_name}.")
+        return current_results
+    log.warning(f"Parser {parser_name} retornou None ou uma lista vazia.")
+    return []
+
+def iter_search(query: str, deadline: float = SEARCH_DEADLINE) -> Iterator[Dict[str, Any]]:
     """
-    Orquestra a busca pela query em diferentes fontes/parsers.
-    Retorna uma lista de dicionários, cada um contendo 'title', 'url' e 'source'.
+    Busca a query em todas as fontes em paralelo e entrega os resultados de cada
+    fonte assim que ela termina, sem esperar pelas demais.
+    Cada item gerado é um dicionário com:
+      'source': nome da fonte,
+      'status': 'ok', 'error' (a fonte levantou erro, ex: falha de rede) ou 'timeout'
+                (fonte não terminou dentro de `deadline` segundos),
+      'results': lista de resultados da fonte (vazia em caso de erro/timeout).
+    Uma fonte em 'timeout' não é interrompida: ela continua ocupando uma das
+    SEARCH_MAX_WORKERS threads do executor até o timeout HTTP da própria fonte.
     """
     log.info(f"Iniciando busca por '{query}' nas fontes configuradas...")
-    all_results: List[Dict[str, str]] = [] # Adicionar type hint para clareza
+    futures = {_search_executor.submit(_search_source, parser_name, query): parser_name
+               for parser_name in parser_registry}
+    pending = set(futures)
 
-    for parser_config in parsers_list:
-        parser_instance = parser_config['instance']
-        parser_name = parser_config['name']
+    def _collect(future) -> Dict[str, Any]:
+        parser_name = futures[future]
+        pending.discard(future)
         try:
-            # A verificação hasattr(parser_instance, 'search') é implícita,
-            # pois chamaremos o método diretamente. Se não existir, um AttributeError será levantado.
-            log.info(f"Preparando para buscar em {parser_name}...")
-            current_results = parser_instance.search(query) # Chama o método search da instância
-
-            # Adiciona informação da fonte a cada resultado
-            if current_results: # Garante que current_results não é None
-                for result in current_results:
-                    if 'source' not in result: # Adiciona o nome do parser como a fonte
-                        result['source'] = parser_name
-                all_results.extend(current_results)
-                log.debug(f"Recebidos {len(current_results)} resultados de {parser_name}.")
-            else:
-                log.warning(f"Parser {parser_name} retornou None ou uma lista vazia.")
-                log.debug(f"Recebidos 0 resultados de {parser_name}.")
-
+            return {'source': parser_name, 'status': 'ok', 'results': future.result()}
         except AttributeError:
             # Este erro ocorrerá se o parser_instance não tiver um método 'search'
             log.warning(f"Parser {parser_name} não possui um método 'search'. Pulando.")
         except Exception as e:
             log.error(f"Erro ao executar parser {parser_name}: {e}", exc_info=True)
+        return {'source': parser_name, 'status': 'error', 'results': []}
 
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            yield _collect(future)
+    except FuturesTimeoutError:
+        for future in list(pending):
+            if future.done():
+                yield _collect(future)
+                continue
+            future.cancel() # Só tem efeito se a tarefa ainda não começou
+            pending.discard(future)
+            log.warning(f"Prazo de {deadline}s esgotado. Fonte sem resposta: {futures[future]}")
+            yield {'source': futures[future], 'status': 'timeout', 'results': []}
+
+def perform_search_report(query: str, deadline: float = SEARCH_DEADLINE) -> Dict[str, Any]:
+    """
+    Busca a query em todas as fontes em paralelo, esperando no máximo `deadline` segundos.
+    Retorna um dicionário com:
+      'results': resultados das fontes que responderam a tempo (na ordem do registro de parsers),
+      'timed_out': nomes das fontes que não terminaram dentro do prazo,
+      'failed': nomes das fontes que levantaram erro.
+    """
+    results_by_source: Dict[str, List[Dict[str, str]]] = {}
+    timed_out: List[str] = []
+    failed: List[str] = []
+    for batch in iter_search(query, deadline):
+        if batch['status'] == 'ok':
+            results_by_source[batch['source']] = batch['results']
+        elif batch['status'] == 'timeout':
+            timed_out.append(batch['source'])
+        else:
+            failed.append(batch['source'])
+
+    all_results: List[Dict[str, str]] = []
+    for parser_name in parser_registry:
+        all_results.extend(results_by_source.get(parser_name, []))
 
     log.info(f"Busca concluída. Encontrados {len(all_results)} resultados no total.")
+    return {'results': all_results, 'timed_out': timed_out, 'failed': failed}
+
+def perform_search(query: str, deadline: float = SEARCH_DEADLINE) -> List[Dict[str, str]]:
+    """
+    Orquestra a busca pela query em diferentes fontes/parsers.
+    Retorna uma lista de dicionários, cada um contendo 'title', 'url' e 'source'.
+    Fontes que não respondem dentro de `deadline` segundos são ignoradas.
+    """
+    all_results = perform_search_report(query, deadline)['results']
 
     # TODO: Implementar lógica para ordenar ou remover duplicatas aqui, se necessário.
     # Exemplo simples de remoção de duplicatas baseado na URL (mantendo a primeira ocorrência):
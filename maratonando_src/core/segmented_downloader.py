@@ -0,0 +1,424 @@
+# /home/marcos/Maratonando/maratonando_src/core/segmented_downloader.py
+import base64
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from .. import config
+from ..utils.helpers import write_atomic
+from ..utils.http_client import HttpClient
+from .downloader import DownloadProgress, ProgressCallback
+
+log = logging.getLogger(__name__)
+
+# Extensões tratadas como arquivo de vídeo direto (o resto, ex: iframe e HLS, fica com o yt-dlp).
+DIRECT_VIDEO_EXTENSIONS = ('.mp4', '.m4v', '.webm', '.mkv')
+CHUNK_SIZE = 256 * 1024
+SEGMENT_RETRIES = 3           # Novas tentativas de uma parte, continuando de onde ela parou
+STATE_SAVE_INTERVAL = 2.0     # Segundos entre gravações do estado (.part.json)
+PROGRESS_INTERVAL = 0.25      # Segundos entre eventos de progresso
+SPEED_WINDOW = 5.0            # Segundos usados no cálculo da velocidade
+STATE_VERSION = 1
+
+# Hashes aceitos nos headers Digest/x-goog-hash -> nome no hashlib.
+DIGEST_ALGORITHMS = (('sha-512', 'sha512'), ('sha-256', 'sha256'), ('md5', 'md5'))
+
+CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+class DownloadError(RuntimeError):
+    """O download direto falhou. O .part e o estado ficam no disco para a próxima tentativa continuar."""
+
+
+class DownloadCancelled(DownloadError):
+    """O download foi cancelado pelo `cancel_event`."""
+
+
+class UnsupportedSourceError(DownloadError):
+    """A URL não é um arquivo de vídeo direto (ex: página HTML, playlist HLS). `content_type` diz o que era."""
+    def __init__(self, message: str, content_type: str = ""):
+        super().__init__(message)
+        self.content_type = content_type
+
+
+def is_direct_video_url(video_url: str) -> bool:
+    return urlparse(video_url).path.lower().endswith(DIRECT_VIDEO_EXTENSIONS)
+
+
+class RateLimiter:
+    """
+    Limite de banda compartilhado (bytes/s) entre todas as partes e downloads.
+    Cada trecho recebido reserva seu tempo de transmissão; quem passa do limite dorme.
+    """
+    def __init__(self, bytes_per_second: float = 0):
+        self.bytes_per_second = bytes_per_second # 0 = sem limite
+        self._lock = threading.Lock()
+        self._next_free = time.monotonic()
+
+    def consume(self, size: int):
+        rate = self.bytes_per_second
+        if not rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._next_free = max(self._next_free, now) + size / rate
+            wait = self._next_free - now
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _Segment:
+    """Faixa [start, end] do arquivo (inclusiva), com `done` bytes já gravados."""
+    __slots__ = ('start', 'end', 'done')
+
+    def __init__(self, start: int, end: int, done: int = 0):
+        self.start = start
+        self.end = end
+        self.done = done
+
+    @property
+    def position(self) -> int:
+        return self.start + self.done
+
+    @property
+    def remaining(self) -> int:
+        return self.end - self.start + 1 - self.done
+
+
+class _Transfer:
+    """Estado de um download em andamento: partes, progresso e gravação do .part.json."""
+    def __init__(self, state_path: Path, total: int, validators: Dict[str, Optional[str]],
+                 segments: List[_Segment], on_progress: Optional[ProgressCallback]):
+        self.state_path = state_path
+        self.total = total
+        self.validators = validators
+        self.segments = segments
+        self.on_progress = on_progress
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=64) # (instante, bytes baixados) para a velocidade
+        self._last_progress = 0.0
+        self._last_save = time.monotonic()
+
+    @property
+    def downloaded(self) -> int:
+        return sum(segment.done for segment in self.segments)
+
+    def advance(self, segment: _Segment, size: int):
+        with self._lock:
+            segment.done += size
+            now = time.monotonic()
+            save = now - self._last_save >= STATE_SAVE_INTERVAL
+            if save:
+                self._last_save = now
+                self._save_locked()
+            report = now - self._last_progress >= PROGRESS_INTERVAL
+            if report:
+                self._last_progress = now
+                progress = self._progress_locked(now)
+        if report:
+            self._emit(progress)
+
+    def _progress_locked(self, now: float, status: str = 'downloading') -> DownloadProgress:
+        downloaded = self.downloaded
+        self._samples.append((now, downloaded))
+        while len(self._samples) > 2 and now - self._samples[0][0] > SPEED_WINDOW:
+            self._samples.popleft()
+        speed = eta = None
+        elapsed = now - self._samples[0][0]
+        if elapsed > 0:
+            speed = (downloaded - self._samples[0][1]) / elapsed
+            if speed > 0:
+                eta = (self.total - downloaded) / speed
+        return DownloadProgress(status, downloaded, self.total or None, None, speed, eta)
+
+    def _emit(self, progress: DownloadProgress):
+        if self.on_progress is not None:
+            try:
+                self.on_progress(progress)
+            except Exception:
+                log.exception("[Download direto] Erro no callback de progresso")
+
+    def finish_progress(self):
+        with self._lock:
+            progress = self._progress_locked(time.monotonic(), status='finished')
+        self._emit(progress)
+
+    def save(self):
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self):
+        data = {'version': STATE_VERSION, 'total': self.total, **self.validators,
+                'segments': [[segment.start, segment.end, segment.done] for segment in self.segments]}
+        try:
+            write_atomic(self.state_path, json.dumps(data).encode('utf-8'))
+        except OSError as e:
+            log.warning(f"[Download direto] Não foi possível salvar o estado em {self.state_path}: {e}")
+
+
+class SegmentedDownloader:
+    """
+    Baixa arquivos de vídeo diretos (MP4) sem o yt-dlp, em várias partes paralelas com HTTP Range.
+
+    - O arquivo é pré-alocado como `<nome>.part` e cada parte grava na sua posição.
+    - O progresso de cada parte fica em `<nome>.part.json`: se o download for interrompido
+      (ou uma parte falhar), a próxima tentativa continua cada parte de onde parou, desde
+      que o servidor informe o mesmo tamanho (e ETag/Last-Modified) de antes. Como os links
+      expiram, o estado não depende da URL.
+    - No fim, o tamanho é conferido e, se o servidor enviar um hash do arquivo (headers
+      Digest ou x-goog-hash), ele também. Só então o .part vira o arquivo final.
+    - `max_bytes_per_second` limita a banda somada de todos os downloads deste objeto.
+    - Se o servidor não aceitar Range, o arquivo é baixado numa parte só (sem continuar).
+    """
+    def __init__(self,
+                 segments: int = config.DOWNLOAD_SEGMENTS,
+                 min_segment_size: int = config.DOWNLOAD_MIN_SEGMENT_BYTES,
+                 max_bytes_per_second: float = config.DOWNLOAD_MAX_BYTES_PER_SECOND,
+                 http: Optional[HttpClient] = None):
+        self.segments = max(1, segments)
+        self.min_segment_size = min_segment_size
+        self.rate_limiter = RateLimiter(max_bytes_per_second)
+        # Cliente próprio (sem cache de respostas): o pool precisa comportar todas as
+        # partes de todos os downloads simultâneos do mesmo host.
+        self.http = http or HttpClient(pool_maxsize=self.segments * config.DOWNLOAD_PER_HOST_LIMIT)
+
+    @property
+    def max_bytes_per_second(self) -> float:
+        return self.rate_limiter.bytes_per_second
+
+    @max_bytes_per_second.setter
+    def max_bytes_per_second(self, value: float):
+        self.rate_limiter.bytes_per_second = value
+
+    def download(self, video_url: str, output_path: str, filename: str, referer: Optional[str] = None,
+                 on_progress: Optional[ProgressCallback] = None,
+                 cancel_event: Optional[threading.Event] = None) -> Path:
+        """
+        Baixa `video_url` para `output_path/filename.<ext>` e retorna o caminho final.
+        Levanta UnsupportedSourceError (não é vídeo direto), DownloadCancelled ou DownloadError.
+        """
+        extension = Path(urlparse(video_url).path).suffix.lower() or ".mp4"
+        final_path = Path(output_path) / f"{filename}{extension}"
+        part_path = final_path.with_name(final_path.name + ".part")
+        state_path = final_path.with_name(final_path.name + ".part.json")
+        headers = {'Referer': referer} if referer else {}
+
+        total, ranged, validators, expected_digest = self._probe(video_url, headers)
+        if total and final_path.exists() and final_path.stat().st_size == total:
+            log.info(f"[Download direto] Já baixado: {final_path}")
+            return final_path
+
+        segments = self._resume_segments(state_path, part_path, total, validators) if ranged else None
+        if segments is None:
+            segments = self._plan_segments(total, ranged)
+            with open(part_path, 'wb') as f:
+                if total:
+                    f.truncate(total) # Pré-aloca (esparso onde o sistema de arquivos permite)
+        else:
+            log.info(f"[Download direto] Continuando {final_path.name} "
+                     f"({sum(segment.done for segment in segments)}/{total} bytes já baixados).")
+
+        transfer = _Transfer(state_path, total, validators, segments, on_progress)
+        pending = [segment for segment in segments if segment.remaining > 0 or not ranged]
+        log.info(f"[Download direto] {final_path.name}: {total} bytes em {len(pending)} parte(s) "
+                 f"({'com' if ranged else 'sem'} Range).")
+        stop_event = threading.Event() # Uma parte falhou: as outras param também
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, len(pending)),
+                                    thread_name_prefix="maratonando-segment") as executor:
+                futures = [executor.submit(self._fetch_segment, video_url, headers, part_path, transfer,
+                                           segment, ranged, cancel_event, stop_event)
+                           for segment in pending]
+                errors = []
+                for future in as_completed(futures): # Na ordem em que terminam: a primeira falha para as outras
+                    try:
+                        future.result()
+                    except Exception as e:
+                        stop_event.set()
+                        errors.append(e)
+            if errors:
+                cancelled = [e for e in errors if isinstance(e, DownloadCancelled)]
+                raise cancelled[0] if cancelled else errors[0]
+        finally:
+            if ranged:
+                transfer.save()
+
+        self._verify(part_path, transfer, expected_digest, state_path)
+        os.replace(part_path, final_path)
+        try:
+            state_path.unlink()
+        except FileNotFoundError:
+            pass
+        transfer.finish_progress()
+        log.info(f"[Download direto] Concluído: {final_path}")
+        return final_path
+
+    # --- Etapas ---
+
+    def _probe(self, video_url: str, headers: Dict[str, str]):
+        """Pede o primeiro byte para saber o tamanho, se há suporte a Range e os validadores."""
+        try:
+            with self.http.get(video_url, headers=dict(headers, Range="bytes=0-0"), stream=True,
+                               timeout=(10, 30)) as response:
+                if response.status_code not in (200, 206):
+                    raise DownloadError(f"servidor respondeu {response.status_code}")
+                content_type = response.headers.get('Content-Type', '').lower()
+                if content_type.startswith(('text/', 'application/json')) or 'mpegurl' in content_type:
+                    raise UnsupportedSourceError(f"conteúdo '{content_type}' não é um arquivo de vídeo", content_type)
+                ranged = False
+                total = int(response.headers.get('Content-Length') or 0)
+                match = CONTENT_RANGE.match(response.headers.get('Content-Range', ''))
+                if response.status_code == 206:
+                    if match and match.group(3) != '*':
+                        ranged, total = True, int(match.group(3))
+                    else:
+                        total = 0 # 206 sem o tamanho total: baixa numa parte só e descobre no fim
+                validators = {'etag': response.headers.get('ETag'),
+                              'last_modified': response.headers.get('Last-Modified')}
+                return total, ranged, validators, self._expected_digest(response.headers)
+        except requests.exceptions.RequestException as e:
+            raise DownloadError(f"erro de rede ao consultar o vídeo: {e}") from e
+
+    @staticmethod
+    def _expected_digest(response_headers) -> Optional[tuple]:
+        """Hash do arquivo inteiro informado pelo servidor: (algoritmo do hashlib, bytes) ou None."""
+        candidates = []
+        for header in ('Digest', 'x-goog-hash'):
+            for part in response_headers.get(header, '').split(','):
+                name, _, value = part.strip().partition('=')
+                if value:
+                    candidates.append((name.strip().lower(), value.strip()))
+        for name, algorithm in DIGEST_ALGORITHMS: # O mais forte primeiro
+            for candidate_name, value in candidates:
+                if candidate_name == name:
+                    try:
+                        return algorithm, base64.b64decode(value)
+                    except ValueError:
+                        continue
+        return None
+
+    def _plan_segments(self, total: int, ranged: bool) -> List[_Segment]:
+        if not ranged or total <= 0:
+            return [_Segment(0, max(total, 1) - 1)]
+        count = max(1, min(self.segments, math.ceil(total / self.min_segment_size)))
+        size = math.ceil(total / count)
+        return [_Segment(start, min(start + size, total) - 1) for start in range(0, total, size)]
+
+    def _resume_segments(self, state_path: Path, part_path: Path, total: int,
+                         validators: Dict[str, Optional[str]]) -> Optional[List[_Segment]]:
+        """Partes salvas de uma tentativa anterior, se ainda valem para este arquivo."""
+        try:
+            state = json.loads(state_path.read_text(encoding='utf-8'))
+            if (state.get('version') != STATE_VERSION or state.get('total') != total
+                    or part_path.stat().st_size != total):
+                return None
+            for key, value in validators.items():
+                if value and state.get(key) and state[key] != value:
+                    log.info(f"[Download direto] O arquivo no servidor mudou ({key}); recomeçando.")
+                    return None
+            segments = [_Segment(int(start), int(end), int(done)) for start, end, done in state['segments']]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if not segments or segments[0].start != 0 or segments[-1].end != total - 1:
+            return None
+        return segments
+
+    def _fetch_segment(self, video_url: str, headers: Dict[str, str], part_path: Path, transfer: _Transfer,
+                       segment: _Segment, ranged: bool, cancel_event: Optional[threading.Event],
+                       stop_event: threading.Event):
+        failures = 0
+        while segment.remaining > 0 and not stop_event.is_set():
+            request_headers = dict(headers)
+            if ranged:
+                request_headers['Range'] = f"bytes={segment.position}-{segment.end}"
+            else:
+                segment.done = 0 # Sem Range não dá para continuar: recomeça a parte única
+            position_before = segment.position
+            try:
+                with self.http.get(video_url, headers=request_headers, stream=True, timeout=(10, 30)) as response:
+                    if response.status_code != (206 if ranged else 200):
+                        raise DownloadError(f"servidor respondeu {response.status_code} para a parte "
+                                            f"{segment.start}-{segment.end}")
+                    # Sem buffer: o que foi contado em `done` já foi entregue ao sistema operacional.
+                    with open(part_path, 'r+b', buffering=0) as f:
+                        f.seek(segment.position)
+                        for chunk in response.iter_content(CHUNK_SIZE):
+                            if cancel_event is not None and cancel_event.is_set():
+                                raise DownloadCancelled("download cancelado")
+                            if stop_event.is_set():
+                                return
+                            if ranged:
+                                chunk = chunk[:segment.remaining]
+                            f.write(chunk)
+                            transfer.advance(segment, len(chunk))
+                            self.rate_limiter.consume(len(chunk))
+                            if ranged and segment.remaining <= 0:
+                                break
+                if not ranged and not transfer.total:
+                    segment.end = segment.done - 1 # Sem Content-Length, o tamanho real só se sabe no fim
+                    transfer.total = segment.done
+                if segment.remaining > 0 and segment.position == position_before:
+                    raise requests.exceptions.ChunkedEncodingError("resposta vazia")
+            except requests.exceptions.RequestException as e:
+                failures += 1
+                if failures > SEGMENT_RETRIES:
+                    raise DownloadError(f"erro de rede na parte {segment.start}-{segment.end}: {e}") from e
+                log.debug(f"[Download direto] Parte {segment.start}-{segment.end} falhou ({e}); "
+                          f"tentando de novo a partir de {segment.position}.")
+                stop_event.wait(min(10, 2 ** failures)) # Acorda logo se outra parte falhar de vez
+
+    def _verify(self, part_path: Path, transfer: _Transfer, expected_digest: Optional[tuple], state_path: Path):
+        """Confere tamanho e hash. Se não bater, apaga o .part para a próxima tentativa recomeçar."""
+        size = part_path.stat().st_size
+        error = None
+        if transfer.downloaded != transfer.total or size != transfer.total:
+            error = f"recebidos {transfer.downloaded} bytes (arquivo com {size}), esperados {transfer.total}"
+        elif expected_digest is not None:
+            algorithm, expected = expected_digest
+            digest = hashlib.new(algorithm)
+            with open(part_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            if digest.digest() != expected:
+                error = f"hash {algorithm} do arquivo não confere"
+        if error:
+            for path in (part_path, state_path):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            raise DownloadError(error)
+
+
+_default_downloader: Optional[SegmentedDownloader] = None
+_default_downloader_lock = threading.Lock()
+
+
+def get_segmented_downloader() -> SegmentedDownloader:
+    """Downloader compartilhado pelo processo (um pool de conexões e um limite de banda só)."""
+    global _default_downloader
+    if _default_downloader is None:
+        with _default_downloader_lock:
+            if _default_downloader is None:
+                _default_downloader = SegmentedDownloader()
+    return _default_downloader
+
+
+def download_direct(video_url: str, output_path: str, filename: str, referer: Optional[str] = None,
+                    on_progress: Optional[ProgressCallback] = None,
+                    cancel_event: Optional[threading.Event] = None) -> Path:
+    """Atalho para get_segmented_downloader().download(...), com a mesma assinatura de download_episode."""
+    return get_segmented_downloader().download(video_url, output_path, filename, referer=referer,
+                                               on_progress=on_progress, cancel_event=cancel_event)
@@ -58,9 +58,10 @@ def set_appearance_mode(mode_string: str):
 
 def get_appearance_mode() -> str:
     """ get current state of the appearance mode (light or dark) """
-    if AppearanceModeTracker.appearance_mode == 0:
+    appearance_mode = AppearanceModeTracker.get_mode()
+    if appearance_mode == 0:
         return "Light"
-    elif AppearanceModeTracker.appearance_mode == 1:
+    elif appearance_mode == 1:
         return "Dark"
 
 
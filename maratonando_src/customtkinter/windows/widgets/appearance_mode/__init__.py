@@ -1,4 +1,5 @@
 from .appearance_mode_base_class import CTkAppearanceModeBaseClass
 from .appearance_mode_tracker import AppearanceModeTracker
 
-AppearanceModeTracker.init_appearance_mode()
+# The system appearance is detected lazily (first widget or get_mode() call), so importing
+# customtkinter and then calling set_appearance_mode("dark"/"light") never queries the OS.
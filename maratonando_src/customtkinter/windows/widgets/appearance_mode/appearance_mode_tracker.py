@@ -1,21 +1,32 @@
+import threading
 import tkinter
 from typing import Callable
 import darkdetect
 
 
 class AppearanceModeTracker:
+    """
+    Tracks the appearance mode (0: Light, 1: Dark) and notifies the registered widgets.
+
+    In "system" mode the OS theme is detected once and changes are then delivered by
+    darkdetect.listener() running in a background thread (gsettings monitor on Linux,
+    registry notification on Windows, NSDistributedNotificationCenter on macOS). The
+    listener pushes the new mode into the Tk event loop with after(); there is no
+    polling and nothing runs while the theme does not change.
+    """
 
     callback_list = []
     app_list = []
-    update_loop_running = False
-    update_loop_interval = 30  # milliseconds
 
     appearance_mode_set_by = "system"
     appearance_mode = 0  # Light (standard)
+    system_mode_detected = False
+    listener_started = False
 
     @classmethod
     def init_appearance_mode(cls):
-        if cls.appearance_mode_set_by == "system":
+        if cls.appearance_mode_set_by == "system" and not cls.system_mode_detected:
+            cls.system_mode_detected = True
             new_appearance_mode = cls.detect_appearance_mode()
 
             if new_appearance_mode != cls.appearance_mode:
@@ -31,9 +42,10 @@ class AppearanceModeTracker:
             if app not in cls.app_list:
                 cls.app_list.append(app)
 
-                if not cls.update_loop_running:
-                    app.after(cls.update_loop_interval, cls.update)
-                    cls.update_loop_running = True
+        if cls.appearance_mode_set_by == "system":
+            cls.init_appearance_mode()
+            if cls.app_list:
+                cls.start_system_listener()
 
     @classmethod
     def remove(cls, callback: Callable):
@@ -78,26 +90,51 @@ class AppearanceModeTracker:
                     continue
 
     @classmethod
-    def update(cls):
-        if cls.appearance_mode_set_by == "system":
-            new_appearance_mode = cls.detect_appearance_mode()
+    def start_system_listener(cls):
+        """ start the background thread that waits for OS theme changes (only once) """
+        if cls.listener_started:
+            return
+        cls.listener_started = True
+        threading.Thread(target=cls._listen_for_system_changes, name="ctk-appearance-listener", daemon=True).start()
 
-            if new_appearance_mode != cls.appearance_mode:
-                cls.appearance_mode = new_appearance_mode
-                cls.update_callbacks()
+    @classmethod
+    def _listen_for_system_changes(cls):
+        try:
+            darkdetect.listener(cls._on_system_theme_changed)
+        except Exception:
+            # platform without change notifications (or gsettings missing): keep the detected mode
+            pass
 
-        # find an existing tkinter.Tk object for the next call of .after()
+    @classmethod
+    def _on_system_theme_changed(cls, theme: str):
+        """ called in the listener thread, hands the new mode over to the Tk event loop """
+        new_appearance_mode = 1 if theme == "Dark" else 0
         for app in cls.app_list:
             try:
-                app.after(cls.update_loop_interval, cls.update)
+                app.after(0, cls._apply_system_appearance_mode, new_appearance_mode)
                 return
             except Exception:
                 continue
 
-        cls.update_loop_running = False
+    @classmethod
+    def _apply_system_appearance_mode(cls, new_appearance_mode: int):
+        if cls.appearance_mode_set_by == "system" and new_appearance_mode != cls.appearance_mode:
+            cls.appearance_mode = new_appearance_mode
+            cls.update_callbacks()
+
+    @classmethod
+    def update(cls):
+        """ re-detect the system appearance once (changes are normally pushed by the listener) """
+        if cls.appearance_mode_set_by == "system":
+            new_appearance_mode = cls.detect_appearance_mode()
+
+            if new_appearance_mode != cls.appearance_mode:
+                cls.appearance_mode = new_appearance_mode
+                cls.update_callbacks()
 
     @classmethod
     def get_mode(cls) -> int:
+        cls.init_appearance_mode()
         return cls.appearance_mode
 
     @classmethod
@@ -120,3 +157,7 @@ class AppearanceModeTracker:
 
         elif mode_string.lower() == "system":
             cls.appearance_mode_set_by = "system"
+            cls.system_mode_detected = False
+            cls.init_appearance_mode()
+            if cls.app_list:
+                cls.start_system_listener()
@@ -4,6 +4,7 @@
 #  Distributed under the terms of the 3-clause BSD License.
 #-----------------------------------------------------------------------------
 
+import atexit
 import subprocess
 
 def theme():
@@ -36,10 +37,24 @@ def isLight():
 
 # def listener(callback: typing.Callable[[str], None]) -> None:
 def listener(callback):
+    # Watch the whole schema: newer GNOME reports dark mode through 'color-scheme',
+    # older setups through the theme name ('gtk-theme'). gsettings only prints when a
+    # key changes, so nothing runs while the theme stays the same.
     with subprocess.Popen(
-        ('gsettings', 'monitor', 'org.gnome.desktop.interface', 'gtk-theme'),
+        ('gsettings', 'monitor', 'org.gnome.desktop.interface'),
         stdout=subprocess.PIPE,
         universal_newlines=True,
     ) as p:
-        for line in p.stdout:
-            callback('Dark' if '-dark' in line.strip().removeprefix("gtk-theme: '").removesuffix("'").lower() else 'Light')
+        atexit.register(p.terminate)
+        try:
+            last_theme = theme()
+            for line in p.stdout:
+                key = line.split(':', 1)[0].strip()
+                if key not in ('color-scheme', 'gtk-theme'):
+                    continue
+                new_theme = theme()
+                if new_theme != last_theme:
+                    last_theme = new_theme
+                    callback(new_theme)
+        finally:
+            atexit.unregister(p.terminate)
@@ -2,35 +2,69 @@
 # Importação original que causa o ModuleNotFoundError quando embutido
 from maratonando_src import customtkinter as ctk # Importação corrigida
 import tkinter.messagebox as messagebox
-import json
 import os
 import threading
 import time
 import math
 import re
 from pathlib import Path
-import hashlib
+import shutil
+import sqlite3
 import logging
+from typing import Optional
 from io import BytesIO
-import requests
 from PIL import Image, ImageTk, ImageFont, ImageDraw 
 
+from . import config
 from .core import parsers
-from .core.searcher import perform_search as perform_core_search
+from .core.searcher import iter_search as iter_core_search
 from .core.player import ExternalMediaPlayer
+from .core.prefetcher import VideoSourcePrefetcher
+from .core.history import HistoryStore
+from .core.history_db import HistoryDatabase
+from .core.download_queue import get_download_queue, STATUS_DONE, STATUS_PENDING, STATUS_RUNNING
+from .core.quality import QUALITY_CHOICES, QualitySelector, default_preference as default_quality_preference
+from .utils.http_client import get_client
+from .utils.image_loader import ImageLoader
+from .utils.thumbnail_cache import ThumbnailCache, make_thumbnail
+from .virtual_list import VirtualList
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
 # Mapeamento de nome da fonte para instâncias das classes de parser (Igual ao CLI).
-PARSER_MAP = {
-    'AnimeFire': parsers.AnimeFireParser(),
-}
+# Registro compartilhado: cada parser é importado/instanciado no primeiro uso.
+PARSER_MAP = parsers.registry
 
-HISTORY_FILE = "history.json"
+HISTORY_FILE = "history.json"   # Formato antigo; migrado para o banco na primeira execução
+HISTORY_DB_FILE = "history.db"
+
+# Prioridades do carregador de capas (menor = primeiro).
+IMAGE_PRIORITY_DETAILS = 0   # Capa do anime aberto
+IMAGE_PRIORITY_SEARCH = 10   # Capas da página de resultados visível (+ posição na página)
+
+# Altura (sem escala) de cada linha das listas virtualizadas.
+SEARCH_ROW_HEIGHT = 110   # Capa 60x90 + margens + separador
+EPISODE_ROW_HEIGHT = 32   # Botão (28) + espaço entre botões
+HISTORY_ROW_HEIGHT = 40   # Item (36) + espaço entre itens
+DOWNLOAD_ROW_HEIGHT = 40
+QUALITY_ASK = "perguntar" # Opção do menu de qualidade que mostra o diálogo de escolha
+SEARCH_COVER_SIZE = (60, 90)
+
+# Medição do tempo de abertura: MARATONANDO_MEDIR_INICIO=1 mostra no log quanto tempo levou
+# até a primeira pintura e até o fim da inicialização; com "sair", o app fecha em seguida
+# (útil para medir várias aberturas em sequência).
+STARTUP_PROFILE_ENV = "MARATONANDO_MEDIR_INICIO"
 
 class AnimeApp:
-    def __init__(self, root: ctk.CTk):
+    def __init__(self, root: ctk.CTk, started_at: Optional[float] = None):
         self.root = root
+        # A janela aparece só com a página de busca; ícones, logos, histórico e as outras
+        # páginas são carregados depois da primeira pintura (ver _run_startup_stages).
+        self.startup_started_at = started_at or time.perf_counter()
+        self.startup_marks = []
+        self._startup_pending = 2 # Etapas da interface + carga do histórico
+        self._first_paint_seen = False
+        self._deferred_icons = []
         project_base_dir = Path(__file__).resolve().parent.parent
 
         installed_icon_path = Path("/usr/share/maratonando/icons/maratonando.png")
@@ -58,23 +92,25 @@ class AnimeApp:
         self.root.maxsize(max_width, max_height)
         self.root.resizable(True, True)
 
-        # --- Carregar Ícones ---
-        self.search_icon_ctk = self._load_icon_ctk("search.png")
-        self.clear_icon_ctk = self._load_icon_ctk("broom.png")
-        self.history_icon_ctk = self._load_icon_ctk("history.png")
-        self.prev_icon_ctk = self._load_icon_ctk("left.png")
-        self.next_icon_ctk = self._load_icon_ctk("next.png")
-        self.about_icon_ctk = self._load_icon_ctk("information.png")
-        self.favorite_icon_ctk = self._load_icon_ctk("heart.png")
-        self.episodes_icon_ctk = self._load_icon_ctk("ep_icon.png", placeholder_text="EP")
-        self.refresh_icon_ctk = self._load_icon_ctk("sync.png", placeholder_text="↻")
+        # --- Ícones ---
+        # Imagens transparentes do tamanho final, preenchidas quando o carregamento terminar.
+        self.search_icon_ctk = self._deferred_icon_ctk("search.png")
+        self.clear_icon_ctk = self._deferred_icon_ctk("broom.png")
+        self.history_icon_ctk = self._deferred_icon_ctk("history.png")
+        self.prev_icon_ctk = self._deferred_icon_ctk("left.png")
+        self.next_icon_ctk = self._deferred_icon_ctk("next.png")
+        self.about_icon_ctk = self._deferred_icon_ctk("information.png")
+        self.favorite_icon_ctk = self._deferred_icon_ctk("heart.png")
+        self.episodes_icon_ctk = self._deferred_icon_ctk("ep_icon.png", placeholder_text="EP")
+        self.refresh_icon_ctk = self._deferred_icon_ctk("sync.png", placeholder_text="↻")
+        self.downloads_icon_ctk = self._deferred_icon_ctk(None, placeholder_text="↓")
     
 
         # --- Estrutura Principal da UI ---
         self.main_app_frame = ctk.CTkFrame(root, fg_color="transparent")
         self.main_app_frame.pack(fill="both", expand=True, padx=5, pady=5)
 
-        self.header_logo_ctk = self._load_icon_ctk("logo1.png",size=(700,150), maintain_aspect=True)
+        self.header_logo_ctk = self._deferred_icon_ctk("logo1.png",size=(700,150), maintain_aspect=True)
         if self.header_logo_ctk:
             self.header_logo_label = ctk.CTkLabel(self.main_app_frame, image=self.header_logo_ctk, text="")
             self.header_logo_label.pack(pady=(0,10))
@@ -82,16 +118,19 @@ class AnimeApp:
         self.navigation_frame = ctk.CTkFrame(self.main_app_frame, fg_color="transparent")
         self.navigation_frame.pack(pady=5)
 
-        self.nav_search_button = ctk.CTkButton(self.navigation_frame, text="BUSCAR", image=self.search_icon_ctk, compound="left", command=lambda: self.show_page("search"))
+        self.nav_search_button = ctk.CTkButton(self.navigation_frame, text="BUSCAR", image=self.search_icon_ctk, compound="left", width=120, command=lambda: self.show_page("search"))
         self.nav_search_button.pack(side="left", padx=5)
 
-        self.nav_episodes_button = ctk.CTkButton(self.navigation_frame, text="EPISÓDIOS", image=self.episodes_icon_ctk, compound="left", command=lambda: self.show_page("episodes"), state="disabled")
+        self.nav_episodes_button = ctk.CTkButton(self.navigation_frame, text="EPISÓDIOS", image=self.episodes_icon_ctk, compound="left", width=120, command=lambda: self.show_page("episodes"), state="disabled")
         self.nav_episodes_button.pack(side="left", padx=5)
 
-        self.nav_history_button = ctk.CTkButton(self.navigation_frame, text="HISTÓRICO", image=self.history_icon_ctk, compound="left", command=lambda: self.show_page("history"))
+        self.nav_history_button = ctk.CTkButton(self.navigation_frame, text="HISTÓRICO", image=self.history_icon_ctk, compound="left", width=120, command=lambda: self.show_page("history"))
         self.nav_history_button.pack(side="left", padx=5)
 
-        self.nav_about_button = ctk.CTkButton(self.navigation_frame, text="SOBRE", image=self.about_icon_ctk, compound="left", command=lambda: self.show_page("about"))
+        self.nav_downloads_button = ctk.CTkButton(self.navigation_frame, text="DOWNLOADS", image=self.downloads_icon_ctk, compound="left", width=120, command=lambda: self.show_page("downloads"))
+        self.nav_downloads_button.pack(side="left", padx=5)
+
+        self.nav_about_button = ctk.CTkButton(self.navigation_frame, text="SOBRE", image=self.about_icon_ctk, compound="left", width=120, command=lambda: self.show_page("about"))
         self.nav_about_button.pack(side="left", padx=5)
 
         self.search_bar_frame = ctk.CTkFrame(self.main_app_frame, fg_color="transparent")
@@ -117,51 +156,135 @@ class AnimeApp:
         self.content_area_frame.grid_columnconfigure(0, weight=1)
 
         self.pages = {}
-
-        self._create_search_page()
-        self._create_episodes_page()
-        self._create_history_page()
-        self._create_about_page()
+        # As outras páginas são criadas depois da primeira pintura, ou antes se forem abertas.
+        self._page_builders = {
+            "search": self._create_search_page,
+            "episodes": self._create_episodes_page,
+            "history": self._create_history_page,
+            "downloads": self._create_downloads_page,
+            "about": self._create_about_page,
+        }
+        self._ensure_page("search")
 
         self.status_label = ctk.CTkLabel(self.main_app_frame, text="Pronto.", anchor="w")
         self.status_label.pack(side="bottom", fill="x", pady=(5,0), padx=5)
 
         self.search_results_data = [] 
-        self.history_data = []
+        self.history = HistoryStore(max_entries=config.HISTORY_MAX_ENTRIES)
+        self.history_db = None
+        self.history_db_lock = threading.Lock() # A carga inicial (em thread) e o "Atualizar" podem criar o banco
+        self.history_loaded = False
+        self.pending_history = {} # episode_url -> item assistido antes da carga inicial terminar
+        self.history_view_stale = False # A lista do histórico é reconstruída só quando a página for aberta
+        self.current_page = None
+        self.selected_history_url = None
+        self.download_queue = None # Criada depois da primeira pintura (ver _start_download_queue)
+        self.quality_mode = default_quality_preference() # Ou QUALITY_ASK para perguntar a cada episódio
         self.selected_anime_title = ""
         # Atributos para paginação da busca
         self.search_results_per_page = 4
         self.current_search_page = 1
         self.total_search_results_data = [] 
+        self.search_generation = 0 # Incrementado a cada nova busca; descarta resultados de buscas antigas
         self.selected_anime_url_for_history = None
         self.current_selected_episode = None
         self.episode_details_data = {}
         self.is_updating_episodes = False
-        self.episodes_per_page = 8 
-        self.current_episode_page = 1
         self.last_selected_episode_listbox_index = -1
         self.target_episode_url_from_history = None
 
         self.player = ExternalMediaPlayer()
-        self.load_history()
+        self.video_prefetcher = VideoSourcePrefetcher(referer="https://animefire.io/")
 
         self.show_page("search")
-        self._start_logo_cycling_thread()
 
-        # Configuração do Cache de Imagens
-        home = Path.home()
-        cache_dir_parent = os.environ.get('XDG_CACHE_HOME') or str(home / ".cache")
-        self.image_cache_dir = Path(cache_dir_parent) / "maratonando" / "images"
-        self.image_cache_dir.mkdir(parents=True, exist_ok=True)
+        # Cache de miniaturas das capas (uma variante por tamanho exibido)
+        self.thumbnail_cache = ThumbnailCache(config.get_cache_dir("thumbnails"), config.THUMBNAIL_CACHE_MAX_BYTES)
+        threading.Thread(target=self._remove_legacy_image_cache, daemon=True).start()
+        self.image_loader = ImageLoader(self._fetch_cover_image, max_workers=config.IMAGE_LOADER_WORKERS)
+
+        self.root.bind("<Expose>", self._on_first_expose, add="+")
+        self.root.after(1000, self._on_first_expose) # Caso o Expose não chegue (ex: janela minimizada)
+        self._mark_startup("janela construída")
+
+    # --- Inicialização em etapas ---
+
+    def _mark_startup(self, label):
+        self.startup_marks.append((label, (time.perf_counter() - self.startup_started_at) * 1000))
+
+    def _on_first_expose(self, event=None):
+        if self._first_paint_seen:
+            return
+        self._first_paint_seen = True
+        # O redesenho dos widgets também acontece no idle, então a marca fica depois dele.
+        self.root.after_idle(self._run_startup_stages)
+
+    def _run_startup_stages(self):
+        """Executa o que ficou para depois da primeira pintura, uma etapa por volta do loop do Tk."""
+        self._mark_startup("primeira pintura")
+        # As threads só começam com o loop do Tk rodando, pois devolvem o resultado via root.after.
+        deferred_icons, self._deferred_icons = self._deferred_icons, None # Ícones criados depois disso são carregados um a um
+        threading.Thread(target=self._load_deferred_icons, args=(deferred_icons,), daemon=True).start()
+        threading.Thread(target=self._load_history_in_background, daemon=True).start()
+        stages = [self._start_logo_cycling_thread,
+                  lambda: self._ensure_page("episodes"),
+                  lambda: self._ensure_page("history"),
+                  lambda: self._ensure_page("downloads"),
+                  self._start_download_queue,
+                  lambda: self._ensure_page("about")]
+
+        def run_next_stage():
+            if not stages:
+                self._startup_task_done("páginas criadas")
+                return
+            stages.pop(0)()
+            self.root.after_idle(run_next_stage)
+        self.root.after_idle(run_next_stage)
+
+    def _startup_task_done(self, label):
+        self._mark_startup(label)
+        self._startup_pending -= 1
+        if self._startup_pending > 0:
+            return
+        report = ", ".join(f"{name}: {elapsed:.0f} ms" for name, elapsed in self.startup_marks)
+        profile_mode = os.environ.get(STARTUP_PROFILE_ENV, "").strip().lower()
+        if profile_mode:
+            logging.info(f"[Inicialização] {report}")
+            if profile_mode == "sair":
+                self.root.after(0, self.root.destroy)
+        else:
+            logging.debug(f"[Inicialização] {report}")
+
+    def _ensure_page(self, page_name):
+        if page_name not in self.pages:
+            self._page_builders[page_name]()
+
+    def _deferred_icon_ctk(self, filename, size=(24,24), placeholder_text="?", maintain_aspect=False):
+        """Como _load_icon_ctk, mas devolve na hora uma imagem transparente e carrega a real em segundo plano."""
+        icon = ctk.CTkImage(light_image=Image.new('RGBA', size, (0, 0, 0, 0)), size=size)
+        entry = (icon, (filename, size, placeholder_text, maintain_aspect))
+        if self._deferred_icons is None:
+            threading.Thread(target=self._load_deferred_icons, args=([entry],), daemon=True).start()
+        else:
+            self._deferred_icons.append(entry)
+        return icon
+
+    def _load_deferred_icons(self, entries):
+        loaded = [(icon, self._load_icon_pil(*args)) for icon, args in entries]
+        self.root.after(0, self._apply_deferred_icons, loaded)
 
-    def _get_cache_filepath(self, url: str) -> Path:
-        """Gera um nome de arquivo para o cache a partir de uma URL."""
-        if not url:
-            return None
-        # Usa o hash MD5 da URL para criar um nome de arquivo único e seguro
-        # Adiciona uma extensão comum, .webp é bom para imagens da web, mas .png é mais seguro para Pillow
-        filename = hashlib.md5(url.encode('utf-8')).hexdigest() + ".png"
-        return self.image_cache_dir / filename
+    def _apply_deferred_icons(self, loaded):
+        # CTkImage.configure avisa os widgets que usam a imagem, que se redesenham sozinhos.
+        for icon, pil_image in loaded:
+            if pil_image is not None:
+                icon.configure(light_image=pil_image, dark_image=pil_image)
+
+    def _remove_legacy_image_cache(self):
+        """Apaga o cache antigo de capas em tamanho original (<md5>.png), substituído pelas miniaturas."""
+        legacy_dir = config.get_cache_dir() / "images"
+        if legacy_dir.is_dir():
+            logging.info(f"Removendo cache antigo de imagens: {legacy_dir}")
+            shutil.rmtree(legacy_dir, ignore_errors=True)
 
 
     def _create_search_page(self):
@@ -174,6 +297,9 @@ class AnimeApp:
         self.search_results_scroll_frame.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
         if hasattr(self.search_results_scroll_frame, "_scrollbar") and self.search_results_scroll_frame._scrollbar is not None:
             self.search_results_scroll_frame._scrollbar.grid_forget()
+        # As linhas (capa + título) são criadas uma vez e reaproveitadas a cada página.
+        self.search_list = VirtualList(self.search_results_scroll_frame, SEARCH_ROW_HEIGHT,
+                                       self._create_search_result_row, self._bind_search_result_row)
 
         # Frame de Paginação da Busca
         self.search_pagination_frame = ctk.CTkFrame(page, fg_color="transparent")
@@ -214,17 +340,28 @@ class AnimeApp:
         self.anime_description_label_ep_tab = ctk.CTkLabel(self.cover_title_area_frame, text="", anchor="w", justify="left", wraplength=450)
         self.anime_description_label_ep_tab.grid(row=1, column=1, sticky='new')
 
+        actions_frame = ctk.CTkFrame(self.cover_title_area_frame, fg_color="transparent")
+        actions_frame.grid(row=2, column=1, sticky='sw', pady=(5,0))
+        self.download_season_button = ctk.CTkButton(actions_frame, text="Baixar temporada", image=self.downloads_icon_ctk, compound="left", command=self.download_current_season, state="disabled")
+        self.download_season_button.pack(side="left")
+        ctk.CTkLabel(actions_frame, text="Qualidade:").pack(side="left", padx=(15,5))
+        self.quality_menu = ctk.CTkOptionMenu(actions_frame, values=list(QUALITY_CHOICES) + [QUALITY_ASK], width=110, command=self._on_quality_mode_changed)
+        self.quality_menu.set(self.quality_mode)
+        self.quality_menu.pack(side="left")
+
         self.episodes_scroll_frame = ctk.CTkScrollableFrame(page, label_text="Episódios")
         self.episodes_scroll_frame.grid(row=1, column=0, sticky="nsew", padx=5, pady=0)
-        if hasattr(self.episodes_scroll_frame, "_scrollbar") and self.episodes_scroll_frame._scrollbar is not None:
-            self.episodes_scroll_frame._scrollbar.grid_forget()
+        # Todos os episódios ficam numa única lista rolável; só as linhas visíveis têm widgets.
+        self.episode_list = VirtualList(self.episodes_scroll_frame, EPISODE_ROW_HEIGHT,
+                                        self._create_episode_row, self._bind_episode_row,
+                                        on_view_change=self._update_episode_nav)
 
         self.episode_pagination_frame = ctk.CTkFrame(page)
         self.episode_pagination_frame.grid(row=2, column=0, sticky='ew', pady=(5,0), padx=5)
 
         self.prev_episode_button = ctk.CTkButton(self.episode_pagination_frame, text="< Anterior", command=self.go_to_previous_page, state="disabled", image=self.prev_icon_ctk, compound="left")
         self.next_episode_button = ctk.CTkButton(self.episode_pagination_frame, text="Próximo >", command=self.go_to_next_page, state="disabled", image=self.next_icon_ctk, compound="right")
-        self.episode_page_label = ctk.CTkLabel(self.episode_pagination_frame, text="Página -/-")
+        self.episode_page_label = ctk.CTkLabel(self.episode_pagination_frame, text="Episódios -")
 
         self.episode_pagination_frame.grid_columnconfigure(0, weight=1)
         self.episode_pagination_frame.grid_columnconfigure(1, weight=1)
@@ -255,11 +392,35 @@ class AnimeApp:
         
         self.history_scroll_frame = ctk.CTkScrollableFrame(page, label_text="Seu Histórico", fg_color="transparent")
         self.history_scroll_frame.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
-        if hasattr(self.history_scroll_frame, "_scrollbar") and self.history_scroll_frame._scrollbar is not None:
-            self.history_scroll_frame._scrollbar.grid_forget()
-        self.selected_history_item_widget = None 
+        # O histórico pode ter dezenas de milhares de itens: só as linhas visíveis têm widgets.
+        self.history_list = VirtualList(self.history_scroll_frame, HISTORY_ROW_HEIGHT,
+                                        self._create_history_row, self._bind_history_row)
 
         self.pages["history"] = page
+        if getattr(self, 'ui_state', "normal") == "disabled": # Página criada durante uma busca
+            self.refresh_history_button.configure(state="disabled")
+            self.clear_history_button.configure(state="disabled")
+
+    def _create_downloads_page(self):
+        page = ctk.CTkFrame(self.content_area_frame, fg_color="transparent")
+        page.grid_rowconfigure(1, weight=1)
+        page.grid_columnconfigure(0, weight=1)
+
+        button_frame = ctk.CTkFrame(page, fg_color="transparent")
+        button_frame.grid(row=0, column=0, sticky="ew", pady=5, padx=5)
+        ctk.CTkButton(button_frame, text="Tentar falhas de novo", command=self.retry_failed_downloads, image=self.refresh_icon_ctk, compound="left").pack(side="left", padx=5)
+        ctk.CTkButton(button_frame, text="Cancelar pendentes", command=self.cancel_pending_downloads).pack(side="left", padx=5)
+        ctk.CTkButton(button_frame, text="Limpar concluídos", command=self.clear_finished_downloads, image=self.clear_icon_ctk, compound="left").pack(side="left", padx=5)
+
+        self.downloads_scroll_frame = ctk.CTkScrollableFrame(page, label_text="Downloads", fg_color="transparent")
+        self.downloads_scroll_frame.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        self.downloads_list = VirtualList(self.downloads_scroll_frame, DOWNLOAD_ROW_HEIGHT,
+                                          self._create_download_row, self._bind_download_row)
+        self.downloads_summary_label = ctk.CTkLabel(page, text="Nenhum download na fila.", anchor="w")
+        self.downloads_summary_label.grid(row=2, column=0, sticky="ew", padx=10)
+
+        self.pages["downloads"] = page
+        self._update_downloads_display()
 
     def _create_about_page(self):
         page = ctk.CTkFrame(self.content_area_frame, fg_color="transparent")
@@ -269,6 +430,10 @@ class AnimeApp:
         self.pages["about"] = page
 
     def show_page(self, page_name):
+        self._ensure_page(page_name)
+        self.current_page = page_name
+        if page_name == "history" and self.history_view_stale:
+            self._update_history_display()
         for name, frame in self.pages.items():
             if name == page_name:
                 frame.grid(row=0, column=0, sticky="nsew", padx=0, pady=0)
@@ -282,6 +447,13 @@ class AnimeApp:
 
 
     def _load_icon_ctk(self, filename, size=(24,24), placeholder_text="?", maintain_aspect=False):
+        pil_image = self._load_icon_pil(filename, size, placeholder_text, maintain_aspect)
+        if pil_image:
+            return ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=size)
+        return None
+
+    def _load_icon_pil(self, filename, size=(24,24), placeholder_text="?", maintain_aspect=False):
+        """Lê e redimensiona um ícone (ou desenha um substituto com texto). Não usa o Tk; pode rodar em outra thread."""
         pil_image = None
         try:
             if filename:
@@ -332,12 +504,10 @@ class AnimeApp:
                           placeholder_text, font=font, fill="grey")
                 pil_image = placeholder_img
 
-            if pil_image:
-                return ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=size)
-
         except Exception as e:
             logging.error(f"Erro ao carregar ícone CTk {filename or placeholder_text}: {e}")
-        return None
+            pil_image = None
+        return pil_image
 
 
     def _set_icon(self, icon_path: Path):
@@ -363,7 +533,7 @@ class AnimeApp:
         if hasattr(about_content_frame, "_scrollbar") and about_content_frame._scrollbar is not None:
             about_content_frame._scrollbar.grid_forget()
 
-        about_page_logo_ctk = self._load_icon_ctk("logo1.png", size=(400, 100), maintain_aspect=True)
+        about_page_logo_ctk = self._deferred_icon_ctk("logo1.png", size=(400, 100), maintain_aspect=True)
         if about_page_logo_ctk:
             ctk.CTkLabel(about_content_frame, image=about_page_logo_ctk, text="").pack(pady=(0, 20))
         
@@ -382,16 +552,18 @@ class AnimeApp:
 
     def clear_history(self):
         if messagebox.askyesno("Limpar Histórico", "Tem certeza que deseja apagar TODO o histórico?\nEsta ação não pode ser desfeita.", parent=self.root):
-            self.history_data = []
+            self.history.clear()
+            if self.history_db:
+                self.history_db.clear()
             self._update_history_display()
-            self.save_history()
             self.update_status("Histórico limpo.")
         else:
             self.update_status("Limpeza do histórico cancelada.")
 
     def clear_search_results(self):
         self.search_entry.delete(0, "end")
-        self._clear_scrollable_frame(self.search_results_scroll_frame)
+        self.image_loader.cancel_group("search")
+        self.search_list.set_items([])
         self.search_results_data = [] 
         self.total_search_results_data = [] 
         self.current_search_page = 1
@@ -400,8 +572,9 @@ class AnimeApp:
             self.prev_search_button.configure(state="disabled")
             self.next_search_button.configure(state="disabled")
         
-        self._clear_scrollable_frame(self.episodes_scroll_frame)
         self.episode_details_data = {}
+        self._ensure_page("episodes")
+        self.episode_list.set_items([])
         self.anime_title_label_ep_tab.configure(text="Nenhum anime selecionado")
         self.anime_description_label_ep_tab.configure(text="")
         if self.placeholder_image_ctk:
@@ -419,6 +592,7 @@ class AnimeApp:
         self.root.after(0, lambda: self.status_label.configure(text=message))
 
     def set_ui_state(self, state): 
+        self.ui_state = state
         self.search_entry.configure(state=state)
         self.search_button_action.configure(state=state)
         self.clear_button_action.configure(state=state)
@@ -428,7 +602,7 @@ class AnimeApp:
         if hasattr(self, 'clear_history_button'): self.clear_history_button.configure(state=history_button_state)
         
         fav_button_state = "disabled"
-        if state == "normal" and self.selected_history_item_widget:
+        if state == "normal" and self.selected_history_url:
             fav_button_state = "normal"
         if hasattr(self, 'toggle_favorite_button'): self.toggle_favorite_button.configure(state=fav_button_state)
 
@@ -443,117 +617,265 @@ class AnimeApp:
                 if hasattr(self, 'prev_search_button'): self.prev_search_button.configure(state="normal" if self.current_search_page > 1 else "disabled")
                 if hasattr(self, 'next_search_button'): self.next_search_button.configure(state="normal" if self.current_search_page < total_search_pages else "disabled")
             
-            if hasattr(self, 'episode_details_data') and self.episode_details_data.get('episodes'):
-                total_ep_pages = math.ceil(len(self.episode_details_data['episodes']) / self.episodes_per_page)
-                if hasattr(self, 'prev_episode_button'): self.prev_episode_button.configure(state="normal" if self.current_episode_page > 1 else "disabled")
-                if hasattr(self, 'next_episode_button'): self.next_episode_button.configure(state="normal" if self.current_episode_page < total_ep_pages else "disabled")
+            if hasattr(self, 'episode_list'):
+                self._update_episode_nav()
 
 
     def load_history(self):
-        home = Path.home()
-        config_home = os.environ.get('XDG_CONFIG_HOME') or str(home / ".config")
-        config_dir = Path(config_home) / "maratonando"
-        config_dir.mkdir(parents=True, exist_ok=True)
-        self.history_file_path = config_dir / HISTORY_FILE
+        self._apply_loaded_history(self._read_history())
+
+    def _load_history_in_background(self):
+        """Carga inicial do histórico, feita fora da thread principal durante a abertura."""
+        items = self._read_history()
+        self.root.after(0, self._apply_loaded_history, items, True)
+
+    def _read_history(self):
+        """Lê o histórico do banco SQLite (importando o antigo history.json na primeira vez). Não usa o Tk."""
         try:
-            if self.history_file_path.exists():
-                with open(self.history_file_path, 'r', encoding='utf-8') as f:
-                    self.history_data = json.load(f)
-            else:
-                self.history_data = []
-        except (json.JSONDecodeError, IOError) as e:
-            logging.error(f"[History Error] Erro ao carregar histórico de '{self.history_file_path}': {e}")
-            self.history_data = []
+            with self.history_db_lock:
+                if self.history_db is None:
+                    config_dir = config.get_config_dir()
+                    history_db = HistoryDatabase(config_dir / HISTORY_DB_FILE, write_delay=config.HISTORY_WRITE_DELAY)
+                    history_db.migrate_from_json(config_dir / HISTORY_FILE)
+                    self.history_db = history_db
+                else:
+                    self.history_db.flush() # Garante que as escritas pendentes apareçam na leitura
+            return self.history_db.load_recent(config.HISTORY_MAX_ENTRIES)
+        except sqlite3.Error as e:
+            logging.error(f"[History Error] Erro ao carregar histórico do banco: {e}")
+            return []
+
+    def _apply_loaded_history(self, items, during_startup=False):
+        self.history.load(items)
+        if not self.history_loaded:
+            self.history_loaded = True
+            self._merge_pending_history()
         self._update_history_display()
-
+        if "episodes" in self.pages:
+            self.episode_list.refresh(rebind=True) # Marcas de "assistido" dos episódios já listados
+        if during_startup:
+            self._startup_task_done("histórico carregado")
+
+
+    def _merge_pending_history(self):
+        """Junta ao histórico carregado (e grava) os episódios assistidos enquanto ele carregava."""
+        pending, self.pending_history = self.pending_history, {}
+        for entry in pending.values():
+            entry = self.history.add(entry) # Favorito e posição antigos vêm do banco, se o episódio já estava lá
+            if self.history_db:
+                self.history_db.record(entry)
+        if pending and self.history_db and len(self.history) >= config.HISTORY_MAX_ENTRIES:
+            self.history_db.trim(config.HISTORY_MAX_ENTRIES)
 
     def _update_history_display(self):
-        self._clear_scrollable_frame(self.history_scroll_frame)
-        self.selected_history_item_widget = None
-        if hasattr(self, 'toggle_favorite_button'): self.toggle_favorite_button.configure(state="disabled")
-
-        for item_data in reversed(self.history_data):
-            prefix = "★ " if item_data.get("favorite") else ""
-            display_text = f"{prefix}{item_data.get('anime_title', '?')} - {item_data.get('episode_title', '?')}"
-            
-            item_frame = ctk.CTkFrame(self.history_scroll_frame, corner_radius=5)
-            item_frame.pack(fill="x", pady=2, padx=2)
+        # A lista é reconstruída só com a página do histórico aberta; senão, fica para quando ela abrir.
+        if self.current_page != "history" or "history" not in self.pages:
+            self.history_view_stale = True
+            return
+        self.history_view_stale = False
+        if self.selected_history_url not in self.history:
+            self.selected_history_url = None
+            if hasattr(self, 'toggle_favorite_button'): self.toggle_favorite_button.configure(state="disabled")
+        self.history_list.set_items(self.history.recent())
+
+    def _create_history_row(self, master):
+        """Cria uma linha da lista do histórico. O conteúdo é definido em _bind_history_row."""
+        item_frame = ctk.CTkFrame(master, corner_radius=5, height=HISTORY_ROW_HEIGHT - 4)
+        item_frame.pack_propagate(False)
+
+        label = ctk.CTkLabel(item_frame, text="", anchor="w")
+        label.pack(side="left", fill="x", expand=True, padx=5, pady=5)
+        item_frame.history_item_data = None
+        item_frame.label = label
+
+        def on_click(event=None):
+            if item_frame.history_item_data is None:
+                return
+            previous_url = self.selected_history_url
+            self.selected_history_url = item_frame.history_item_data.get('episode_url')
+            # Só as linhas da seleção antiga e da nova mudam de destaque.
+            changed_urls = (previous_url, self.selected_history_url)
+            self.history_list.rebind_visible(lambda item: item.get('episode_url') in changed_urls)
+            if hasattr(self, 'toggle_favorite_button'): self.toggle_favorite_button.configure(state="normal")
+
+        def on_double_click(event=None):
+            if item_frame.history_item_data is not None:
+                self.on_history_select_custom(item_frame.history_item_data)
+
+        for widget in (item_frame, label):
+            widget.bind("<Button-1>", on_click)
+            widget.bind("<Double-Button-1>", on_double_click)
+        return item_frame
+
+    def _bind_history_row(self, item_frame, index, item_data):
+        """Mostra um item do histórico numa linha já existente."""
+        item_frame.history_item_data = item_data
+        prefix = "★ " if item_data.get("favorite") else ""
+        item_frame.label.configure(text=f"{prefix}{item_data.get('anime_title', '?')} - {item_data.get('episode_title', '?')}")
+        if item_data.get('episode_url') == self.selected_history_url:
+            item_frame.configure(fg_color=ctk.ThemeManager.theme["CTkButton"]["hover_color"])
+        else:
+            item_frame.configure(fg_color=ctk.ThemeManager.theme["CTkFrame"]["fg_color"])
 
-            label = ctk.CTkLabel(item_frame, text=display_text, anchor="w")
-            label.pack(side="left", fill="x", expand=True, padx=5, pady=5)
-            
-            item_frame.history_item_data = item_data 
-            label.history_item_data = item_data
-
-            def on_click_factory(widget, data):
-                def on_click(event=None):
-                    if self.selected_history_item_widget and self.selected_history_item_widget.winfo_exists():
-                        self.selected_history_item_widget.configure(fg_color=ctk.ThemeManager.theme["CTkFrame"]["fg_color"])
-                    
-                    widget.configure(fg_color=ctk.ThemeManager.theme["CTkButton"]["hover_color"]) 
-                    self.selected_history_item_widget = widget
-                    if hasattr(self, 'toggle_favorite_button'): self.toggle_favorite_button.configure(state="normal")
-                return on_click
-
-            def on_double_click_factory(data):
-                 return lambda event=None: self.on_history_select_custom(data)
-
-            item_frame.bind("<Button-1>", on_click_factory(item_frame, item_data))
-            label.bind("<Button-1>", on_click_factory(item_frame, item_data)) 
-            item_frame.bind("<Double-Button-1>", on_double_click_factory(item_data))
-            label.bind("<Double-Button-1>", on_double_click_factory(item_data))
-
-
-    def save_history(self):
-        if not hasattr(self, 'history_file_path'):
-             logging.warning("[History Error] Caminho do arquivo de histórico não definido.")
-             home = Path.home()
-             config_home = os.environ.get('XDG_CONFIG_HOME') or str(home / ".config")
-             config_dir = Path(config_home) / "maratonando"
-             config_dir.mkdir(parents=True, exist_ok=True)
-             self.history_file_path = config_dir / HISTORY_FILE
-        try:
-            with open(self.history_file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.history_data, f, ensure_ascii=False, indent=4)
-        except IOError as e:
-            logging.error(f"[History Error] Erro ao salvar histórico em '{self.history_file_path}': {e}")
 
     def add_to_history(self, anime_title, episode_title, episode_url, anime_url, anime_image_url):
         if not all([anime_title, episode_title, episode_url, anime_url]):
              logging.warning(f"Dados incompletos para histórico: AT='{anime_title}', ET='{episode_title}', EU='{episode_url}', AU='{anime_url}'")
              return
-        existing_item = next((item for item in self.history_data if item.get('episode_url') == episode_url), None)
-        is_favorite = existing_item['favorite'] if existing_item and 'favorite' in existing_item else False
-        if existing_item: logging.debug(f"Item {episode_title} já existe. Favorito: {is_favorite}")
         timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
         new_entry = {"anime_title": anime_title, "episode_title": episode_title, "episode_url": episode_url,
                      "anime_url": anime_url, "anime_image_url": anime_image_url, "timestamp": timestamp,
-                     "parser": self.current_source or "AnimeFire", "favorite": is_favorite }
-        self.history_data = [item for item in self.history_data if item.get('episode_url') != episode_url]
-        self.history_data.append(new_entry)
-        max_history = 100
-        if len(self.history_data) > max_history: self.history_data = self.history_data[-max_history:]
-        self.save_history()
-        self._update_history_display() 
+                     "parser": self.current_source or "AnimeFire", "watched_at": time.time()}
+        if not self.history_loaded: # Gravado (e mesclado ao histórico) quando a carga inicial terminar
+            self.pending_history[episode_url] = dict(new_entry)
+        # O item anterior do mesmo episódio (se houver) é substituído, mantendo favorito e posição.
+        new_entry = self.history.add(new_entry)
+        logging.debug(f"Histórico: {episode_title} registrado. Favorito: {new_entry.get('favorite')}")
+        if self.history_db:
+            self.history_db.record(new_entry)
+            if len(self.history) >= config.HISTORY_MAX_ENTRIES:
+                self.history_db.trim(config.HISTORY_MAX_ENTRIES)
+        self._update_history_display() # O episódio vai para o topo da lista
+
+
+    # --- Downloads ---
+
+    def _start_download_queue(self):
+        """Abre a fila de downloads salva e retoma o que ficou pendente (lendo o arquivo fora da thread principal)."""
+        def open_queue():
+            queue = get_download_queue()
+            queue.add_listener(lambda job: self.root.after(0, self._on_download_job_changed, job))
+            # Já limitado pela fila a um aviso a cada DOWNLOAD_PROGRESS_INTERVAL por download.
+            queue.add_progress_listener(lambda job, progress: self.root.after(0, self._on_download_progress, job))
+            if self.quality_mode != QUALITY_ASK:
+                queue.quality_preference = self.quality_mode
+            resume = queue.has_active_jobs()
+            if resume:
+                queue.start()
+            self.root.after(0, self._on_download_queue_ready, queue, resume)
+        threading.Thread(target=open_queue, daemon=True).start()
+
+    def _on_quality_mode_changed(self, mode):
+        self.quality_mode = mode
+        if self.download_queue:
+            self.download_queue.quality_preference = None if mode == QUALITY_ASK else mode
+        self.update_status("A qualidade será perguntada a cada episódio." if mode == QUALITY_ASK else f"Qualidade: {mode}.")
+
+    def _on_download_queue_ready(self, queue, resumed):
+        self.download_queue = queue
+        self._update_downloads_display()
+        if resumed:
+            self.update_status("Downloads pendentes retomados.")
+
+    def download_current_season(self):
+        episodes = self.episode_details_data.get('episodes') or []
+        if not episodes:
+            return
+        if self.download_queue is None:
+            self.update_status("A fila de downloads ainda está sendo carregada. Tente de novo em instantes.")
+            return
+        if not messagebox.askyesno("Baixar temporada", f"Baixar os {len(episodes)} episódios de '{self.selected_anime_title}'?", parent=self.root):
+            return
+        self.download_queue.add_season(self.selected_anime_title, episodes, parser=self.current_source or "AnimeFire")
+        self.download_queue.start()
+        self._update_downloads_display()
+        self.update_status(f"{len(episodes)} episódios na fila de downloads.")
+
+    def retry_failed_downloads(self):
+        if self.download_queue:
+            self.download_queue.retry_failed()
+            self.download_queue.start()
+
+    def cancel_pending_downloads(self):
+        if self.download_queue:
+            self.download_queue.cancel_pending()
+
+    def clear_finished_downloads(self):
+        if self.download_queue:
+            self.download_queue.remove_finished()
+            self._update_downloads_display()
+
+    def _on_download_job_changed(self, job):
+        if "downloads" not in self.pages:
+            return
+        if job in self.downloads_list.items:
+            self.downloads_list.rebind_visible(lambda item: item is job) # Só a linha que mudou
+            self._update_downloads_summary()
+        else:
+            self._update_downloads_display()
+
+    def _on_download_progress(self, job):
+        if self.current_page == "downloads" and job.status == STATUS_RUNNING:
+            self.downloads_list.rebind_visible(lambda item: item is job)
 
+    def cancel_download(self, job):
+        if self.download_queue:
+            self.download_queue.cancel(job.id)
+
+    def _update_downloads_display(self):
+        if "downloads" not in self.pages:
+            return
+        jobs = self.download_queue.jobs() if self.download_queue else []
+        scroll_to = self.downloads_list.first_visible_index() if self.downloads_list.items else 0
+        self.downloads_list.set_items(jobs, message="Nenhum download na fila.", scroll_to=scroll_to)
+        self._update_downloads_summary()
+
+    def _update_downloads_summary(self):
+        counts = {}
+        for job in self.downloads_list.items:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        summary = ", ".join(f"{count} {status}" for status, count in counts.items())
+        self.downloads_summary_label.configure(text=summary or "Nenhum download na fila.")
+
+    def _create_download_row(self, master):
+        """Cria uma linha da lista de downloads. O conteúdo é definido em _bind_download_row."""
+        row = ctk.CTkFrame(master, corner_radius=5, height=DOWNLOAD_ROW_HEIGHT - 4)
+        row.pack_propagate(False)
+        row.job = None
+        row.cancel_button = ctk.CTkButton(row, text="✕", width=28, fg_color="transparent", border_width=1,
+                                          command=lambda: row.job and self.cancel_download(row.job))
+        row.cancel_button.pack(side="right", padx=5)
+        row.progress_bar = ctk.CTkProgressBar(row, width=150)
+        row.label = ctk.CTkLabel(row, text="", anchor="w")
+        row.label.pack(side="left", fill="x", expand=True, padx=5, pady=5)
+        return row
+
+    def _bind_download_row(self, row, index, job):
+        row.job = job
+        text = f"{job.filename} — {job.status}"
+        if job.attempts > 1:
+            text += f" (tentativa {job.attempts})"
+        progress = job.progress if job.status == STATUS_RUNNING else None
+        if progress is not None:
+            text += f" · {progress.summary()}"
+        elif job.error and job.status != STATUS_DONE:
+            text += f": {job.error}"
+        row.label.configure(text=text)
+
+        percent = progress.percent if progress is not None else None
+        if percent is not None:
+            row.progress_bar.set(percent / 100)
+            if not row.progress_bar.winfo_ismapped():
+                row.progress_bar.pack(side="right", padx=5, before=row.label)
+        elif row.progress_bar.winfo_ismapped():
+            row.progress_bar.pack_forget()
+        if job.status in (STATUS_PENDING, STATUS_RUNNING):
+            row.cancel_button.configure(state="normal")
+        else:
+            row.cancel_button.configure(state="disabled")
 
     def toggle_favorite_selected(self):
-        if not self.selected_history_item_widget or not hasattr(self.selected_history_item_widget, 'history_item_data'):
+        if not self.selected_history_url:
             self.update_status("Nenhum item do histórico selecionado para favoritar.")
             return
-        
-        selected_data = self.selected_history_item_widget.history_item_data
-        
-        found = False
-        for item in self.history_data:
-            if item.get('episode_url') == selected_data.get('episode_url'):
-                item["favorite"] = not item.get("favorite", False)
-                found = True
-                break
-        if found:
-            self.save_history()
-            self._update_history_display() 
-            self.update_status(f"Favorito {'adicionado' if selected_data.get('favorite') else 'removido'}.")
+
+        is_favorite = self.history.toggle_favorite(self.selected_history_url)
+        if is_favorite is not None:
+            if self.history_db:
+                self.history_db.set_favorite(self.selected_history_url, is_favorite)
+            favorite_url = self.selected_history_url
+            self.history_list.rebind_visible(lambda item: item.get('episode_url') == favorite_url)
+            self.update_status(f"Favorito {'adicionado' if is_favorite else 'removido'}.")
         else:
             self.update_status("Erro ao atualizar favorito: item não encontrado nos dados.")
 
@@ -565,25 +887,48 @@ class AnimeApp:
             return
         self.update_status(f"Buscando por '{query}'...")
         self.set_ui_state("disabled")
-        self._clear_scrollable_frame(self.search_results_scroll_frame)
+        self.image_loader.cancel_group("search")
+        self.search_list.set_items([])
         self.search_results_data = [] 
         self.total_search_results_data = [] 
         self.current_search_page = 1
+        self.search_generation += 1
         self.last_selected_episode_listbox_index = -1
         self.show_page("search")
-        thread = threading.Thread(target=self.perform_search, args=(query,), daemon=True)
+        thread = threading.Thread(target=self.perform_search, args=(query, self.search_generation), daemon=True)
         thread.start()
 
-    def perform_search(self, query):
+    def perform_search(self, query, generation):
         try:
-            results = perform_core_search(query)
-            self.total_search_results_data = results
-            logging.info(f"[GUI] perform_search retornou {len(results)} resultados.") 
+            timed_out_sources = []
+            failed_sources = []
+            total_received = 0
+            # Cada fonte entrega seus resultados assim que termina; a GUI os exibe na hora.
+            for batch in iter_core_search(query):
+                if batch['status'] == 'timeout':
+                    timed_out_sources.append(batch['source'])
+                elif batch['status'] == 'error':
+                    failed_sources.append(batch['source'])
+                if batch['results']:
+                    total_received += len(batch['results'])
+                    self.root.after(0, self._append_search_results, batch['results'], generation)
+            logging.info(f"[GUI] perform_search retornou {total_received} resultados.") 
             
             def _process_thread_results():
+                if generation != self.search_generation:
+                    return
                 self.set_ui_state("normal")
-                self.current_search_page = 1 
-                self.update_search_results_display() 
+                problems = []
+                if timed_out_sources:
+                    problems.append(f"Sem resposta de: {', '.join(timed_out_sources)}.")
+                if failed_sources:
+                    problems.append(f"Falha em: {', '.join(failed_sources)}.")
+                if not self.total_search_results_data:
+                    self.update_search_results_display()
+                    if failed_sources: # Distingue "nada encontrado" de "a fonte não funcionou"
+                        self.update_status(f"Nenhum resultado. {' '.join(problems)}")
+                elif problems:
+                    self.update_status(f"Busca concluída ({len(self.total_search_results_data)} resultados). {' '.join(problems)}")
                 
                 if self.target_episode_url_from_history and self.selected_anime_url_for_history:
                     found_anime_for_history = next((anime for anime in self.total_search_results_data if anime.get('url') == self.selected_anime_url_for_history), None)
@@ -604,12 +949,27 @@ class AnimeApp:
             self.root.after(0, lambda err=e: messagebox.showerror("Erro", f"Erro ao buscar: {err}", parent=self.root))
             self.target_episode_url_from_history = None
 
+    def _append_search_results(self, new_results, generation):
+        """Acrescenta os resultados de uma fonte à lista, redesenhando só quando a página atual muda."""
+        if generation != self.search_generation:
+            return # Resultado de uma busca anterior
+        current_page_end = self.current_search_page * self.search_results_per_page
+        current_page_was_full = len(self.total_search_results_data) >= current_page_end
+        self.total_search_results_data.extend(new_results)
+        if not current_page_was_full:
+            self.update_search_results_display()
+        else:
+            total_pages = math.ceil(len(self.total_search_results_data) / self.search_results_per_page)
+            self.search_page_label.configure(text=f"Página {self.current_search_page}/{total_pages}")
+            self.next_search_button.configure(state="normal" if self.current_search_page < total_pages else "disabled")
+            self.update_status(f"{len(self.total_search_results_data)} resultados até agora...")
+
     def update_search_results_display(self):
         """Atualiza a exibição dos resultados da busca com paginação."""
-        self._clear_scrollable_frame(self.search_results_scroll_frame)
+        self.image_loader.cancel_group("search") # Capas da página anterior não interessam mais
 
         if not self.total_search_results_data:
-            ctk.CTkLabel(self.search_results_scroll_frame, text="Nenhum anime encontrado.").pack(pady=10)
+            self.search_list.set_items([], message="Nenhum anime encontrado.")
             self.update_status("Nenhum anime encontrado.")
             self.search_page_label.configure(text="Página -/-")
             self.prev_search_button.configure(state="disabled")
@@ -627,72 +987,84 @@ class AnimeApp:
         end_index = start_index + self.search_results_per_page
         results_to_display = self.total_search_results_data[start_index:end_index]
 
-        if not results_to_display and total_results > 0:
-            ctk.CTkLabel(self.search_results_scroll_frame, text="Nenhum resultado nesta página.").pack(pady=10)
-        else:
-            for i, result in enumerate(results_to_display):
-                        item_frame = ctk.CTkFrame(self.search_results_scroll_frame, corner_radius=5)
-                        item_frame.pack(fill="x", pady=3, padx=3)
-                        item_frame.grid_columnconfigure(1, weight=1)
-
-                        list_cover_width = 60
-                        list_cover_height = 90
-                        
-                        cover_label = ctk.CTkLabel(item_frame, text="Carreg...", width=list_cover_width, height=list_cover_height)
-                        cover_label.grid(row=0, column=0, padx=5, pady=5, sticky="n")
-                        
-                        title_text = result.get('title', 'Título Desconhecido')
-
-                        cover_url = result.get('image') or result.get('cover_url')
-
-                        # Cores para o efeito hover
-                        original_color = item_frame.cget("fg_color")
-                        hover_color = ("gray75", "gray25") # (light_mode, dark_mode)
-
-                        def on_enter(event, frame=item_frame, h_color=hover_color):
-                            frame.configure(fg_color=h_color)
-                        def on_leave(event, frame=item_frame, o_color=original_color):
-                            frame.configure(fg_color=o_color)
-
-                        if cover_url:
-                            threading.Thread(target=self._load_search_result_cover_async_ctk, args=(cover_url, cover_label, (list_cover_width, list_cover_height)), daemon=True).start()
-                        else:
-                            placeholder_icon = self._load_icon_ctk(None, (list_cover_width, list_cover_height), "Sem Capa")
-                            if placeholder_icon:
-                                cover_label.configure(image=placeholder_icon, text="")
-                        title_label = ctk.CTkLabel(item_frame, text=title_text, anchor="w", justify="left", font=ctk.CTkFont(size=13))
-                        title_label.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
-
-                        def _create_select_command(anime_result):
-                            return lambda event=None: self._on_custom_anime_select(anime_result)
-
-                        item_frame.bind("<Button-1>", _create_select_command(result))
-                        cover_label.bind("<Button-1>", _create_select_command(result))
-                        title_label.bind("<Button-1>", _create_select_command(result))
-                        
-                        # Adicionar bindings para o efeito hover ao item_frame e seus filhos diretos visíveis
-                        item_frame.bind("<Enter>", on_enter)
-                        item_frame.bind("<Leave>", on_leave)
-                        # Vincular também aos filhos para manter o hover
-                        cover_label.bind("<Enter>", on_enter)
-                        cover_label.bind("<Leave>", on_leave)
-                        title_label.bind("<Enter>", on_enter)
-                        title_label.bind("<Leave>", on_leave)
-
-                        item_frame.configure(cursor="hand2")
-                        cover_label.configure(cursor="hand2")
-                        title_label.configure(cursor="hand2")
-
-                        # Adicionar separador visual, exceto para o último item da página (opcional)
-                        # if i < len(results_to_display) - 1: # Descomente se não quiser separador após o último
-                        separator = ctk.CTkFrame(self.search_results_scroll_frame, height=1, fg_color=("gray80", "gray20"))
-                        separator.pack(fill="x", padx=5, pady=(0,3)) # pady no bottom para espaço antes do próximo item
+        # As linhas já existentes só recebem o novo título/capa/comando.
+        self.search_list.set_items(results_to_display, message="Nenhum resultado nesta página.")
 
         self.update_status(f"Mostrando {len(results_to_display)} de {total_results} resultados.")
         self.search_page_label.configure(text=f"Página {self.current_search_page}/{total_pages if total_pages > 0 else 1}")
         self.prev_search_button.configure(state="normal" if self.current_search_page > 1 else "disabled")
         self.next_search_button.configure(state="normal" if self.current_search_page < total_pages else "disabled")
 
+    def _create_search_result_row(self, master):
+        """Cria uma linha (capa + título) da lista de resultados. O conteúdo é definido em _bind_search_result_row."""
+        row = ctk.CTkFrame(master, height=SEARCH_ROW_HEIGHT, fg_color="transparent", corner_radius=0)
+        row.pack_propagate(False)
+
+        item_frame = ctk.CTkFrame(row, corner_radius=5)
+        item_frame.pack(fill="x", pady=(3, 0), padx=3)
+        item_frame.grid_columnconfigure(1, weight=1)
+
+        list_cover_width, list_cover_height = SEARCH_COVER_SIZE
+        cover_label = ctk.CTkLabel(item_frame, text="", width=list_cover_width, height=list_cover_height)
+        cover_label.grid(row=0, column=0, padx=5, pady=5, sticky="n")
+        title_label = ctk.CTkLabel(item_frame, text="", anchor="w", justify="left", font=ctk.CTkFont(size=13))
+        title_label.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+
+        # Separador visual entre os itens
+        separator = ctk.CTkFrame(row, height=1, fg_color=("gray80", "gray20"))
+        separator.pack(fill="x", padx=5, pady=(3, 0))
+
+        row.result = None
+        row.cover_key = None
+        row.cover_label = cover_label
+        row.title_label = title_label
+
+        # Cores para o efeito hover
+        original_color = item_frame.cget("fg_color")
+        hover_color = ("gray75", "gray25") # (light_mode, dark_mode)
+
+        def on_enter(event):
+            item_frame.configure(fg_color=hover_color)
+        def on_leave(event):
+            item_frame.configure(fg_color=original_color)
+        def on_click(event=None):
+            if row.result:
+                self._on_custom_anime_select(row.result)
+
+        # Bindings de clique e hover no item_frame e nos filhos visíveis
+        for widget in (item_frame, cover_label, title_label):
+            widget.bind("<Button-1>", on_click)
+            widget.bind("<Enter>", on_enter)
+            widget.bind("<Leave>", on_leave)
+            widget.configure(cursor="hand2")
+        return row
+
+    def _bind_search_result_row(self, row, index, result):
+        """Mostra um resultado numa linha já existente e pede a capa ao carregador de imagens."""
+        row.result = result
+        row.title_label.configure(text=result.get('title', 'Título Desconhecido'))
+
+        cover_url = result.get('image') or result.get('cover_url')
+        if not cover_url:
+            row.cover_key = None
+            row.cover_label.configure(image=self._get_list_placeholder("Sem Capa"))
+            return
+
+        row.cover_key = (cover_url, SEARCH_COVER_SIZE)
+        row.cover_label.configure(image=self._get_list_placeholder("..."))
+        self.image_loader.load(
+            row.cover_key,
+            lambda img, err, url=cover_url, key=row.cover_key: self._show_search_result_cover_ctk(img, err, url, row, key),
+            priority=IMAGE_PRIORITY_SEARCH + index, group="search")
+
+    def _get_list_placeholder(self, text):
+        """Placeholders das capas da lista, criados uma vez só."""
+        if not hasattr(self, '_list_placeholders'):
+            self._list_placeholders = {}
+        if text not in self._list_placeholders:
+            self._list_placeholders[text] = self._load_icon_ctk(None, SEARCH_COVER_SIZE, text)
+        return self._list_placeholders[text]
+
     def go_to_previous_search_page(self):
         if self.current_search_page > 1:
             self.current_search_page -= 1
@@ -712,10 +1084,15 @@ class AnimeApp:
             return
 
         self.anime_title_label_ep_tab.configure(text=anime_title_text)
+        self.image_loader.cancel_group("details") # Uma capa anterior ainda carregando não deve sobrescrever esta
 
         if image_url:
             logging.debug(f"Iniciando carregamento da imagem (pág episódios): {image_url}")
-            threading.Thread(target=self._load_image_async_ctk, args=(image_url, self.anime_cover_label, (int(self.target_cover_height * (2/3)), self.target_cover_height)), daemon=True).start()
+            target_size = (int(self.target_cover_height * (2/3)), self.target_cover_height)
+            self.image_loader.load(
+                (image_url, target_size),
+                lambda img, err, url=image_url, label=self.anime_cover_label: self._show_cover_ctk(img, err, url, label, target_size),
+                priority=IMAGE_PRIORITY_DETAILS, group="details")
         else:
             if self.placeholder_image_ctk:
                 logging.debug("URL da imagem não fornecida, usando placeholder (pág episódios).")
@@ -724,127 +1101,64 @@ class AnimeApp:
                  self.anime_cover_label.configure(image=None)
 
 
-    def _load_image_async_ctk(self, image_url, target_label: ctk.CTkLabel, target_size: tuple):
-        cache_filepath = self._get_cache_filepath(image_url)
-        original_img = None
-
-        if cache_filepath and cache_filepath.exists():
-            try:
-                logging.debug(f"Carregando imagem do cache: {cache_filepath}")
-                original_img = Image.open(cache_filepath)
-            except Exception as e:
-                logging.warning(f"Erro ao carregar imagem do cache {cache_filepath}: {e}. Tentando baixar...")
-                original_img = None # Força o download
-
-        if original_img is None: # Se não estiver no cache ou falhou ao carregar do cache
-            try:
-                logging.debug(f"Baixando imagem: {image_url}")
-                headers = {'User-Agent': 'Mozilla/5.0'}
-                response = requests.get(image_url, stream=True, timeout=10, headers=headers)
-                response.raise_for_status()
-                image_bytes = response.content
-                original_img = Image.open(BytesIO(image_bytes))
-                
-                if cache_filepath: # Salva no cache
-                    try:
-                        original_img.save(cache_filepath, format='PNG') # Salva como PNG
-                        logging.debug(f"Imagem salva no cache: {cache_filepath}")
-                    except Exception as e:
-                        logging.warning(f"Erro ao salvar imagem no cache {cache_filepath}: {e}")
-            except Exception as e:
-                logging.error(f"Erro ao baixar imagem {image_url}: {e}")
-                if target_label.winfo_exists() and self.placeholder_image_ctk:
-                     self.root.after(0, lambda: target_label.configure(image=self.placeholder_image_ctk, text=""))
-                return
-
-        if original_img:
-            try:
-                original_width, original_height = original_img.size
-                if original_height == 0 or original_width == 0:
-                    raise ValueError("Dimensões da imagem original são zero.")
+    def _fetch_cover_image(self, key):
+        """
+        Obtém a miniatura de uma capa para um tamanho de exibição. Roda nas threads do ImageLoader.
+        `key` é (url, (largura, altura)); a imagem original só é baixada e reduzida se a
+        variante ainda não estiver no cache.
+        """
+        image_url, target_size = key
+        thumbnail = self.thumbnail_cache.get(image_url, target_size)
+        if thumbnail is not None:
+            logging.debug(f"Miniatura {target_size} de {image_url} obtida do cache.")
+            return thumbnail
+
+        logging.debug(f"Baixando imagem: {image_url}")
+        response = get_client().get(image_url, timeout=10)
+        response.raise_for_status()
+        thumbnail = make_thumbnail(Image.open(BytesIO(response.content)), target_size)
+        self.thumbnail_cache.put(image_url, target_size, thumbnail)
+        return thumbnail
+
+    def _set_label_image(self, target_label: ctk.CTkLabel, image, is_current=None):
+        """
+        Aplica a imagem no label pela thread principal, se o label ainda existir.
+        `is_current` permite descartar a imagem se o label já foi reaproveitado para outro item.
+        """
+        def apply():
+            if target_label.winfo_exists() and (is_current is None or is_current()):
+                target_label.configure(image=image, text="")
+        self.root.after(0, apply)
+
+    def _show_cover_ctk(self, thumbnail, error, image_url, target_label: ctk.CTkLabel, target_size: tuple):
+        """Aplica a capa (já reduzida pelo cache de miniaturas) na página de episódios."""
+        if error is not None:
+            logging.error(f"Erro ao carregar imagem {image_url}: {error}")
+            if self.placeholder_image_ctk:
+                self._set_label_image(target_label, self.placeholder_image_ctk)
+            return
 
-                target_w, target_h = target_size
-                img_aspect = original_width / original_height
-                
-                new_width = target_w if target_w / img_aspect <= target_h else int(target_h * img_aspect)
-                new_height = int(new_width / img_aspect) if target_w / img_aspect <= target_h else target_h
-                
-                new_width = max(1, new_width)
-                new_height = max(1, new_height)
+        ctk_image = ctk.CTkImage(light_image=thumbnail, dark_image=thumbnail, size=thumbnail.size)
+        self._set_label_image(target_label, ctk_image)
 
-                img_resized = original_img.resize((new_width, new_height), Image.LANCZOS)
-                ctk_image = ctk.CTkImage(light_image=img_resized, dark_image=img_resized, size=(new_width, new_height))
-                if target_label.winfo_exists():
-                    self.root.after(0, lambda: target_label.configure(image=ctk_image, text=""))
-            except Exception as e:
-                logging.error(f"Erro ao processar imagem (possivelmente do cache) {image_url}: {e}")
-                if target_label.winfo_exists() and self.placeholder_image_ctk:
-                    self.root.after(0, lambda: target_label.configure(image=self.placeholder_image_ctk, text=""))
 
+    def _show_search_result_cover_ctk(self, thumbnail, error, image_url, row, cover_key):
+        """Centraliza a miniatura de um resultado da busca num fundo do tamanho fixo da lista."""
+        is_current = lambda: row.cover_key == cover_key
+        if error is not None:
+            logging.warning(f"Erro ao carregar capa da lista ({image_url}): {error}.")
+            placeholder_icon = self._get_list_placeholder("Erro")
+            if placeholder_icon:
+                self._set_label_image(row.cover_label, placeholder_icon, is_current)
+            return
 
-    def _load_search_result_cover_async_ctk(self, image_url, target_label: ctk.CTkLabel, target_size: tuple):
-        cache_filepath = self._get_cache_filepath(image_url)
-        original_img = None
+        target_w, target_h = SEARCH_COVER_SIZE
+        scaled_w, scaled_h = thumbnail.size
+        final_img_obj = Image.new('RGB', (target_w, target_h), self._get_frame_bg_color())
+        final_img_obj.paste(thumbnail, ((target_w - scaled_w) // 2, (target_h - scaled_h) // 2))
 
-        if cache_filepath and cache_filepath.exists():
-            try:
-                logging.debug(f"Carregando capa da lista do cache: {cache_filepath}")
-                original_img = Image.open(cache_filepath)
-            except Exception as e:
-                logging.warning(f"Erro ao carregar capa da lista do cache {cache_filepath}: {e}. Tentando baixar...")
-                original_img = None
-
-        if original_img is None:
-            try:
-                logging.debug(f"Baixando capa da lista: {image_url}")
-                headers = {'User-Agent': 'Mozilla/5.0'}
-                response = requests.get(image_url, stream=True, timeout=10, headers=headers)
-                response.raise_for_status()
-                image_bytes = response.content
-                original_img = Image.open(BytesIO(image_bytes))
-                if cache_filepath:
-                    try:
-                        original_img.save(cache_filepath, format='PNG')
-                        logging.debug(f"Capa da lista salva no cache: {cache_filepath}")
-                    except Exception as e:
-                        logging.warning(f"Erro ao salvar capa da lista no cache {cache_filepath}: {e}")
-            except Exception as e:
-                logging.warning(f"Erro ao baixar capa da lista ({image_url}): {e}.")
-                if target_label.winfo_exists():
-                    placeholder_icon = self._load_icon_ctk(None, target_size, "Erro")
-                    if placeholder_icon:
-                        self.root.after(0, lambda: target_label.configure(image=placeholder_icon, text=""))
-                return
-
-        if original_img:
-            try:
-                target_w, target_h = target_size
-                original_width, original_height = original_img.size
-                if original_width == 0 or original_height == 0: return
-
-                bg_color_hex = self._get_frame_bg_color()
-                final_img_obj = Image.new('RGB', (target_w, target_h), bg_color_hex)
-
-                img_aspect = original_width / original_height
-                scaled_w = target_w if target_w / img_aspect <= target_h else int(target_h * img_aspect)
-                scaled_h = int(scaled_w / img_aspect) if target_w / img_aspect <= target_h else target_h
-                scaled_w = max(1, scaled_w)
-                scaled_h = max(1, scaled_h)
-
-                img_resized_content = original_img.resize((scaled_w, scaled_h), Image.LANCZOS)
-                paste_x = (target_w - scaled_w) // 2
-                paste_y = (target_h - scaled_h) // 2
-                final_img_obj.paste(img_resized_content, (paste_x, paste_y))
-                
-                ctk_image = ctk.CTkImage(light_image=final_img_obj, dark_image=final_img_obj, size=target_size)
-                if target_label.winfo_exists():
-                    self.root.after(0, lambda: target_label.configure(image=ctk_image, text=""))
-            except Exception as e:
-                logging.warning(f"Erro ao processar capa da lista (possivelmente do cache) ({image_url}): {e}.")
-                if target_label.winfo_exists():
-                    placeholder_icon = self._load_icon_ctk(None, target_size, "Erro")
-                    if placeholder_icon:
-                        self.root.after(0, lambda: target_label.configure(image=placeholder_icon, text=""))
+        ctk_image = ctk.CTkImage(light_image=final_img_obj, dark_image=final_img_obj, size=SEARCH_COVER_SIZE)
+        self._set_label_image(row.cover_label, ctk_image, is_current)
 
     def _get_frame_bg_color(self):
         """Obtém a cor de fundo apropriada para os placeholders de imagem."""
@@ -862,21 +1176,25 @@ class AnimeApp:
         return bg_color_hex
 
     def _start_logo_cycling_thread(self):
-        if hasattr(self, 'header_logo_label') and self.header_logo_label and self.logo_images_filenames:
-            self.logo_images_ctk = [self._load_icon_ctk(name, size=(690,150), maintain_aspect=True) for name in self.logo_images_filenames]
-            self.logo_images_ctk = [img for img in self.logo_images_ctk if img is not None] 
-            if len(self.logo_images_ctk) > 1:
-                thread = threading.Thread(target=self._cycle_logo_task, daemon=True)
-                thread.start()
-                logging.info(f"Thread de ciclo de logos iniciada.")
-            else:
-                logging.info("Ciclo de logos desativado (logos insuficientes).")
+        if hasattr(self, 'header_logo_label') and self.header_logo_label and len(self.logo_images_filenames) > 1:
+            # Os logos são lidos e redimensionados na própria thread do ciclo, fora da thread principal.
+            thread = threading.Thread(target=self._cycle_logo_task, daemon=True)
+            thread.start()
+            logging.info(f"Thread de ciclo de logos iniciada.")
         else:
             logging.info("Ciclo de logos desativado (label do logo não existe).")
 
 
     def _cycle_logo_task(self):
         try:
+            self.logo_images_ctk = []
+            for name in self.logo_images_filenames:
+                pil_image = self._load_icon_pil(name, size=(690,150), maintain_aspect=True)
+                if pil_image is not None:
+                    self.logo_images_ctk.append(ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=(690,150)))
+            if len(self.logo_images_ctk) <= 1:
+                logging.info("Ciclo de logos desativado (logos insuficientes).")
+                return
             while True:
                 time.sleep(self.logo_cycle_interval)
                 if hasattr(self, 'header_logo_label') and self.header_logo_label.winfo_exists() and self.logo_images_ctk:
@@ -894,10 +1212,11 @@ class AnimeApp:
             self.current_source = selected_anime_info.get('source', 'AnimeFire')
             self.update_status(f"Carregando: {self.selected_anime_title}...")
             self.current_anime_search_result_info = selected_anime_info # Armazena info da busca
-            self._clear_scrollable_frame(self.episodes_scroll_frame)
-            if hasattr(self, 'episode_page_label'): self.episode_page_label.configure(text="Carregando...")
-            
             self.episode_details_data = {}
+            self._ensure_page("episodes")
+            self.episode_list.set_items([])
+            if hasattr(self, 'episode_page_label'): self.episode_page_label.configure(text="Carregando...")
+
             self.last_selected_episode_listbox_index = -1 
             
             self.update_anime_cover_ctk(self.current_anime_search_result_info.get('image') or self.current_anime_search_result_info.get('cover_url'), self.selected_anime_title)
@@ -913,72 +1232,74 @@ class AnimeApp:
         self.last_selected_episode_listbox_index = -1
         self.target_episode_url_from_history = None
 
-    def update_episode_list_page(self):
+    def update_episode_list_page(self, scroll_to_index=0):
+        """Mostra todos os episódios do anime na lista (rolando até `scroll_to_index`)."""
         self.is_updating_episodes = True
-        if not hasattr(self, 'episodes_scroll_frame'):
+        if not hasattr(self, 'episode_list'):
             self.is_updating_episodes = False
             return
-        self._clear_scrollable_frame(self.episodes_scroll_frame)
-        
+
         all_episodes = self.episode_details_data.get('episodes', [])
         total_episodes = len(all_episodes)
+        self.download_season_button.configure(state="normal" if all_episodes else "disabled")
 
         if not all_episodes:
+            self.episode_list.set_items([])
             self.update_status("Nenhum episódio encontrado para este anime.")
-            if hasattr(self, 'episode_page_label'): self.episode_page_label.configure(text="Página -/-")
-            if hasattr(self, 'prev_episode_button'): self.prev_episode_button.configure(state="disabled")
-            if hasattr(self, 'next_episode_button'): self.next_episode_button.configure(state="disabled")
             self.is_updating_episodes = False
             return
 
-        total_pages = math.ceil(total_episodes / self.episodes_per_page)
-        if self.current_episode_page < 1: self.current_episode_page = 1
-        if self.current_episode_page > total_pages: self.current_episode_page = total_pages
-
-        start_index = (self.current_episode_page - 1) * self.episodes_per_page
-        end_index = start_index + self.episodes_per_page
-        episodes_to_display = all_episodes[start_index:end_index]
-
         try:
-            for i, episode_data in enumerate(episodes_to_display):
-                global_ep_num = start_index + i + 1
-                title_to_insert = episode_data.get('title', 'Título Desconhecido')
-                display_text = f"{global_ep_num}. {title_to_insert}"
-                episode_url = episode_data.get('url')
-
-                is_watched = any(hist_item.get('episode_url') == episode_url for hist_item in self.history_data)
-                
-                button_text_color = None
-                if is_watched:
-                    display_text = f"✓ {display_text}"
-                    # Cor para episódios assistidos: (light_mode, dark_mode)
-                    button_text_color = ("orchid3", "orchid2") 
-                
-                ep_button = ctk.CTkButton(
-                    self.episodes_scroll_frame,
-                    text=display_text,
-                    anchor="w",
-                    command=lambda ep=episode_data, idx=i: self._on_episode_button_click(ep, idx),
-                    text_color=button_text_color # Define a cor do texto se o episódio foi assistido
-                )
-                ep_button.pack(fill="x", pady=2, padx=2)
-
-                if self.target_episode_url_from_history and episode_data.get('url') == self.target_episode_url_from_history:
-                    self.last_selected_episode_listbox_index = i 
-                    self.update_status(f"Episódio {global_ep_num} selecionado. Clique novamente para assistir.")
-            self.update_status(f"Mostrando {len(episodes_to_display)} de {total_episodes} episódios.")
-            if self.target_episode_url_from_history: 
-                 self.target_episode_url_from_history = None
-
+            self.episode_list.set_items(all_episodes, scroll_to=scroll_to_index)
+            if self.target_episode_url_from_history:
+                target_index = next((i for i, ep in enumerate(all_episodes) if ep.get('url') == self.target_episode_url_from_history), -1)
+                if target_index != -1:
+                    self.last_selected_episode_listbox_index = target_index
+                    self.update_status(f"Episódio {target_index + 1} selecionado. Clique novamente para assistir.")
+                self.target_episode_url_from_history = None
+            else:
+                self.update_status(f"{total_episodes} episódios.")
         except Exception as insert_err:
-            logging.exception(f"ERRO ao criar botões de episódios: {insert_err}")
+            logging.exception(f"ERRO ao exibir episódios: {insert_err}")
             self.update_status("Erro ao exibir episódios.")
-
-        if hasattr(self, 'episode_page_label'): self.episode_page_label.configure(text=f"Página {self.current_episode_page}/{total_pages}")
-        if hasattr(self, 'prev_episode_button'): self.prev_episode_button.configure(state="normal" if self.current_episode_page > 1 else "disabled")
-        if hasattr(self, 'next_episode_button'): self.next_episode_button.configure(state="normal" if self.current_episode_page < total_pages else "disabled")
         self.is_updating_episodes = False
 
+    def _create_episode_row(self, master):
+        """Cria um botão da lista de episódios. Texto e comando são definidos em _bind_episode_row."""
+        return ctk.CTkButton(master, text="", anchor="w", height=EPISODE_ROW_HEIGHT - 4)
+
+    def _bind_episode_row(self, ep_button, index, episode_data):
+        """Mostra um episódio num botão já existente."""
+        display_text = f"{index + 1}. {episode_data.get('title', 'Título Desconhecido')}"
+        episode_url = episode_data.get('url')
+
+        is_watched = self.history.is_watched(episode_url)
+
+        button_text_color = ctk.ThemeManager.theme["CTkButton"]["text_color"]
+        if is_watched:
+            display_text = f"✓ {display_text}"
+            # Cor para episódios assistidos: (light_mode, dark_mode)
+            button_text_color = ("orchid3", "orchid2")
+
+        ep_button.configure(text=display_text, text_color=button_text_color,
+                            command=lambda ep=episode_data, idx=index: self._on_episode_button_click(ep, idx))
+
+    def _update_episode_nav(self):
+        """Atualiza o indicador 'Episódios X-Y de N' e os botões de rolagem por página."""
+        total_episodes = len(self.episode_list.items)
+        if not total_episodes:
+            self.episode_page_label.configure(text="Episódios -")
+            self.prev_episode_button.configure(state="disabled")
+            self.next_episode_button.configure(state="disabled")
+            return
+        first = self.episode_list.first_visible_index()
+        last = min(total_episodes, first + self.episode_list.visible_count())
+        self.episode_page_label.configure(text=f"Episódios {first + 1}-{last} de {total_episodes}")
+        if getattr(self, 'ui_state', "normal") == "disabled":
+            return # UI bloqueada (ex: obtendo vídeo); set_ui_state reabilita depois
+        self.prev_episode_button.configure(state="normal" if first > 0 else "disabled")
+        self.next_episode_button.configure(state="normal" if last < total_episodes else "disabled")
+
 
     def _on_episode_button_click(self, episode_data, listbox_index_equivalent):
         """Chamado quando um botão de episódio é clicado."""
@@ -992,23 +1313,19 @@ class AnimeApp:
             thread.start()
         else:
             self.last_selected_episode_listbox_index = listbox_index_equivalent
-            start_index = (self.current_episode_page - 1) * self.episodes_per_page
-            global_ep_num = start_index + listbox_index_equivalent + 1
-            self.update_status(f"Episódio {global_ep_num} selecionado. Clique novamente para assistir.")
+            self.update_status(f"Episódio {listbox_index_equivalent + 1} selecionado. Clique novamente para assistir.")
 
     def go_to_previous_page(self):
-        if self.current_episode_page > 1:
-            self.current_episode_page -= 1
-            self.last_selected_episode_listbox_index = -1
-            self.update_episode_list_page()
+        """Rola a lista de episódios uma tela para cima."""
+        first = self.episode_list.first_visible_index()
+        if first > 0:
+            self.episode_list.scroll_to_index(first - self.episode_list.visible_count())
 
     def go_to_next_page(self):
-        all_episodes = self.episode_details_data.get('episodes', [])
-        total_pages = math.ceil(len(all_episodes) / self.episodes_per_page)
-        if self.current_episode_page < total_pages:
-            self.current_episode_page += 1
-            self.last_selected_episode_listbox_index = -1
-            self.update_episode_list_page()
+        """Rola a lista de episódios uma tela para baixo."""
+        first = self.episode_list.first_visible_index()
+        if first + self.episode_list.visible_count() < len(self.episode_list.items):
+            self.episode_list.scroll_to_index(first + self.episode_list.visible_count())
 
     def perform_fetch_episodes(self, anime_url):
         try:
@@ -1025,15 +1342,12 @@ class AnimeApp:
                 original_image_url_from_search = self.current_anime_search_result_info.get('image') or self.current_anime_search_result_info.get('cover_url')
             self.root.after(0, lambda: self._update_details_gui_ctk(details, original_image_url_from_search))
             
-            target_page = 1
+            target_index = 0
             if self.target_episode_url_from_history and details and 'episodes' in details:
                 all_episodes = details['episodes']
-                target_index = next((i for i, ep in enumerate(all_episodes) if ep.get('url') == self.target_episode_url_from_history), -1)
-                if target_index != -1:
-                    target_page = math.floor(target_index / self.episodes_per_page) + 1
-            
-            self.current_episode_page = target_page
-            self.root.after(0, self.update_episode_list_page)
+                target_index = max(0, next((i for i, ep in enumerate(all_episodes) if ep.get('url') == self.target_episode_url_from_history), 0))
+
+            self.root.after(0, self.update_episode_list_page, target_index)
             self.root.after(100, self._re_enable_episode_selection)
         except Exception as e:
             logging.exception(f"ERRO ao buscar episódios para {anime_url}")
@@ -1080,6 +1394,17 @@ class AnimeApp:
         # Verifica se o parser do histórico ainda é suportado
         if parser_from_history not in PARSER_MAP:
             messagebox.showwarning("Servidor Indisponível", f"O item do histórico foi assistido em um servidor ('{parser_from_history}') que não está mais disponível. A busca tentará encontrar em outros servidores.", parent=self.root)
+        else:
+            # O histórico já tem a URL do anime: abre direto, sem refazer a busca.
+            # A página de detalhes vem do cache HTTP (e funciona offline se já foi visitada).
+            logging.info(f"Histórico: Abrindo '{anime_title_from_history}' diretamente.")
+            self._on_custom_anime_select({
+                'title': anime_title_from_history,
+                'url': anime_url_from_history,
+                'image': selected_history_item.get('anime_image_url') or "",
+                'source': parser_from_history,
+            })
+            return
         
         self.selected_anime_title = anime_title_from_history
         self.selected_anime_url_for_history = anime_url_from_history
@@ -1089,7 +1414,7 @@ class AnimeApp:
         self.search_entry.delete(0, "end")
         self.search_entry.insert(0, cleaned_title_for_search)
 
-        logging.info(f"Histórico: Buscando diretamente com o parser padrão.")
+        logging.info(f"Histórico: Buscando com os parsers disponíveis.")
         self.start_search_thread()
 
 
@@ -1104,7 +1429,7 @@ class AnimeApp:
             if not parser:
                  raise ValueError(f"Parser '{self.current_source}' não encontrado.")
 
-            video_sources = parser.get_video_source(episode_page_url)
+            video_sources = self.video_prefetcher.get(parser, episode_page_url)
             if not video_sources:
                 self.root.after(0, lambda: (
                     self.update_status("Falha ao obter o link do vídeo do site."),
@@ -1117,10 +1442,15 @@ class AnimeApp:
             episode_url_for_history = episode_page_url
             episode_title_for_history = self.current_selected_episode.get('title', 'Episódio') if self.current_selected_episode else 'Episódio'
 
+            quality_mode = self.quality_mode
             if len(video_sources) == 1:
                 self.root.after(0, self._handle_single_video_source, video_sources[0], episode_url_for_history, episode_title_for_history)
-            else:
+            elif quality_mode == QUALITY_ASK:
                 self.root.after(0, self._prompt_for_video_quality, video_sources, episode_url_for_history, episode_title_for_history)
+            else:
+                # Escolhe aqui mesmo, na thread (a sondagem das fontes não pode travar a janela).
+                chosen_source = QualitySelector(quality_mode).choose(video_sources, referer="https://animefire.io/")
+                self.root.after(0, self._handle_single_video_source, chosen_source, episode_url_for_history, episode_title_for_history, True)
 
         except Exception as e:
             logging.exception(f"ERRO GERAL ao obter vídeo para {episode_page_url}")
@@ -1130,16 +1460,20 @@ class AnimeApp:
                 self._re_enable_episode_selection()
             ))
 
-    def _handle_single_video_source(self, chosen_source, episode_url_for_history, episode_title_for_history):
-        """Lida com o caso de uma única fonte de vídeo, chamado pela thread principal."""
-        self.update_status(f"Fonte única encontrada ({chosen_source.get('label', 'N/A')}). Tocando...")
+    def _handle_single_video_source(self, chosen_source, episode_url_for_history, episode_title_for_history, auto_selected=False):
+        """Toca a fonte única (ou escolhida automaticamente), chamado pela thread principal."""
+        if auto_selected:
+            self.update_status(f"Qualidade {chosen_source.get('label', 'N/A')} escolhida automaticamente. Tocando...")
+        else:
+            self.update_status(f"Fonte única encontrada ({chosen_source.get('label', 'N/A')}). Tocando...")
         video_url_to_play = chosen_source['src']
         self.play_selected_video(video_url_to_play, episode_url_for_history, episode_title_for_history)
 
     def _prompt_for_video_quality(self, video_sources, episode_url_for_history, episode_title_for_history):
         """Cria e mostra o diálogo de seleção de qualidade, chamado pela thread principal."""
+        suggested = QualitySelector(default_quality_preference(), probe=False).rank(video_sources)[0]
         dialog = ctk.CTkInputDialog(
-            text="Qualidades disponíveis:\n" + "\n".join([f"{i+1}. {s.get('label', f'Opção {i+1}')}" for i, s in enumerate(video_sources)]) + "\n\nDigite o NÚMERO da opção:",
+            text="Qualidades disponíveis:\n" + "\n".join([f"{i+1}. {s.get('label', f'Opção {i+1}')}{' (sugerida)' if s is suggested else ''}" for i, s in enumerate(video_sources)]) + "\n\nDigite o NÚMERO da opção:",
             title="Seleção de Qualidade"
         )
         choice_num_str = dialog.get_input() 
@@ -1168,9 +1502,23 @@ class AnimeApp:
              self._re_enable_episode_selection()
 
 
-    def _run_play_video_thread(self, video_url, title):
+    def _prefetch_next_episodes(self, current_episode_url):
+        """Começa a resolver as fontes dos próximos episódios enquanto o atual toca."""
+        parser = PARSER_MAP.get(self.current_source)
+        all_episodes = self.episode_details_data.get('episodes', [])
+        current_index = next((i for i, ep in enumerate(all_episodes) if ep.get('url') == current_episode_url), -1)
+        if not parser or current_index == -1:
+            return
+        next_episodes = all_episodes[current_index + 1:current_index + 1 + config.VIDEO_PREFETCH_COUNT]
+        if next_episodes:
+            logging.debug(f"Pré-carregando fontes de {len(next_episodes)} episódio(s) seguinte(s).")
+            self.video_prefetcher.prefetch(parser, [ep.get('url') for ep in next_episodes])
+
+    def _run_play_video_thread(self, video_url, title, episode_url=None, start=None):
         try:
-            self.player.play_episode(video_url, title=title, referer="https://animefire.io/")
+            position = self.player.play_episode(video_url, title=title, referer="https://animefire.io/", start=start)
+            if episode_url:
+                self.root.after(0, self._save_playback_position, episode_url, position)
         except FileNotFoundError:
              logging.error(f"Erro FileNotFoundError ao tentar executar play_video (mpv não encontrado?).")
         except Exception as play_err:
@@ -1179,6 +1527,19 @@ class AnimeApp:
             logging.debug("Player fechado ou falhou. Agendando reabilitação da UI.")
             self.root.after(0, self._re_enable_episode_selection)
 
+    def _save_playback_position(self, episode_url, position):
+        """Guarda onde o episódio parou (None = assistido até o fim) para retomar na próxima vez."""
+        item = self.history.get(episode_url)
+        if item is None:
+            return
+        item['position'] = position
+        if episode_url in self.pending_history: # Ainda não foi gravado: a posição vai junto
+            self.pending_history[episode_url]['position'] = position
+        elif self.history_db:
+            self.history_db.set_position(episode_url, position)
+        if position:
+            logging.info(f"Posição salva: {episode_url} parou em {position:.0f}s.")
+
 
     def play_selected_video(self, video_url_to_play, episode_url_original, episode_title_original):
         if not video_url_to_play:
@@ -1194,10 +1555,17 @@ class AnimeApp:
                 if matching_anime:
                     anime_image_url_for_history = matching_anime.get('image')
             self.add_to_history(self.selected_anime_title, episode_title_original, episode_url_original, self.selected_anime_url_for_history, anime_image_url_for_history)
+            self.episode_list.rebind_visible(lambda ep: ep.get('url') == episode_url_original) # Marca como assistido
         except Exception as history_err:
             logging.exception(f"Erro ao adicionar ao histórico: {history_err}")
 
-        self.update_status(f"Iniciando player...")
+        history_item = self.history.get(episode_url_original)
+        resume_position = history_item.get('position') if history_item else None
+        if resume_position:
+            minutes, seconds = divmod(int(resume_position), 60)
+            self.update_status(f"Iniciando player (continuando de {minutes:02d}:{seconds:02d})...")
+        else:
+            self.update_status(f"Iniciando player...")
         
         popup = ctk.CTkToplevel(self.root)
         popup.title("Carregando")
@@ -1225,9 +1593,11 @@ class AnimeApp:
         try:
             player_thread = threading.Thread(
                 target=self._run_play_video_thread,
-                args=(video_url_to_play, f"{self.selected_anime_title} - {episode_title_original}"),
+                args=(video_url_to_play, f"{self.selected_anime_title} - {episode_title_original}",
+                      episode_url_original, resume_position),
                 daemon=True)
             player_thread.start()
+            self._prefetch_next_episodes(episode_url_original)
         except FileNotFoundError:
              self.update_status("Erro: Comando 'mpv' não encontrado.")
              logging.error(f"play_selected_video: ERRO - mpv não encontrado")
@@ -1244,9 +1614,18 @@ class AnimeApp:
 
 # Adicione esta função para encapsular a inicialização da GUI
 def main_gui_func():
+    started_at = time.perf_counter()
+    # Antes de criar a janela: com o modo fixo, o customtkinter nem consulta o tema do sistema.
+    ctk.set_appearance_mode("dark")
     root = ctk.CTk()
-    app = AnimeApp(root)
+    app = AnimeApp(root, started_at=started_at)
     root.mainloop()
+    if app.download_queue:
+        # Encerra os yt-dlp em andamento; eles voltam para a fila e continuam do .part na próxima vez.
+        app.download_queue.stop(interrupt_running=True)
+    if app.history_db:
+        app.history_db.close() # Espera as escritas pendentes do histórico
+    app.thumbnail_cache.save() # Ordem de uso das capas vistas nesta sessão
 
 if __name__ == "__main__":
     main_gui_func() # Chame a nova função
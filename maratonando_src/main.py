@@ -1,15 +1,16 @@
 import sys
 import logging
-from .cli import cli
-from .gui import main_gui_func
 
 def start():
     logging.basicConfig(level=logging.INFO,
                         format='[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s',
                         stream=sys.stderr)
 
+    # Cada modo importa só o que usa: a CLI não carrega Tk, PIL nem o customtkinter.
     if len(sys.argv) > 1:
+        from .cli import cli
         cli()
     else:
         logging.info("Iniciando interface gráfica...")
-        main_gui_func()
\ No newline at end of file
+        from .gui import main_gui_func
+        main_gui_func()
@@ -0,0 +1,19 @@
+# /home/marcos/Maratonando/maratonando_src/utils/helpers.py
+import os
+import tempfile
+from pathlib import Path
+
+
+def write_atomic(path: Path, data: bytes):
+    """Grava em um arquivo temporário no mesmo diretório e renomeia, para nunca deixar arquivo pela metade."""
+    fd, tmp_path = tempfile.mkstemp(dir=Path(path).parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,149 @@
+# /home/marcos/Maratonando/maratonando_src/utils/http_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .helpers import write_atomic
+
+log = logging.getLogger(__name__)
+
+# Headers da resposta que vale a pena guardar junto com o corpo.
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Date')
+
+
+class ResponseCache:
+    """
+    Cache em disco de respostas HTTP (GET), com validade por chamada e despejo LRU.
+
+    Cada entrada tem dois arquivos: `<chave>.body` (corpo da resposta) e
+    `<chave>.meta` (JSON com URL, headers de validação e horário em que foi guardada).
+    A ordem de uso é mantida em memória e persistida pela data de modificação do `.meta`.
+    """
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict() # chave -> tamanho em bytes (mais antiga primeiro)
+        self._total_bytes = 0
+        self._index_loaded = False
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        return self.cache_dir / f"{key}.meta", self.cache_dir / f"{key}.body"
+
+    def _load_index(self):
+        """Monta o índice LRU a partir dos arquivos existentes (feito uma vez, na primeira consulta)."""
+        if self._index_loaded:
+            return
+        entries = []
+        for meta_path in self.cache_dir.glob("*.meta"):
+            try:
+                body_path = meta_path.with_suffix(".body")
+                entries.append((meta_path.stat().st_mtime, meta_path.stem, body_path.stat().st_size))
+            except OSError:
+                continue
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        self._index_loaded = True
+        log.debug(f"[HTTP Cache] Índice carregado: {len(self._index)} entradas, {self._total_bytes} bytes.")
+
+    def _remove(self, key: str):
+        self._total_bytes -= self._index.pop(key, 0)
+        for path in self._paths(key):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._index:
+            oldest_key = next(iter(self._index))
+            log.debug(f"[HTTP Cache] Removendo entrada antiga {oldest_key[:12]}...")
+            self._remove(oldest_key)
+
+    def load(self, url: str) -> Optional[Dict]:
+        """Retorna a entrada guardada para a URL (metadados + 'body'), ou None."""
+        key = self._key(url)
+        meta_path, body_path = self._paths(key)
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                return None
+            try:
+                meta = json.loads(meta_path.read_text(encoding='utf-8'))
+                meta['body'] = body_path.read_bytes()
+            except (OSError, ValueError) as e:
+                log.warning(f"[HTTP Cache] Entrada corrompida para {url}: {e}. Descartando.")
+                self._remove(key)
+                return None
+            self._index.move_to_end(key)
+            try:
+                os.utime(meta_path) # Persiste a ordem de uso para o próximo início
+            except OSError:
+                pass
+        return meta
+
+    def store(self, url: str, response: requests.Response):
+        key = self._key(url)
+        meta_path, body_path = self._paths(key)
+        body = response.content
+        meta = {
+            'url': url,
+            'status_code': response.status_code,
+            'encoding': response.encoding,
+            'headers': {name: response.headers[name] for name in STORED_HEADERS if name in response.headers},
+            'stored_at': time.time(),
+        }
+        with self._lock:
+            self._load_index()
+            try:
+                write_atomic(body_path, body)
+                write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+            except OSError as e:
+                log.warning(f"[HTTP Cache] Não foi possível guardar {url}: {e}")
+                return
+            self._total_bytes += len(body) - self._index.pop(key, 0)
+            self._index[key] = len(body)
+            self._evict()
+
+    def refresh(self, url: str, entry: Dict):
+        """Marca uma entrada como recém-validada (resposta 304 do servidor)."""
+        meta_path, _ = self._paths(self._key(url))
+        meta = {k: v for k, v in entry.items() if k != 'body'}
+        meta['stored_at'] = time.time()
+        entry['stored_at'] = meta['stored_at']
+        with self._lock:
+            try:
+                write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+            except OSError as e:
+                log.warning(f"[HTTP Cache] Não foi possível atualizar {url}: {e}")
+
+    @staticmethod
+    def is_fresh(entry: Dict, ttl: float) -> bool:
+        return time.time() - entry.get('stored_at', 0) < ttl
+
+    @staticmethod
+    def to_response(entry: Dict) -> requests.Response:
+        """Reconstrói um requests.Response a partir de uma entrada do cache."""
+        response = requests.Response()
+        response._content = entry['body']
+        response.status_code = entry.get('status_code', 200)
+        response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        response.encoding = entry.get('encoding')
+        response.url = entry.get('url')
+        response.reason = "OK"
+        response.from_cache = True
+        return response
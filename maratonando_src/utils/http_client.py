@@ -0,0 +1,283 @@
+# /home/marcos/Maratonando/maratonando_src/utils/http_client.py
+import ipaddress
+import logging
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.retry import Retry
+
+from .. import config
+from .http_cache import ResponseCache
+
+log = logging.getLogger(__name__)
+
+# Valores padrão do cliente. Podem ser sobrescritos ao instanciar HttpClient.
+DEFAULT_TIMEOUT = 20          # Segundos (conexão + leitura)
+DEFAULT_RETRIES = 2           # Novas tentativas para erros de conexão/5xx
+DEFAULT_BACKOFF_FACTOR = 0.5  # Espera entre tentativas: 0.5s, 1s, 2s...
+DEFAULT_POOL_CONNECTIONS = 10 # Quantidade de hosts com pool mantido em memória
+DEFAULT_POOL_MAXSIZE = 6      # Máximo de conexões keep-alive simultâneas por host
+
+DNS_CACHE_TTL = 300           # Segundos que um endereço resolvido permanece válido
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+}
+
+
+class DnsCache:
+    """
+    Cache de resolução de nomes com TTL, restrito a uma família de endereços.
+
+    Usado pelos adapters com família fixada: a resolução acontece uma vez por
+    host a cada `ttl` segundos, sem alterar o comportamento global do módulo socket.
+    """
+    def __init__(self, family: int = socket.AF_INET, ttl: float = DNS_CACHE_TTL):
+        self.family = family
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._host_locks: Dict[Tuple[str, int], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: Tuple[str, int]) -> Optional[List[str]]:
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        """Retorna os endereços do host, consultando o resolvedor apenas se o cache expirou."""
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        key = (host, port)
+        with self._lock:
+            addresses = self._lookup(key)
+            if addresses:
+                return addresses
+            host_lock = self._host_locks.setdefault(key, threading.Lock())
+
+        # Um único resolvedor por host; as outras threads aguardam e reaproveitam o resultado.
+        with host_lock:
+            with self._lock:
+                addresses = self._lookup(key)
+            if addresses:
+                return addresses
+            infos = socket.getaddrinfo(host, port, self.family, socket.SOCK_STREAM)
+            addresses = list(dict.fromkeys(info[4][0] for info in infos))
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl, addresses)
+            log.debug(f"[DNS] {host} resolvido para {addresses}")
+            return addresses
+
+    def invalidate(self, host: str):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == host]:
+                del self._entries[key]
+
+
+class _PinnedConnectionMixin:
+    """Conecta usando os endereços do DnsCache do adapter em vez da resolução padrão do urllib3."""
+    dns_cache: DnsCache = None
+
+    def _new_conn(self):
+        hostname = self._dns_host
+        try:
+            addresses = self.dns_cache.resolve(hostname, self.port)
+        except socket.gaierror:
+            return super()._new_conn() # Deixa o urllib3 reportar o erro de resolução
+
+        last_error = None
+        for address in addresses:
+            # O host original continua sendo usado para SNI, verificação do certificado e header Host.
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except (NewConnectionError, ConnectTimeoutError) as e:
+                last_error = e
+            finally:
+                self._dns_host = hostname
+        self.dns_cache.invalidate(hostname)
+        raise last_error
+
+
+class PinnedFamilyAdapter(HTTPAdapter):
+    """Adapter cujas conexões usam apenas a família de endereços do seu DnsCache (ex: só IPv4)."""
+    def __init__(self, dns_cache: DnsCache, **kwargs):
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        attrs = {'dns_cache': self.dns_cache}
+        http_conn = type('PinnedHTTPConnection', (_PinnedConnectionMixin, HTTPConnection), attrs)
+        https_conn = type('PinnedHTTPSConnection', (_PinnedConnectionMixin, HTTPSConnection), attrs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': type('PinnedHTTPConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': http_conn}),
+            'https': type('PinnedHTTPSConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': https_conn}),
+        }
+
+
+class HttpClient:
+    """
+    Cliente HTTP compartilhado pelos parsers.
+
+    Mantém uma única requests.Session com pool de conexões keep-alive, de modo
+    que chamadas seguintes ao mesmo host reaproveitam a conexão TCP/TLS já aberta.
+    Cada fonte (parser) pode registrar seus próprios headers padrão.
+    """
+    def __init__(self,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES,
+                 backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 cache: Optional[ResponseCache] = None):
+        self.timeout = timeout
+        self.cache = cache
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._source_headers: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = self.build_adapter()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def build_adapter(self, adapter_class=HTTPAdapter, **kwargs) -> HTTPAdapter:
+        """Cria um adapter com a política de pool e retentativas deste cliente."""
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        return adapter_class(pool_connections=self.pool_connections,
+                             pool_maxsize=self.pool_maxsize,
+                             pool_block=True, # Respeita o limite de conexões por host
+                             max_retries=retry,
+                             **kwargs)
+
+    def mount(self, prefix: str, adapter: HTTPAdapter):
+        """Registra um adapter específico para URLs que começam com `prefix`."""
+        with self._lock:
+            self.session.mount(prefix, adapter)
+
+    def pin_address_family(self, prefix: str, family: int = socket.AF_INET) -> PinnedFamilyAdapter:
+        """
+        Faz com que as URLs que começam com `prefix` usem apenas a família de
+        endereços indicada, com pool de conexões e cache de DNS próprios.
+        """
+        with self._lock:
+            adapter = self.session.adapters.get(prefix)
+            if isinstance(adapter, PinnedFamilyAdapter) and adapter.dns_cache.family == family:
+                return adapter
+            adapter = self.build_adapter(PinnedFamilyAdapter, dns_cache=DnsCache(family=family))
+            self.session.mount(prefix, adapter)
+            return adapter
+
+    def register_source(self, source: str, headers: Dict[str, str]):
+        """Define os headers padrão enviados nas requisições de uma fonte."""
+        with self._lock:
+            self._source_headers[source] = dict(headers)
+
+    def request(self, method: str, url: str, source: Optional[str] = None, **kwargs) -> requests.Response:
+        headers = dict(self._source_headers.get(source, {})) if source else {}
+        if kwargs.get('headers'):
+            headers.update(kwargs['headers'])
+        kwargs['headers'] = headers
+        kwargs.setdefault('timeout', self.timeout)
+        log.debug(f"[HTTP] {method} {url} (fonte: {source or '-'})")
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, source: Optional[str] = None, cache_ttl: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        GET simples. Com `cache_ttl` (segundos) e um cache configurado, a resposta
+        é guardada em disco: dentro do prazo é devolvida sem acessar a rede; depois
+        é revalidada com If-None-Match/If-Modified-Since. Se a rede falhar, a
+        cópia guardada é usada mesmo vencida.
+        """
+        if not cache_ttl or self.cache is None:
+            return self.request("GET", url, source=source, **kwargs)
+
+        entry = self.cache.load(url)
+        if entry and self.cache.is_fresh(entry, cache_ttl):
+            log.debug(f"[HTTP] Cache válido para {url}")
+            return self.cache.to_response(entry)
+
+        if entry:
+            conditional_headers = dict(kwargs.get('headers') or {})
+            stored_headers = entry.get('headers', {})
+            if stored_headers.get('ETag'):
+                conditional_headers['If-None-Match'] = stored_headers['ETag']
+            if stored_headers.get('Last-Modified'):
+                conditional_headers['If-Modified-Since'] = stored_headers['Last-Modified']
+            kwargs['headers'] = conditional_headers
+
+        try:
+            response = self.request("GET", url, source=source, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if entry:
+                log.warning(f"[HTTP] Falha de rede ({e}). Usando cópia antiga do cache para {url}")
+                return self.cache.to_response(entry)
+            raise
+
+        if response.status_code == 304 and entry:
+            log.debug(f"[HTTP] Cache revalidado (304) para {url}")
+            self.cache.refresh(url, entry)
+            return self.cache.to_response(entry)
+        if response.status_code == 200:
+            self.cache.store(url, response)
+        elif entry and response.status_code >= 500:
+            log.warning(f"[HTTP] Servidor respondeu {response.status_code}. Usando cópia antiga do cache para {url}")
+            return self.cache.to_response(entry)
+        return response
+
+    def post(self, url: str, source: Optional[str] = None, **kwargs) -> requests.Response:
+        return self.request("POST", url, source=source, **kwargs)
+
+    def head(self, url: str, source: Optional[str] = None, **kwargs) -> requests.Response:
+        return self.request("HEAD", url, source=source, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_default_client: Optional[HttpClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Retorna o cliente HTTP compartilhado pelo processo, criando-o na primeira chamada."""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                cache = None
+                try:
+                    cache = ResponseCache(config.get_cache_dir("http"), config.HTTP_CACHE_MAX_BYTES)
+                except OSError as e:
+                    log.warning(f"[HTTP] Cache de respostas desativado: {e}")
+                _default_client = HttpClient(cache=cache)
+                log.debug("[HTTP] Cliente HTTP compartilhado criado.")
+    return _default_client
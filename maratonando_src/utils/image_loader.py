@@ -0,0 +1,117 @@
+# /home/marcos/Maratonando/maratonando_src/utils/image_loader.py
+import itertools
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+log = logging.getLogger(__name__)
+
+# Callback chamado na thread do loader com (imagem, erro); um dos dois é None.
+ImageCallback = Callable[[Any, Optional[Exception]], None]
+
+
+class ImageRequest:
+    """Pedido de uma imagem feito por um widget. Pode ser cancelado a qualquer momento."""
+    def __init__(self, key: Hashable, callback: ImageCallback, group: Optional[str]):
+        self.key = key
+        self.callback = callback
+        self.group = group
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class _Job:
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.requests: List[ImageRequest] = []
+        self.started = False
+        self.priority = None
+
+
+class ImageLoader:
+    """
+    Carrega imagens (capas) com um número fixo de threads.
+
+    - Os pedidos são atendidos por prioridade (número menor primeiro), então os
+      itens visíveis passam na frente dos demais.
+    - Pedidos de uma mesma chave (ex: URL + tamanho) são agrupados: a imagem é
+      obtida uma única vez e entregue a todos que pediram.
+    - `cancel_group()` cancela os pedidos de uma página que saiu da tela; se ninguém
+      mais espera pela imagem, ela nem chega a ser baixada.
+
+    `fetch(key)` faz o trabalho de fato (cache em disco/download) e roda nas threads do loader.
+    """
+    def __init__(self, fetch: Callable[[Hashable], Any], max_workers: int = 4):
+        self._fetch = fetch
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._counter = itertools.count() # Desempate FIFO entre pedidos de mesma prioridade
+        self._lock = threading.Lock()
+        self._jobs: Dict[Hashable, _Job] = {}
+        self._groups: Dict[str, List[ImageRequest]] = {}
+        for i in range(max_workers):
+            threading.Thread(target=self._worker, name=f"maratonando-images-{i}", daemon=True).start()
+
+    def load(self, key: Hashable, callback: ImageCallback, priority: int = 0, group: Optional[str] = None) -> ImageRequest:
+        """Pede a imagem identificada por `key`. `callback` é chamado na thread do loader quando ela estiver pronta."""
+        request = ImageRequest(key, callback, group)
+        with self._lock:
+            if group:
+                self._groups.setdefault(group, []).append(request)
+            job = self._jobs.get(key)
+            if job is None:
+                job = self._jobs[key] = _Job(key)
+            job.requests.append(request)
+            # Reenfileira se o novo pedido for mais urgente; a entrada antiga é ignorada depois.
+            if not job.started and (job.priority is None or priority < job.priority):
+                job.priority = priority
+                self._queue.put((priority, next(self._counter), key))
+        return request
+
+    def cancel_group(self, group: str):
+        """Cancela todos os pedidos pendentes de um grupo (ex: a página de resultados anterior)."""
+        with self._lock:
+            requests = self._groups.pop(group, [])
+            for request in requests:
+                request.cancel()
+        if requests:
+            log.debug(f"[Imagens] {len(requests)} pedido(s) do grupo '{group}' cancelado(s).")
+
+    def _take_job(self, key: Hashable) -> Optional[_Job]:
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job.started:
+                return None # Entrada repetida de uma imagem já atendida/em andamento
+            if all(request.cancelled for request in job.requests):
+                del self._jobs[key]
+                return None
+            job.started = True
+            return job
+
+    def _finish_job(self, job: _Job) -> List[ImageRequest]:
+        with self._lock:
+            self._jobs.pop(job.key, None)
+            for request in job.requests:
+                group_requests = self._groups.get(request.group)
+                if group_requests and request in group_requests:
+                    group_requests.remove(request)
+            return [request for request in job.requests if not request.cancelled]
+
+    def _worker(self):
+        while True:
+            _, _, key = self._queue.get()
+            job = self._take_job(key)
+            if job is None:
+                continue
+            image, error = None, None
+            try:
+                image = self._fetch(key)
+            except Exception as e:
+                error = e
+            for request in self._finish_job(job):
+                try:
+                    request.callback(image, error)
+                except Exception:
+                    log.exception(f"[Imagens] Erro no callback da imagem {key}")
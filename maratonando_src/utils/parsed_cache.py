@@ -0,0 +1,115 @@
+# /home/marcos/Maratonando/maratonando_src/utils/parsed_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Optional
+
+from .helpers import write_atomic
+
+log = logging.getLogger(__name__)
+
+ENTRY_SUFFIX = ".json.z"
+
+
+def source_version(module_file: str, version: str = "1") -> str:
+    """
+    Gera a versão de um parser a partir do seu número de versão e do conteúdo do
+    arquivo-fonte. Qualquer alteração no código do parser invalida o que foi guardado.
+    """
+    try:
+        with open(module_file, 'rb') as f:
+            digest = hashlib.md5(f.read()).hexdigest()[:12]
+    except OSError:
+        digest = "unknown"
+    return f"{version}-{digest}"
+
+
+class ParsedCache:
+    """
+    Cache em disco de dados já extraídos pelos parsers (ex: detalhes e lista de episódios).
+
+    Cada entrada é um JSON compacto comprimido com zlib e guarda, além dos dados,
+    a versão do parser e uma "impressão digital" barata da página (ex: quantidade
+    de episódios). Se qualquer uma das duas mudar, a entrada é ignorada.
+
+    A data de modificação do arquivo marca o último uso (leituras a renovam). Entradas
+    sem uso há mais de `max_age` segundos são apagadas, e acima de `max_entries` as
+    menos usadas saem primeiro.
+    """
+    def __init__(self, cache_dir: Path, max_entries: int, max_age: float):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._count: Optional[int] = None # Entradas em disco; None até a primeira limpeza
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / (hashlib.sha256(key.encode('utf-8')).hexdigest() + ENTRY_SUFFIX)
+
+    def _sweep(self):
+        """Apaga as entradas velhas e, se ainda passar do limite, as menos usadas. Chamar com o lock."""
+        entries = []
+        for path in self.cache_dir.glob(f"*{ENTRY_SUFFIX}"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        entries.sort()
+        expired_before = time.time() - self.max_age
+        # Abaixo do limite, para a próxima limpeza não acontecer logo na escrita seguinte.
+        excess = len(entries) - int(self.max_entries * 0.9)
+        removed = 0
+        for mtime, path in entries:
+            if mtime >= expired_before and removed >= excess:
+                break
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                removed += 1
+            except OSError as e:
+                log.debug(f"[Parsed Cache] Não foi possível apagar {path.name}: {e}")
+        self._count = len(entries) - removed
+        if removed:
+            log.debug(f"[Parsed Cache] {removed} entradas antigas removidas, {self._count} restantes.")
+
+    def get(self, key: str, version: str, fingerprint: Any) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            entry = json.loads(zlib.decompress(path.read_bytes()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zlib.error) as e:
+            log.warning(f"[Parsed Cache] Entrada corrompida para '{key}': {e}")
+            return None
+        if entry.get('v') != version or entry.get('fp') != fingerprint:
+            log.debug(f"[Parsed Cache] Entrada desatualizada para '{key}'.")
+            return None
+        try:
+            os.utime(path) # Marca o uso, para a limpeza tirar primeiro as que ninguém lê
+        except OSError:
+            pass
+        return entry.get('data')
+
+    def put(self, key: str, version: str, fingerprint: Any, data: Any):
+        payload = zlib.compress(json.dumps({'v': version, 'fp': fingerprint, 'data': data},
+                                           ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        path = self._path(key)
+        with self._lock:
+            if self._count is None:
+                self._sweep()
+            is_new = not path.exists()
+            try:
+                write_atomic(path, payload)
+            except OSError as e:
+                log.warning(f"[Parsed Cache] Não foi possível guardar '{key}': {e}")
+                return
+            if is_new:
+                self._count += 1
+                if self._count > self.max_entries:
+                    self._sweep()
@@ -0,0 +1,152 @@
+# /home/marcos/Maratonando/maratonando_src/utils/thumbnail_cache.py
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image, features
+
+from .helpers import write_atomic
+
+log = logging.getLogger(__name__)
+
+INDEX_FILENAME = "index.json"
+
+# WebP quando o Pillow tem suporte; JPEG como alternativa (sempre disponível).
+if features.check('webp'):
+    THUMBNAIL_FORMAT, THUMBNAIL_EXTENSION, THUMBNAIL_OPTIONS = 'WEBP', '.webp', {'quality': 85, 'method': 4}
+else:
+    THUMBNAIL_FORMAT, THUMBNAIL_EXTENSION, THUMBNAIL_OPTIONS = 'JPEG', '.jpg', {'quality': 88, 'optimize': True}
+
+
+def fit_size(image_size: Tuple[int, int], box: Tuple[int, int]) -> Tuple[int, int]:
+    """Maior tamanho que cabe em `box` mantendo a proporção da imagem."""
+    original_width, original_height = image_size
+    if original_width <= 0 or original_height <= 0:
+        raise ValueError("Dimensões da imagem original são zero.")
+    target_w, target_h = box
+    img_aspect = original_width / original_height
+    if target_w / img_aspect <= target_h:
+        new_width, new_height = target_w, int(target_w / img_aspect)
+    else:
+        new_width, new_height = int(target_h * img_aspect), target_h
+    return max(1, new_width), max(1, new_height)
+
+
+def make_thumbnail(image: Image.Image, box: Tuple[int, int]) -> Image.Image:
+    """Reduz a imagem para caber em `box` (sem bordas), pronta para ir para o cache."""
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image.resize(fit_size(image.size, box), Image.LANCZOS)
+
+
+class ThumbnailCache:
+    """
+    Cache em disco de capas já reduzidas, uma variante por tamanho de exibição.
+
+    Cada variante é um arquivo `<sha256 da URL>_<largura>x<altura><ext>` em formato
+    compacto (WebP/JPEG). O `index.json` guarda a URL, o tamanho em bytes e a ordem
+    de uso das variantes; quando o total passa de `max_bytes`, as menos usadas saem.
+    A ordem mudada pelas leituras vai para o disco na próxima escrita ou em `save()`.
+    """
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, dict]" = OrderedDict() # nome do arquivo -> metadados (mais antigo primeiro)
+        self._total_bytes = 0
+        self._index_loaded = False
+        self._order_changed = False # Leituras mudaram a ordem de uso desde o último índice gravado
+
+    @staticmethod
+    def _name(url: str, box: Tuple[int, int]) -> str:
+        return f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}_{box[0]}x{box[1]}{THUMBNAIL_EXTENSION}"
+
+    def _load_index(self):
+        """Lê o índice e o reconcilia com os arquivos existentes (feito uma vez)."""
+        if self._index_loaded:
+            return
+        try:
+            stored = json.loads((self.cache_dir / INDEX_FILENAME).read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            stored = {}
+        except (OSError, ValueError) as e:
+            log.warning(f"[Miniaturas] Índice corrompido ({e}). Reconstruindo a partir dos arquivos.")
+            stored = {}
+
+        on_disk = {path.name: path for path in self.cache_dir.glob(f"*{THUMBNAIL_EXTENSION}")}
+        # Arquivos sem entrada no índice (ex: o app fechou antes de salvá-lo) entram como os mais antigos.
+        for name in sorted(set(on_disk) - set(stored)):
+            try:
+                self._index[name] = {'bytes': on_disk[name].stat().st_size}
+            except OSError:
+                continue
+        for name, meta in stored.items():
+            if name in on_disk:
+                self._index[name] = meta
+        self._total_bytes = sum(meta.get('bytes', 0) for meta in self._index.values())
+        self._index_loaded = True
+        log.debug(f"[Miniaturas] Índice carregado: {len(self._index)} variantes, {self._total_bytes} bytes.")
+
+    def _save_index(self):
+        try:
+            write_atomic(self.cache_dir / INDEX_FILENAME, json.dumps(self._index, separators=(',', ':')).encode('utf-8'))
+            self._order_changed = False
+        except OSError as e:
+            log.warning(f"[Miniaturas] Não foi possível salvar o índice: {e}")
+
+    def save(self):
+        """Grava o índice se as leituras mudaram a ordem de uso (chamar ao sair)."""
+        with self._lock:
+            if self._order_changed:
+                self._save_index()
+
+    def _remove(self, name: str):
+        self._total_bytes -= self._index.pop(name, {}).get('bytes', 0)
+        try:
+            (self.cache_dir / name).unlink()
+        except FileNotFoundError:
+            pass
+
+    def get(self, url: str, box: Tuple[int, int]) -> Optional[Image.Image]:
+        """Retorna a miniatura da URL para o tamanho `box`, ou None se não estiver no cache."""
+        name = self._name(url, box)
+        with self._lock:
+            self._load_index()
+            if name not in self._index:
+                return None
+            self._index.move_to_end(name)
+            self._order_changed = True
+        try:
+            image = Image.open(self.cache_dir / name)
+            image.load()
+            return image
+        except (OSError, ValueError) as e:
+            log.warning(f"[Miniaturas] Variante corrompida para {url}: {e}. Descartando.")
+            with self._lock:
+                self._remove(name)
+            return None
+
+    def put(self, url: str, box: Tuple[int, int], thumbnail: Image.Image):
+        name = self._name(url, box)
+        buffer = BytesIO()
+        thumbnail.save(buffer, format=THUMBNAIL_FORMAT, **THUMBNAIL_OPTIONS)
+        data = buffer.getvalue()
+        with self._lock:
+            self._load_index()
+            try:
+                write_atomic(self.cache_dir / name, data)
+            except OSError as e:
+                log.warning(f"[Miniaturas] Não foi possível guardar {url}: {e}")
+                return
+            self._total_bytes += len(data) - self._index.pop(name, {}).get('bytes', 0)
+            self._index[name] = {'url': url, 'bytes': len(data)}
+            while self._total_bytes > self.max_bytes and len(self._index) > 1:
+                oldest_name = next(iter(self._index))
+                log.debug(f"[Miniaturas] Removendo variante antiga {oldest_name}")
+                self._remove(oldest_name)
+            self._save_index()
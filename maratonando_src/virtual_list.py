@@ -0,0 +1,137 @@
+# /home/marcos/Maratonando/maratonando_src/virtual_list.py
+import math
+import sys
+import tkinter
+from typing import Any, Callable, List, Optional
+
+from . import customtkinter as ctk
+
+
+class VirtualList:
+    """
+    Lista "virtualizada" sobre um CTkScrollableFrame.
+
+    Só existem widgets para as linhas visíveis (mais uma pequena margem). Ao rolar ou
+    trocar os itens, as mesmas linhas são reposicionadas e recebem novo texto, imagem
+    e comando por `bind_row(linha, índice, item)`, em vez de destruir e recriar widgets.
+
+    `create_row(master)` deve devolver um widget CTk com altura `row_height` (a altura
+    é passada no construtor; o CTk não aceita altura no `place`). `on_view_change`,
+    se informado, é chamado sempre que a parte visível da lista muda.
+    """
+    def __init__(self,
+                 scroll_frame: ctk.CTkScrollableFrame,
+                 row_height: int,
+                 create_row: Callable[[Any], Any],
+                 bind_row: Callable[[Any, int, Any], None],
+                 overscan: int = 2,
+                 on_view_change: Optional[Callable[[], None]] = None):
+        self.frame = scroll_frame
+        self.canvas = scroll_frame._parent_canvas
+        self.row_height = row_height
+        self.overscan = overscan
+        self.items: List[Any] = []
+        self._create_row = create_row
+        self._bind_row = bind_row
+        self._on_view_change = on_view_change
+        self._rows: List[Any] = []
+        self._row_indexes: List[Optional[int]] = [] # Índice do item mostrado por cada linha (None = livre)
+        self._refresh_pending = False
+        self._message_label = None
+
+        scrollbar = scroll_frame._scrollbar
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            self._schedule_refresh()
+        self.canvas.configure(yscrollcommand=on_scroll)
+        self.canvas.bind("<Configure>", lambda event: self._schedule_refresh(), add="+")
+        if sys.platform.startswith("linux"):
+            # No X11 a roda do mouse gera Button-4/5, que o CTkScrollableFrame não trata.
+            self.canvas.bind_all("<Button-4>", lambda event: self._on_linux_wheel(event, -1), add="+")
+            self.canvas.bind_all("<Button-5>", lambda event: self._on_linux_wheel(event, 1), add="+")
+
+    def _scaled_row_height(self) -> float:
+        return self.frame._apply_widget_scaling(self.row_height)
+
+    def _on_linux_wheel(self, event, direction: int):
+        if self.items and self.frame.check_if_master_is_canvas(event.widget):
+            self.canvas.yview_scroll(direction * 3, "units")
+
+    def _schedule_refresh(self):
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.canvas.after_idle(self.refresh)
+
+    def set_items(self, items: List[Any], message: str = "", scroll_to: int = 0):
+        """Troca os itens da lista. Sem itens, mostra `message` no lugar."""
+        self.items = list(items)
+        self._row_indexes = [None] * len(self._rows) # Todas as linhas precisam ser religadas
+
+        if self._message_label is None:
+            self._message_label = ctk.CTkLabel(self.frame, text="")
+        if not self.items and message:
+            self._message_label.configure(text=message)
+            self._message_label.place(relx=0.5, y=10, anchor="n")
+        else:
+            self._message_label.place_forget()
+
+        # As linhas são posicionadas com place(), então a altura do frame interno é a da lista inteira.
+        total_height = max(1, math.ceil(len(self.items) * self._scaled_row_height()))
+        if not self.items and message:
+            total_height = self.frame._apply_widget_scaling(40)
+        tkinter.Frame.configure(self.frame, height=total_height) # CTkScrollableFrame.configure altera o canvas, não o frame
+        self.canvas.configure(scrollregion=(0, 0, 0, total_height))
+        self.scroll_to_index(scroll_to)
+        self.refresh()
+
+    def scroll_to_index(self, index: int):
+        """Rola a lista para que o item `index` fique no topo."""
+        if not self.items:
+            self.canvas.yview_moveto(0)
+            return
+        index = max(0, min(index, len(self.items) - 1))
+        self.canvas.yview_moveto(index / len(self.items))
+
+    def first_visible_index(self) -> int:
+        return min(max(0, int(self.canvas.canvasy(0) // self._scaled_row_height())), max(0, len(self.items) - 1))
+
+    def visible_count(self) -> int:
+        """Quantidade de linhas inteiras que cabem na área visível."""
+        return max(1, int(self.canvas.winfo_height() // self._scaled_row_height()))
+
+    def rebind_visible(self, predicate: Callable[[Any], bool]):
+        """Religa só as linhas visíveis cujos itens satisfazem `predicate` (ex: o item que mudou)."""
+        for slot, index in enumerate(self._row_indexes):
+            if index is not None and predicate(self.items[index]):
+                self._bind_row(self._rows[slot], index, self.items[index])
+
+    def refresh(self, rebind: bool = False):
+        """Liga as linhas aos itens da área visível. Com `rebind`, atualiza também as que já estavam ligadas."""
+        self._refresh_pending = False
+        if not self.frame.winfo_exists():
+            return
+        row_px = self._scaled_row_height()
+        first = max(0, int(self.canvas.canvasy(0) // row_px) - self.overscan)
+        count = math.ceil(max(self.canvas.winfo_height(), row_px) / row_px) + 2 * self.overscan
+        wanted = range(first, min(first + count, len(self.items)))
+
+        while len(self._rows) < len(wanted):
+            self._rows.append(self._create_row(self.frame))
+            self._row_indexes.append(None)
+
+        bound = {index: slot for slot, index in enumerate(self._row_indexes) if index in wanted}
+        free = [slot for slot, index in enumerate(self._row_indexes) if index not in bound]
+        for index in wanted:
+            slot = bound.get(index)
+            if slot is None:
+                slot = free.pop()
+                self._row_indexes[slot] = index
+                self._bind_row(self._rows[slot], index, self.items[index])
+                self._rows[slot].place(x=0, y=index * self.row_height, relwidth=1.0)
+            elif rebind:
+                self._bind_row(self._rows[slot], index, self.items[index])
+        for slot in free:
+            self._rows[slot].place_forget()
+            self._row_indexes[slot] = None
+        if self._on_view_change:
+            self._on_view_change()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Compara os backends de parse HTML (html.parser x lxml) em páginas salvas do AnimeFire.
+
+Para cada arquivo e backend disponível mede:
+  - a árvore completa (BeautifulSoup sem filtro),
+  - a árvore reduzida pelo SoupStrainer do parser,
+  - o método de extração completo do parser (árvore reduzida + extração dos dados).
+
+Uso:
+    python scripts/benchmark_html_backends.py pagina_busca.html pagina_anime.html [--repeat 20] [--json]
+"""
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from maratonando_src.core.parsers import html_backend  # noqa: E402
+from maratonando_src.core.parsers.animefire_parser import (  # noqa: E402
+    AnimeFireParser, BASE_URL, SEARCH_STRAINER, DETAILS_STRAINER, EPISODE_STRAINER,
+)
+
+STRAINERS = {'search': SEARCH_STRAINER, 'details': DETAILS_STRAINER, 'episode': EPISODE_STRAINER}
+
+
+def detect_kind(html: str) -> str:
+    if 'divCardUltimosEps' in html:
+        return 'search'
+    if 'aniTitulo' in html or 'class="lEp ' in html:
+        return 'details'
+    return 'episode'
+
+
+def targeted_parse(parser: AnimeFireParser, kind: str, html: str):
+    if kind == 'search':
+        return parser._parse_search(html)
+    if kind == 'details':
+        return parser._parse_details(html, {'episodes': [], 'title': 'Desconhecido', 'cover_url': None})
+    return parser._parse_episode_page(html, BASE_URL)
+
+
+def measure(func, repeat: int) -> float:
+    """Mediana do tempo de `func` em milissegundos."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('files', nargs='+', type=Path, help="Páginas HTML salvas")
+    arg_parser.add_argument('--repeat', type=int, default=10, help="Repetições por medição (padrão: 10)")
+    arg_parser.add_argument('--json', action='store_true', help="Saída em JSON")
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    parser = AnimeFireParser.__new__(AnimeFireParser) # Só os métodos de parse; sem rede nem cache
+    parser.base_url = BASE_URL
+
+    rows = []
+    for path in args.files:
+        html = path.read_text(encoding='utf-8', errors='replace')
+        kind = detect_kind(html)
+        for backend in html_backend.available_backends():
+            html_backend.set_backend(backend)
+            rows.append({
+                'file': path.name,
+                'kind': kind,
+                'backend': backend,
+                'bytes': len(html.encode('utf-8')),
+                'full_tree_ms': round(measure(lambda: BeautifulSoup(html, backend), args.repeat), 3),
+                'strained_tree_ms': round(measure(lambda: html_backend.make_soup(html, STRAINERS[kind]), args.repeat), 3),
+                'extract_ms': round(measure(lambda: targeted_parse(parser, kind, html), args.repeat), 3),
+            })
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'arquivo':<28} {'tipo':<8} {'backend':<12} {'árvore (ms)':>12} {'reduzida (ms)':>14} {'extração (ms)':>14}")
+    for row in rows:
+        print(f"{row['file']:<28} {row['kind']:<8} {row['backend']:<12} {row['full_tree_ms']:>12.2f} "
+              f"{row['strained_tree_ms']:>14.2f} {row['extract_ms']:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline dos parsers usando páginas gravadas (scripts/fixtures/<fonte>/).
+
+Um servidor HTTP local responde no lugar do site com as páginas gravadas, então o
+resultado não depende da rede nem do humor do site. Para cada método do parser
+(search, get_details, get_video_source) são medidos:
+  - parse_ms:      tempo só de extração sobre o HTML já carregado (mediana);
+  - alloc_kb:      pico de memória alocada durante uma extração (tracemalloc);
+  - alloc_blocks:  blocos de memória ainda alocados ao fim da extração (tracemalloc);
+  - wall_ms:       tempo de ponta a ponta do método, com requisições ao servidor local (mediana).
+
+Uso:
+    python scripts/benchmark_parsers.py [--repeat 10] [--episodes 1000] [--json] [--output resultado.json]
+    python scripts/benchmark_parsers.py --compare resultado_da_versao_anterior.json
+"""
+import argparse
+import functools
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# O cache em disco do app não pode mascarar as medições: usa um diretório descartável.
+os.environ['XDG_CACHE_HOME'] = tempfile.mkdtemp(prefix="maratonando-bench-")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from maratonando_src.core.parsers import html_backend  # noqa: E402
+from maratonando_src.core.parsers.animefire_parser import AnimeFireParser  # noqa: E402
+from maratonando_src.utils.http_client import HttpClient  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+BASE_URL_PLACEHOLDER = "{{BASE_URL}}"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Responde cada rota com a página gravada correspondente (rotas definidas por fonte)."""
+    routes = []          # [(regex, nome_do_arquivo, content_type)]
+    pages = {}           # nome_do_arquivo -> bytes já com o host local
+    protocol_version = "HTTP/1.1" # keep-alive, como no site real
+
+    def do_GET(self):
+        for pattern, name, content_type in self.routes:
+            if pattern.match(self.path):
+                body = self.pages[name]
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+        self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def expand_episodes(details_html: str, episodes: int) -> str:
+    """Gera uma página de anime com `episodes` episódios a partir da página gravada."""
+    links = re.findall(r'<a class="lEp [^>]*>.*?</a>\n', details_html)
+    if not links:
+        return details_html
+    template = links[0]
+    first_num = re.search(r'/(\d+)"', template).group(1)
+    new_links = "".join(template.replace(f'/{first_num}"', f'/{n}"').replace(f'Episódio {first_num}<', f'Episódio {n}<')
+                        for n in range(episodes, 0, -1))
+    start = details_html.index(links[0])
+    end = details_html.index(links[-1]) + len(links[-1])
+    return details_html[:start] + new_links + details_html[end:]
+
+
+def animefire_target(base_url: str, episodes: int):
+    """Monta o parser do AnimeFire apontando para o servidor local e os casos medidos."""
+    fixtures = FIXTURES_DIR / "animefire"
+    pages = {name: (fixtures / name).read_text(encoding='utf-8') for name in
+             ("search.html", "details.html", "episode.html", "video.json")}
+    if episodes:
+        pages["details.html"] = expand_episodes(pages["details.html"], episodes)
+    routes = [
+        (re.compile(r"^/pesquisar/"), "search.html", "text/html; charset=utf-8"),
+        (re.compile(r"^/animes/[^/]+-todos-os-episodios$"), "details.html", "text/html; charset=utf-8"),
+        (re.compile(r"^/animes/[^/]+/\d+$"), "episode.html", "text/html; charset=utf-8"),
+        (re.compile(r"^/video/"), "video.json", "application/json"),
+    ]
+
+    parser = AnimeFireParser(base_url=base_url, http_client=HttpClient())
+    parser.details_cache = None # Mede sempre o parse de verdade
+    empty_details = lambda: {'episodes': [], 'type': 'series', 'title': 'Desconhecido', 'cover_url': None}
+    cases = {
+        'search': {
+            'page': "search.html",
+            'parse': lambda html: parser._parse_search(html),
+            'call': lambda: parser.search("naruto"),
+        },
+        'get_details': {
+            'page': "details.html",
+            'parse': lambda html: parser._parse_details(html, empty_details()),
+            'call': lambda: parser.get_details(base_url + "animes/naruto-todos-os-episodios"),
+        },
+        'get_video_source': {
+            'page': "episode.html",
+            'parse': lambda html: parser._parse_episode_page(html, base_url + "animes/naruto/1"),
+            'call': lambda: parser.get_video_source(base_url + "animes/naruto/1"),
+        },
+    }
+    return pages, routes, cases
+
+
+# Fontes com páginas gravadas. Um novo parser entra aqui com sua pasta de fixtures.
+# O AnimesOnlineParser só existe na cópia da versão 2.0.0 (src/Maratonando-2.0.0/), que o app
+# não carrega nem instala; o maratonando_src/ atual registra apenas o AnimeFire.
+TARGETS = {
+    'AnimeFire': animefire_target,
+}
+
+
+def median_ms(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def measure_allocations(func):
+    tracemalloc.start()
+    try:
+        func()
+        current_snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count for stat in current_snapshot.statistics('filename'))
+    return round(peak / 1024, 1), blocks
+
+
+def run_target(name: str, factory, repeat: int, episodes: int):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    base_url = f"http://127.0.0.1:{server.server_port}/"
+    pages, routes, cases = factory(base_url, episodes)
+    handler = type(f"{name}FixtureHandler", (FixtureHandler,), {
+        'routes': routes,
+        'pages': {page: text.replace(BASE_URL_PLACEHOLDER, base_url).encode('utf-8') for page, text in pages.items()},
+    })
+    server.RequestHandlerClass = handler
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = []
+    try:
+        for method, case in cases.items():
+            html = handler.pages[case['page']].decode('utf-8')
+            parse = functools.partial(case['parse'], html)
+            case['call']() # Aquecimento: abre a conexão e compila regex/seletores
+            alloc_kb, alloc_blocks = measure_allocations(parse)
+            results.append({
+                'parser': name,
+                'method': method,
+                'page_bytes': len(html.encode('utf-8')),
+                'parse_ms': median_ms(parse, repeat),
+                'alloc_kb': alloc_kb,
+                'alloc_blocks': alloc_blocks,
+                'wall_ms': median_ms(case['call'], repeat),
+            })
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def compare(current, baseline_path: Path):
+    baseline = {(row['parser'], row['method']): row for row in json.loads(baseline_path.read_text())['results']}
+    print(f"\nComparação com {baseline_path.name} (positivo = mais lento/maior):")
+    for row in current:
+        old = baseline.get((row['parser'], row['method']))
+        if not old:
+            continue
+        deltas = []
+        for metric in ('parse_ms', 'alloc_kb', 'wall_ms'):
+            if old.get(metric):
+                deltas.append(f"{metric} {((row[metric] - old[metric]) / old[metric]) * 100:+.1f}%")
+        print(f"  {row['parser']}.{row['method']}: {', '.join(deltas)}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--repeat', type=int, default=10, help="Repetições por medição (padrão: 10)")
+    arg_parser.add_argument('--episodes', type=int, default=0,
+                            help="Gera a página do anime com N episódios (padrão: usa a página gravada)")
+    arg_parser.add_argument('--parser', choices=sorted(TARGETS), action='append', help="Limita a um parser (pode repetir)")
+    arg_parser.add_argument('--json', action='store_true', help="Imprime o resultado em JSON")
+    arg_parser.add_argument('--output', type=Path, help="Grava o resultado em JSON neste arquivo")
+    arg_parser.add_argument('--compare', type=Path, help="JSON de uma execução anterior para comparar")
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    results = []
+    for name in args.parser or sorted(TARGETS):
+        results.extend(run_target(name, TARGETS[name], args.repeat, args.episodes))
+
+    report = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'html_backend': html_backend.get_backend(),
+        'repeat': args.repeat,
+        'episodes': args.episodes or None,
+        'results': results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Backend HTML: {report['html_backend']} | Python {report['python']} | {args.repeat} repetições")
+        print(f"{'parser.método':<28} {'página (KB)':>11} {'parse (ms)':>11} {'pico (KB)':>10} {'blocos':>8} {'total (ms)':>11}")
+        for row in results:
+            print(f"{row['parser'] + '.' + row['method']:<28} {row['page_bytes'] / 1024:>11.1f} {row['parse_ms']:>11.2f} "
+                  f"{row['alloc_kb']:>10.1f} {row['alloc_blocks']:>8} {row['wall_ms']:>11.2f}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
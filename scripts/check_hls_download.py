@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Verifica o download HLS (core/hls_downloader.py) contra um servidor HTTP local.
+
+O servidor serve uma playlist sintética (master -> variantes -> segmentos) e atrasa
+cada segmento, para que a concorrência seja observável. São conferidos:
+  - o arquivo final é a concatenação exata dos segmentos da melhor variante;
+  - segmentos que falham na primeira vez são tentados de novo;
+  - nunca há mais que --window segmentos sendo baixados ao mesmo tempo (e há mais de um);
+  - um download cancelado no meio continua de onde parou, sem baixar de novo o que já foi gravado;
+  - segmentos com EXT-X-BYTERANGE;
+  - variantes com o áudio numa playlist separada (EXT-X-MEDIA) são recusadas (ficam com o yt-dlp).
+Com o ffmpeg instalado, um vídeo de teste real é gerado e o remux para MP4 também é conferido.
+
+Uso:
+    python scripts/check_hls_download.py [--segments 40] [--window 6] [--delay-ms 30]
+"""
+import argparse
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from maratonando_src.core.hls_downloader import HlsDownloader  # noqa: E402
+from maratonando_src.core.segmented_downloader import DownloadCancelled, UnsupportedSourceError  # noqa: E402
+from maratonando_src.utils.http_client import HttpClient  # noqa: E402
+
+
+class PlaylistHandler(BaseHTTPRequestHandler):
+    """Rotas: /master.m3u8, /<variante>/index.m3u8, /<variante>/<n>.ts e /ranged/all.ts (com Range)."""
+    files = {}           # caminho -> bytes
+    delay = 0.0
+    fail_once = set()    # Segmentos que respondem 500 na primeira requisição
+    active = 0
+    peak = 0
+    requests_seen = []
+    lock = threading.Lock()
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        with self.lock:
+            self.requests_seen.append(path)
+            failing = path in self.fail_once
+            self.fail_once.discard(path)
+        body = self.files.get(path)
+        if body is None or failing:
+            self.send_response(404 if body is None else 500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        is_segment = not path.endswith(".m3u8")
+        if is_segment:
+            with self.lock:
+                PlaylistHandler.active += 1
+                PlaylistHandler.peak = max(PlaylistHandler.peak, PlaylistHandler.active)
+        try:
+            if is_segment:
+                time.sleep(self.delay)
+            status, match = 200, re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+            if match:
+                start, end = int(match.group(1)), int(match.group(2))
+                body, status = body[start:end + 1], 206
+            self.send_response(status)
+            self.send_header("Content-Type", "application/vnd.apple.mpegurl" if body.startswith(b"#EXTM3U") else "video/mp2t")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            if is_segment:
+                with self.lock:
+                    PlaylistHandler.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+def synthetic_segments(count: int):
+    return [os.urandom(50_000 + i * 37) for i in range(count)]
+
+
+def ffmpeg_segments(ffmpeg: str, workdir: Path):
+    """Gera um vídeo de teste real em segmentos HLS. Retorna a lista de bytes dos segmentos."""
+    subprocess.run([ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=duration=20:size=320x240:rate=25",
+                    "-f", "lavfi", "-i", "sine=duration=20", "-c:v", "libx264", "-c:a", "aac", "-f", "hls",
+                    "-hls_time", "1", "-hls_list_size", "0", str(workdir / "gen.m3u8")], check=True)
+    names = [line for line in (workdir / "gen.m3u8").read_text().splitlines() if line and not line.startswith("#")]
+    return [(workdir / name).read_bytes() for name in names]
+
+
+def media_playlist(names, ranges=None) -> bytes:
+    lines = ["#EXTM3U", "#EXT-X-VERSION:4", "#EXT-X-TARGETDURATION:2", "#EXT-X-MEDIA-SEQUENCE:0"]
+    for i, name in enumerate(names):
+        lines.append("#EXTINF:1.000,")
+        if ranges:
+            lines.append(f"#EXT-X-BYTERANGE:{ranges[i][0]}@{ranges[i][1]}")
+        lines.append(name)
+    lines.append("#EXT-X-ENDLIST")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--segments', type=int, default=40, help="Segmentos da playlist sintética.")
+    arg_parser.add_argument('--window', type=int, default=6, help="Janela de segmentos simultâneos.")
+    arg_parser.add_argument('--delay-ms', type=float, default=30, help="Atraso do servidor por segmento.")
+    arg_parser.add_argument('--verbose', action='store_true')
+    args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+
+    workdir = Path(tempfile.mkdtemp(prefix="maratonando-hls-"))
+    ffmpeg = shutil.which("ffmpeg")
+    segments = ffmpeg_segments(ffmpeg, workdir) if ffmpeg else synthetic_segments(args.segments)
+    names = [f"{i}.ts" for i in range(len(segments))]
+    files = {f"/hi/{name}": data for name, data in zip(names, segments)}
+    files.update({f"/lo/{name}": b"baixa" for name in names})
+    files["/hi/index.m3u8"] = media_playlist(names)
+    files["/lo/index.m3u8"] = media_playlist(names)
+    files["/master.m3u8"] = (b"#EXTM3U\n"
+                             b"#EXT-X-STREAM-INF:BANDWIDTH=300000,RESOLUTION=426x240\nlo/index.m3u8\n"
+                             b"#EXT-X-STREAM-INF:BANDWIDTH=1200000,RESOLUTION=1280x720,CODECS=\"avc1.64001f,mp4a.40.2\"\nhi/index.m3u8\n")
+    joined = b"".join(segments)
+    offsets, position = [], 0
+    for data in segments:
+        offsets.append((len(data), position))
+        position += len(data)
+    files["/demuxed.m3u8"] = (b"#EXTM3U\n"
+                              b"#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID=\"aud\",NAME=\"pt\",DEFAULT=YES,URI=\"lo/index.m3u8\"\n"
+                              b"#EXT-X-STREAM-INF:BANDWIDTH=1200000,RESOLUTION=1280x720,AUDIO=\"aud\"\nhi/index.m3u8\n")
+    files["/ranged/all.ts"] = joined
+    files["/ranged/index.m3u8"] = media_playlist(["all.ts"] * len(segments), offsets)
+    PlaylistHandler.files = files
+    PlaylistHandler.delay = args.delay_ms / 1000
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PlaylistHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    downloader = HlsDownloader(window=args.window, remux=bool(ffmpeg), http=HttpClient(pool_maxsize=args.window))
+    failures = []
+
+    def check(condition, description):
+        print(f"  [{'ok' if condition else 'FALHOU'}] {description}")
+        if not condition:
+            failures.append(description)
+
+    print(f"{len(segments)} segmentos ({len(joined)} bytes), janela {args.window}, "
+          f"{'com' if ffmpeg else 'sem'} ffmpeg. Pasta: {workdir}")
+
+    # 1. Download completo, com dois segmentos que falham uma vez.
+    PlaylistHandler.fail_once = {"/hi/3.ts", f"/hi/{len(segments) - 2}.ts"}
+    events = []
+    started = time.perf_counter()
+    result = downloader.download(f"{base}/master.m3u8", str(workdir), "completo", on_progress=events.append)
+    elapsed = time.perf_counter() - started
+    print(f"Download completo: {elapsed * 1000:.0f} ms ({len(segments) * args.delay_ms:.0f} ms se fosse sequencial)")
+    if ffmpeg:
+        probe = subprocess.run([ffmpeg, "-hide_banner", "-i", str(result)], capture_output=True, text=True)
+        check(result.suffix == ".mp4" and "Video: h264" in probe.stderr, "remux para MP4 com o ffmpeg")
+    else:
+        check(result.read_bytes() == joined, "arquivo final é a concatenação dos segmentos da melhor variante")
+    check(not PlaylistHandler.fail_once, "segmentos com erro foram tentados de novo")
+    check(1 < PlaylistHandler.peak <= args.window, f"pico de {PlaylistHandler.peak} segmentos simultâneos (máx. {args.window})")
+    check(bool(events) and events[-1].status == 'finished' and events[-1].fragment_count == len(segments),
+          f"{len(events)} eventos de progresso, o último 'finished'")
+
+    # 2. Cancelar no meio e continuar.
+    PlaylistHandler.requests_seen = []
+    cancel_event = threading.Event()
+    threading.Timer(len(segments) * PlaylistHandler.delay / args.window / 2, cancel_event.set).start()
+    try:
+        downloader.download(f"{base}/hi/index.m3u8", str(workdir), "retomado", cancel_event=cancel_event)
+        check(False, "cancelamento interrompe o download")
+    except DownloadCancelled:
+        check(True, "cancelamento interrompe o download")
+    first_pass = {path for path in PlaylistHandler.requests_seen if path.endswith(".ts")}
+    PlaylistHandler.requests_seen = []
+    result = downloader.download(f"{base}/hi/index.m3u8", str(workdir), "retomado")
+    second_pass = [path for path in PlaylistHandler.requests_seen if path.endswith(".ts")]
+    check(len(second_pass) < len(segments), f"retomada baixou {len(second_pass)} de {len(segments)} segmentos "
+                                            f"({len(first_pass)} pedidos antes do cancelamento)")
+    check(ffmpeg is not None or result.read_bytes() == joined, "arquivo retomado está completo e na ordem")
+
+    # 3. EXT-X-BYTERANGE (todos os segmentos no mesmo arquivo).
+    result = downloader.download(f"{base}/ranged/index.m3u8", str(workdir), "byterange")
+    check(ffmpeg is not None or result.read_bytes() == joined, "segmentos com EXT-X-BYTERANGE")
+
+    # 4. Áudio separado do vídeo.
+    try:
+        downloader.download(f"{base}/demuxed.m3u8", str(workdir), "demuxed")
+        check(False, "variante com áudio separado é recusada")
+    except UnsupportedSourceError:
+        check(True, "variante com áudio separado é recusada")
+
+    server.shutdown()
+    if failures:
+        print(f"{len(failures)} verificação(ões) falharam.")
+        return 1
+    shutil.rmtree(workdir, ignore_errors=True)
+    print("Tudo certo.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Verifica o custo de importação dos pontos de entrada da CLI.
+
+Para cada módulo verificado, um processo Python novo é iniciado com `-X importtime`
+e são mostrados:
+  - o tempo total de importação (mediana de --repeat execuções);
+  - os módulos mais caros (tempo acumulado, da primeira execução);
+  - módulos pesados que não deveriam ser carregados (Tk, PIL, customtkinter,
+    darkdetect, requests, bs4, lxml). Se algum aparecer, o script termina com erro.
+
+Também mede o tempo de ponta a ponta de `maratonando --help`.
+
+Uso:
+    python scripts/check_import_time.py [--repeat 5] [--budget-ms 150] [--top 10]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# Módulos que a CLI só pode carregar quando realmente precisa deles (ex: ao buscar).
+FORBIDDEN_PREFIXES = (
+    'tkinter', '_tkinter', 'PIL', 'maratonando_src.customtkinter', 'customtkinter',
+    'maratonando_src.darkdetect', 'darkdetect', 'requests', 'urllib3', 'bs4', 'lxml',
+)
+
+CHECKED_MODULES = ('maratonando_src.main', 'maratonando_src.cli')
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, '-c', code], cwd=PROJECT_DIR,
+                          capture_output=True, text=True, env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'})
+
+
+def profile_import(module: str):
+    """Importa `module` num processo novo. Retorna (total_us, [(acumulado_us, nome)], módulos carregados)."""
+    code = f"import sys, {module}; print('\\n'.join(sorted(sys.modules)))"
+    result = run_python(code, '-X', 'importtime')
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}:\n{result.stderr}")
+    entries = []
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, name = int(match.group(2)), match.group(3)
+        entries.append((cumulative, name))
+        if name == module:
+            total_us = cumulative
+    return total_us, entries, result.stdout.split()
+
+
+def measure_help(repeat: int) -> float:
+    code = "import sys; from maratonando_src.main import start; sys.argv = ['maratonando', '--help']; start()"
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run_python(code)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--repeat', type=int, default=5, help="Execuções por medição (usa a mediana).")
+    arg_parser.add_argument('--budget-ms', type=float, default=None, help="Falha se a importação de algum módulo passar deste tempo.")
+    arg_parser.add_argument('--top', type=int, default=10, help="Quantos módulos mais caros mostrar.")
+    args = arg_parser.parse_args()
+
+    failed = False
+    for module in CHECKED_MODULES:
+        totals = []
+        for i in range(args.repeat):
+            total_us, entries, loaded = profile_import(module)
+            totals.append(total_us / 1000)
+            if i == 0:
+                first_entries, first_loaded = entries, loaded
+        total_ms = statistics.median(totals)
+        print(f"{module}: {total_ms:.1f} ms (mediana de {args.repeat})")
+        for cumulative, name in sorted(first_entries, reverse=True)[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+        forbidden = sorted(name for name in first_loaded if name.startswith(FORBIDDEN_PREFIXES))
+        if forbidden:
+            failed = True
+            print(f"  ERRO: {module} carrega módulos pesados: {', '.join(forbidden[:15])}"
+                  f"{' ...' if len(forbidden) > 15 else ''}")
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            failed = True
+            print(f"  ERRO: {total_ms:.1f} ms acima do limite de {args.budget_ms:.1f} ms")
+
+    print(f"maratonando --help: {measure_help(args.repeat):.1f} ms de ponta a ponta (mediana de {args.repeat})")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())